@@ -0,0 +1,231 @@
+"""
+Benchmark cases of gallop
+
+Each case is a setup function returning the function to time,
+register it with @benchmark(name)
+"""
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import CLASS_ROOM, to_classroom
+from gallop.funcs import Importer
+from gallop.loader import CONFIG_CACHE
+from gallop.schema import schema
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import atexit
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+GALLOP = str(Path(__file__).parent.parent / "gallop" / "bin" / "gallop")
+
+# name => (setup, loops, repeat), loops None to calibrate,
+# repeat None for the repeat of the run
+CASES: Dict[str, Any] = dict()
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="gallop-bench-"))
+atexit.register(shutil.rmtree, WORK_DIR, ignore_errors=True)
+
+
+def benchmark(
+    name: str,
+    loops: Optional[int] = None,
+    repeat: Optional[int] = None
+) -> Callable:
+    def wrapper(setup: Callable[[], Callable]) -> Callable:
+        CASES[name] = (setup, loops, repeat)
+        return setup
+    return wrapper
+
+
+@to_classroom("bench_add")
+def bench_add(a: int = 0, b: int = 0) -> int:
+    return a + b
+
+
+def deep_item(depth: int) -> Dict[str, Any]:
+    item = dict(func_name="bench_add", kwargs=dict(a=1, b=1))
+    for _ in range(depth):
+        item = dict(func_name="bench_add", kwargs=dict(a=item, b=1))
+    return item
+
+
+def wide_dict(width: int, depth: int = 3) -> Dict[str, Any]:
+    """
+    A tree of dicts and lists, width keys at the top
+    """
+    return dict(
+        (f"key_{i}", dict(
+            name=f"node {i}",
+            values=list(range(depth * 4)),
+            children=list(
+                dict(index=j, flag=bool(j % 2), label=f"{i}.{j}")
+                for j in range(depth)),
+        ))
+        for i in range(width))
+
+
+def write_data(name: str, data: Any) -> Path:
+    path = WORK_DIR / name
+    if name.endswith(".json"):
+        path.write_text(json.dumps(data))
+    else:
+        import yaml
+        path.write_text(yaml.safe_dump(data))
+    return path
+
+
+@benchmark("resolve_deep")
+def resolve_deep():
+    config = BaseConfig(task=deep_item(100))
+    return lambda: Caller.resolve_item(config)
+
+
+@benchmark("resolve_wide")
+def resolve_wide():
+    config = BaseConfig(steps=list(
+        dict(func_name="bench_add", args=[i, 1]) for i in range(1000)))
+    return lambda: Caller.resolve_item(config)
+
+
+@benchmark("config_construct")
+def config_construct():
+    data = wide_dict(1000)
+    return lambda: BaseConfig(**data)
+
+
+@benchmark("config_to_dict")
+def config_to_dict():
+    config = BaseConfig(**wide_dict(1000))
+    return config.to_dict
+
+
+@benchmark("config_overwrite")
+def config_overwrite():
+    config = BaseConfig(**wide_dict(1000))
+    keys = list(f"key_{i}.children.1.label" for i in range(1000))
+
+    def run():
+        for key in keys:
+            config.overwrite(key, "changed")
+    return run
+
+
+@benchmark("config_apply_patch")
+def config_apply_patch():
+    config = BaseConfig(**wide_dict(1000))
+    patch = list(
+        dict(op="set", path=f"key_{i}.children.1.label", value="changed")
+        for i in range(1000))
+    return lambda: config.apply_patch(patch)
+
+
+@schema
+class BenchChild:
+    index: int
+    flag: bool
+    label: str
+
+
+@schema
+class BenchNode:
+    name: str
+    values: List[int]
+    children: List[BenchChild]
+
+
+def read_fields(nodes: List[Any]) -> Callable:
+    def run():
+        total = 0
+        for node in nodes:
+            total += len(node.name) + len(node.children[1].label)
+        return total
+    return run
+
+
+@benchmark("config_getattr")
+def config_getattr():
+    config = BaseConfig(**wide_dict(1000))
+    nodes = list(config[key] for key in config.keys())
+    # substantiated once, then read in a loop
+    read_fields(nodes)()
+    return read_fields(nodes)
+
+
+@benchmark("schema_getattr")
+def schema_getattr():
+    data = wide_dict(1000)
+    return read_fields(list(BenchNode.from_dict(data[key]) for key in data))
+
+
+@benchmark("schema_construct")
+def schema_construct():
+    data = list(wide_dict(1000).values())
+    return lambda: list(BenchNode.from_dict(node) for node in data)
+
+
+@benchmark("schema_to_dict")
+def schema_to_dict():
+    nodes = list(
+        BenchNode.from_dict(node) for node in wide_dict(1000).values())
+    return lambda: list(node.to_dict() for node in nodes)
+
+
+@benchmark("importer_cold")
+def importer_cold():
+    def run():
+        # not in CLASS_ROOM, nor imported
+        CLASS_ROOM.pop("colorsys.rgb_to_hsv", None)
+        sys.modules.pop("colorsys", None)
+        Importer("colorsys.rgb_to_hsv")
+    return run
+
+
+@benchmark("importer_cached")
+def importer_cached():
+    Importer("colorsys.rgb_to_hsv")
+    return lambda: Importer("colorsys.rgb_to_hsv")
+
+
+@benchmark("from_yaml", loops=1, repeat=2)
+def from_yaml():
+    # about 2 MB
+    path = write_data("big.yaml", wide_dict(8000))
+
+    def run():
+        enabled = CONFIG_CACHE["enabled"]
+        CONFIG_CACHE["enabled"] = False
+        try:
+            BaseConfig.from_yaml(path)
+        finally:
+            CONFIG_CACHE["enabled"] = enabled
+    return run
+
+
+@benchmark("from_yaml_cached")
+def from_yaml_cached():
+    path = write_data("big_cached.yaml", wide_dict(8000))
+    BaseConfig.from_yaml(path)
+    return lambda: BaseConfig.from_yaml(path)
+
+
+@benchmark("from_json")
+def from_json():
+    path = write_data("big.json", wide_dict(8000))
+    return lambda: BaseConfig.from_json(path)
+
+
+@benchmark("cli_end_to_end", loops=3)
+def cli_end_to_end():
+    path = write_data("cli_task.yaml", dict(steps=list(
+        dict(func_name="use:builtins.sum", args=[[i, 1]], checkin=f"sum_{i}")
+        for i in range(50))))
+    args = [
+        sys.executable, GALLOP, str(path.with_suffix("")),
+        "--param:steps.0.args.0.0", "10", "--output", "sum_0"]
+    # parse and cache the yaml once
+    subprocess.run(args, capture_output=True, check=True)
+    return lambda: subprocess.run(args, capture_output=True, check=True)
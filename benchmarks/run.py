@@ -0,0 +1,131 @@
+"""
+Run the gallop benchmarks, compare with the stored baseline
+
+    python benchmarks/run.py
+    python benchmarks/run.py --filter config --threshold 0.3
+    python benchmarks/run.py --save     # store the numbers as the baseline
+
+The baseline is specific to the machine, save one before comparing
+"""
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import logging
+import platform
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from cases import CASES  # noqa: E402
+
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+# a case slower than the baseline by this fraction is a regression
+DEFAULT_THRESHOLD = 0.2
+
+# calibrate the loops so a repeat takes at least this long
+MIN_REPEAT_TIME = 0.1
+
+
+def time_case(
+    name: str,
+    repeat: int = 5,
+    loops: Optional[int] = None
+) -> float:
+    """
+    Best time of one call, in seconds
+    """
+    setup, case_loops, case_repeat = CASES[name]
+    func = setup()
+    loops = loops or case_loops
+    repeat = min(repeat, case_repeat or repeat)
+    if loops is None:
+        loops = 1
+        while True:
+            start = perf_counter()
+            for _ in range(loops):
+                func()
+            if perf_counter() - start >= MIN_REPEAT_TIME or loops >= 10000:
+                break
+            loops *= 2
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (perf_counter() - start) / loops)
+    return best
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float
+) -> List[str]:
+    """
+    Print a table, return the names of the regressed cases
+    """
+    regressed = []
+    print(f"{'case':<24}{'time':>12}{'baseline':>12}{'ratio':>8}")
+    for name, seconds in results.items():
+        line = f"{name:<24}{seconds * 1e3:>10.3f}ms"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"{baseline[name] * 1e3:>10.3f}ms{ratio:>8.2f}"
+            if ratio > 1 + threshold:
+                line += "  ❌ regressed"
+                regressed.append(name)
+        print(line)
+    return regressed
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return dict(results=dict())
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--filter", default="", help="run the matching cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="allowed slow down, 0.2 for 20%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="save as the baseline")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.ERROR)
+    results = dict()
+    for name in CASES:
+        if args.filter in name:
+            results[name] = time_case(name, repeat=args.repeat)
+
+    baseline = load_baseline(args.baseline)
+    regressed = compare(results, baseline["results"], args.threshold)
+
+    if args.save:
+        baseline["results"].update(results)
+        baseline["machine"] = dict(
+            python=platform.python_version(),
+            platform=platform.platform(),
+            processor=platform.processor())
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressed:
+        print(f"{len(regressed)} regressed over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
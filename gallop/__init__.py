@@ -1,4 +1,19 @@
 __version__ = "0.0.5"
 
 
-from gallop.classroom import (cl, CLASS_ROOM)
+# names exported from the sub modules,
+# imported at the first access to keep 'import gallop' light
+LAZY_IMPORTS = dict(
+    cl="gallop.classroom",
+    CLASS_ROOM="gallop.classroom",
+    to_classroom="gallop.classroom",
+    new_run="gallop.classroom",
+    BaseConfig="gallop.config",
+)
+
+
+def __getattr__(name: str):
+    if name in LAZY_IMPORTS:
+        from importlib import import_module
+        return getattr(import_module(LAZY_IMPORTS[name]), name)
+    raise AttributeError(f"module 'gallop' has no attribute '{name}'")
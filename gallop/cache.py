@@ -0,0 +1,254 @@
+from gallop.config import BaseConfig
+from gallop.loader import CACHE_DIR
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+from threading import Lock
+import logging
+import os
+
+
+# 1 GB of step results by default
+DEFAULT_CACHE_SIZE = 2 ** 30
+
+
+def feed(digest: Any, x: Any):
+    """
+    Feed a canonical encoding of x to the hash,
+    equal dicts and sets encode the same whatever their order
+    """
+    kind = type(x)
+    if x is None or kind in (bool, int, float, complex):
+        digest.update(f"{kind.__name__}:{x!r};".encode())
+    elif kind in (str, bytes):
+        data = x.encode() if kind == str else x
+        digest.update(f"{kind.__name__}:{len(data)}:".encode())
+        digest.update(data)
+    elif kind in (list, tuple):
+        digest.update(f"{kind.__name__}:{len(x)}:".encode())
+        for y in x:
+            feed(digest, y)
+    elif kind == dict:
+        digest.update(f"dict:{len(x)}:".encode())
+        for item in sorted(hash_of(k) + hash_of(v) for k, v in x.items()):
+            digest.update(item)
+    elif kind in (set, frozenset):
+        digest.update(f"set:{len(x)}:".encode())
+        for item in sorted(hash_of(y) for y in x):
+            digest.update(item)
+    elif hasattr(x, "conf_data"):
+        # a BaseConfig
+        feed(digest, x.to_dict())
+    elif hasattr(x, "dtype") and hasattr(x, "tobytes"):
+        # numpy array
+        digest.update(f"array:{x.dtype}:{x.shape}:".encode())
+        digest.update(x.tobytes())
+    else:
+        import pickle
+        digest.update(b"pickle:")
+        digest.update(pickle.dumps(x, protocol=4))
+
+
+def hash_of(x: Any) -> bytes:
+    import hashlib
+    digest = hashlib.sha256()
+    feed(digest, x)
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    On disk, content addressed cache of step results,
+    the least recently used results are evicted
+    when the cache grows beyond max_size bytes
+    """
+    # evict down to this fraction of max_size, so the next puts
+    # do not scan the directory again
+    LOW_WATER = 0.9
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR / "results",
+        max_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = int(max_size)
+        # bytes in the cache, counted at the first put
+        self.size = None
+        self.lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"ResultCache({self.cache_dir}, max_size={self.max_size})"
+
+    @staticmethod
+    def make_key(
+        func_name: str,
+        args: List[Any],
+        kwargs: Dict[str, Any],
+        version: Any = None
+    ) -> Optional[str]:
+        """
+        Hash the func_name, resolved args/kwargs and version,
+        None if the args can not be hashed
+        """
+        import hashlib
+        digest = hashlib.sha256()
+        try:
+            feed(digest, (func_name, version, args, kwargs))
+        except Exception as e:
+            logging.debug(f"🙈 Can not hash args of {func_name}: {e}")
+            return None
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Return (hit, value)
+        """
+        import pickle
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        # mark as recently used
+        os.utime(path)
+        return True, value
+
+    def put(self, key: str, value: Any):
+        """
+        Save the value, then evict if the cache is beyond max_size
+        """
+        import pickle
+        from tempfile import NamedTemporaryFile
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # a file of its own for every writer, threads or processes
+        with NamedTemporaryFile(
+                dir=path.parent, suffix=".tmp", delete=False) as f:
+            tmp_path = Path(f.name)
+            try:
+                pickle.dump(value, f, protocol=4)
+            except Exception as e:
+                logging.debug(f"🙈 Can not cache result {key}: {e}")
+                f.close()
+                tmp_path.unlink()
+                return
+        size = tmp_path.stat().st_size
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if self.size is None:
+                self.size = self.scan_size()
+            else:
+                self.size += size - replaced
+            over = self.size > self.max_size
+        if over:
+            self.evict()
+
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.cache_dir.glob("*/*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def scan_size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Remove the least recently used results,
+        down to LOW_WATER of max_size
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size * self.LOW_WATER
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            logging.debug(f"🧹 Evicting cached result {path.stem}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+        with self.lock:
+            self.size = total
+
+    def clear(self):
+        for path in self.cache_dir.glob("*/*.pkl"):
+            path.unlink()
+        with self.lock:
+            self.size = 0
+
+
+RESULT_CACHE = dict(
+    cache=ResultCache(),
+    refresh=set(),
+)
+
+
+def set_result_cache(cache: Optional[ResultCache]):
+    """
+    Set the result cache, None to disable caching
+    """
+    RESULT_CACHE["cache"] = cache
+
+
+def refresh_steps(names: Iterable[str]):
+    """
+    Recompute the steps by func_name or checkin name,
+    ignoring their cached result
+    """
+    RESULT_CACHE["refresh"] = set(names)
+
+
+def step_cache_key(
+    config: BaseConfig,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Optional[str]:
+    """
+    The cache key of the step, None if the step does not use cache
+
+    The step opts in with 'cache: true',
+    or 'cache: <version>' to invalidate the results of older versions
+    """
+    cache = RESULT_CACHE["cache"]
+    setting = config.get("cache", False)
+    if cache is None or setting is False or setting is None:
+        return None
+    version = None if setting is True else setting
+    return cache.make_key(config.func_name, args, kwargs, version)
+
+
+def is_refreshed(config: BaseConfig) -> bool:
+    checkin = config.get("checkin", None)
+    names = set(checkin) if type(checkin) == list else {checkin}
+    names.add(config.func_name)
+    return bool(names & RESULT_CACHE["refresh"])
+
+
+def load_result(config: BaseConfig, key: Optional[str]) -> Tuple[bool, Any]:
+    """
+    Load the cached result of the step, return (hit, value)
+    """
+    if key is None or is_refreshed(config):
+        return False, None
+    return RESULT_CACHE["cache"].get(key)
+
+
+def save_result(key: Optional[str], value: Any):
+    if key is None:
+        return
+    RESULT_CACHE["cache"].put(key, value)
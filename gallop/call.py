@@ -1,12 +1,24 @@
 from gallop.config import BaseConfig
 from gallop.classroom import to_classroom, cl
 from gallop.funcs import Importer
-from gallop.classroom import CLASS_ROOM, mark_sn
+from gallop.executors import (
+    get_executor, remote_executor, process_executor, aprocess_executor,
+    run_coroutine
+)
+from gallop.classroom import CLASS_ROOM, mark_sn, checkin
+from gallop.graph import step_names, depends
+from gallop.cache import step_cache_key, load_result, save_result
+from gallop.loader import load_yaml
+from gallop.serializers import get_serializer
+from gallop.trace import trace_step
+from gallop.refs import is_reference, open_reference
+from gallop.remote import has_handles, fetch_handles
 from typing import (
-    Any, Dict, List
+    Any, Callable, Dict, List, Tuple
 )
+from contextlib import contextmanager
+from types import CoroutineType
 import json
-import yaml
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -33,8 +45,7 @@ def conf_mixin_factory(class_name: str) -> object:
             f"""
             Instantiate the {class_name} from json file path
             """
-            with open(json_path, "r") as f:
-                data = json.load(f)
+            data = get_serializer("json").load(json_path)
             return cls(**data)
 
         @classmethod
@@ -42,23 +53,22 @@ def conf_mixin_factory(class_name: str) -> object:
             f"""
             Instantiate the {class_name} from yaml file path
             """
-            with open(yaml_path, "r") as f:
-                data = yaml.safe_load(f)
+            data = load_yaml(yaml_path)
             return cls(**data)
 
-        def to_json(self, json_path: Path):
+        def to_json(self, json_path: Path, stream: bool = False):
             f"""
             Save the {class_name} to json file path
             """
-            with open(json_path, "w") as f:
-                json.dump(self.config.conf_data, f)
+            get_serializer("json").save(
+                self.config.conf_data, json_path, stream=stream)
 
-        def to_yaml(self, yaml_path: Path):
+        def to_yaml(self, yaml_path: Path, stream: bool = False):
             f"""
             Save the {class_name} to yaml file path
             """
-            with open(yaml_path, "w") as f:
-                yaml.safe_dump(self.config.conf_data, f)
+            get_serializer("yaml").save(
+                self.config.conf_data, yaml_path, stream=stream)
 
         def to_dict(self) -> Dict[str, Any]:
             f"""
@@ -84,6 +94,32 @@ def conf_mixin_factory(class_name: str) -> object:
     return ConfMixin
 
 
+def checkin_single_value(key: str, res: Any, spacing: str = "") -> Any:
+    """
+    check-in the result to CLASS_ROOM,
+    return the value checked in, eg. a view in shared memory
+    """
+    if key in CLASS_ROOM:
+        logging.warning(f"{spacing}💫 Overwriting Name: {key}")
+    logging.debug(f"{spacing}🍄 Checkin: {key} = {res}")
+    return checkin(key, res)
+
+
+def checkin_result(checkin_key: Any, res: Any, spacing: str = "") -> Any:
+    """
+    check-in by the 'checkin' of a step, a name or a list of names
+    """
+    if checkin_key is None:
+        return res
+    if type(checkin_key) == list:
+        # output is some multiple item tuple
+        # that can be assigned to multiple variables
+        for key, res_part in zip(checkin_key, res):
+            checkin_single_value(key, res_part, spacing)
+        return res
+    return checkin_single_value(checkin_key, res, spacing)
+
+
 @to_classroom("Caller")
 class Caller:
     def __init__(
@@ -96,10 +132,15 @@ class Caller:
             raise ValueError("func_name is required")
 
         self.depth = depth
+        self.executor = get_executor(self.config.get("executor", "local"))
 
         if self.config.func_name[:4] == "use:":
             logging.info(f"Using {self.config.func_name}")
-            self.callable = Importer(self.config.func_name[4:])
+            if self.executor is remote_executor:
+                # imported on the worker
+                self.callable = None
+            else:
+                self.callable = Importer(self.config.func_name[4:])
         else:
             self.callable = cl(self.config.func_name)
 
@@ -110,7 +151,8 @@ class Caller:
     @staticmethod
     def checkout_val(val: str) -> Any:
         """
-        checkout the value from CLASS_ROOM
+        checkout the value from CLASS_ROOM,
+        or from env:NAME, or a file by mmap:, bytes:, arrow:
         """
         if val in CLASS_ROOM:
             return CLASS_ROOM[val]
@@ -119,6 +161,9 @@ class Caller:
         if val[:4] == "env:":
             logging.debug(f"🌲 Loading env: {val[4:]}")
             return os.environ[val[4:]]
+        # memory map a file, eg. mmap:some/array.npy
+        if is_reference(val):
+            return open_reference(val)
         val_list = val.split(".")
         if len(val_list) > 1:
             if val_list[0] in CLASS_ROOM:
@@ -137,8 +182,14 @@ class Caller:
             if "func_name" in item:
                 # a function package
                 if type(item) == dict:
-                    item = BaseConfig(**item,)
+                    item = BaseConfig._wrap(item)
                 return cls(item, depth=depth)()
+            elif "map" in item and "over" in item:
+                # a map package
+                from gallop.mapper import Mapper
+                if type(item) == dict:
+                    item = BaseConfig._wrap(item)
+                return Mapper(item, depth=depth)()
             elif "checkout" in item:
                 # a checkout package
                 return cls.checkout_val(item.checkout)
@@ -152,6 +203,105 @@ class Caller:
         else:
             return item
 
+    @classmethod
+    def compile(cls, item: Any) -> Callable[[], Any]:
+        """
+        Compile the item into a reusable execution plan
+        """
+        from gallop.plan import compile_plan
+        return compile_plan(item)
+
+    @classmethod
+    async def aresolve_item(cls, item: Any, depth: int = 0) -> Any:
+        """
+        Recursively resolve the item on the event loop,
+        independent steps run concurrently
+        """
+        if type(item) in (dict, BaseConfig):
+            if "func_name" in item:
+                # a function package
+                if type(item) == dict:
+                    item = BaseConfig._wrap(item)
+                return await cls(item, depth=depth).acall()
+            elif "map" in item and "over" in item:
+                # a map package
+                from gallop.mapper import Mapper
+                if type(item) == dict:
+                    item = BaseConfig._wrap(item)
+                return Mapper(item, depth=depth)()
+            elif "checkout" in item:
+                # a checkout package
+                return cls.checkout_val(item.checkout)
+            else:
+                # not a function package
+                return await cls.arun_dict(item, depth=depth+1)
+        # recurse into list
+        elif type(item) is list:
+            return await cls.arun_list(item, depth=depth+1)
+        # default case
+        else:
+            return item
+
+    @classmethod
+    async def agather(
+        cls,
+        items: List[Any],
+        depth: int = 0,
+        ordered: bool = False
+    ) -> List[Any]:
+        """
+        Resolve sibling items concurrently,
+        an item waits for the earlier siblings it depends on,
+        ordered: an item of a list without 'depends_on' also waits
+        for the item before it, as in the sequential run
+        """
+        import asyncio
+        names = list(step_names(item) for item in items)
+        tasks = []
+
+        async def resolve(item: Any, upstream: List[Any]) -> Any:
+            if len(upstream):
+                await asyncio.wait(upstream)
+                for task in upstream:
+                    # raise the upstream error, if any
+                    task.result()
+            return await cls.aresolve_item(item, depth=depth)
+
+        for j, item in enumerate(items):
+            upstream = list(
+                tasks[i] for i in range(j)
+                if depends(names[j], names[i]))
+            if ordered and j > 0 and not (
+                    type(item) in (dict, BaseConfig) and "depends_on" in item):
+                # eg. a file written by the step before, not a checkin
+                upstream.append(tasks[j - 1])
+            tasks.append(asyncio.ensure_future(resolve(item, upstream)))
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @classmethod
+    async def arun_list(
+        cls,
+        some_list: List[Any],
+        depth: int = 0
+    ) -> List[Any]:
+        return await cls.agather(list(some_list), depth=depth, ordered=True)
+
+    @classmethod
+    async def arun_dict(
+        cls,
+        some_dict: Dict[str, Any],
+        depth: int = 0
+    ) -> Dict[str, Any]:
+        keys = list(some_dict)
+        values = await cls.agather(
+            list(some_dict[key] for key in keys), depth=depth)
+        return dict(zip(keys, values))
+
     @classmethod
     def run_list(cls, some_list: List[Any], depth: int = 0) -> List[Any]:
         return_list = list(
@@ -170,32 +320,20 @@ class Caller:
             for key in some_dict)
         return return_dict
 
-    def checkin_single_value(self, key: str, res: Any, spacing: str = ""):
-        """
-        check-in the result to CLASS_ROOM
-        """
-        if key in CLASS_ROOM:
-            logging.warning(f"{spacing}💫 Overwriting Name: {key}")
-        logging.debug(f"{spacing}🍄 Checkin: {key} = {res}")
-        to_classroom(key)(res)
-
-    def checkin_value(self, res: Any, spacing: str = ""):
-        if self.checkin is None:
-            return
-        if type(self.checkin) == list:
-            # output is some multiple item tuple
-            # that can be assigned to multiple variables
-            for checkin_key, res_part in zip(self.checkin, res):
-                self.checkin_single_value(
-                    checkin_key,
-                    res_part,
-                    spacing)
-        else:
-            self.checkin_single_value(self.checkin, res, spacing)
+    def checkin_single_value(
+        self,
+        key: str,
+        res: Any,
+        spacing: str = ""
+    ) -> Any:
+        return checkin_single_value(key, res, spacing)
 
-    def __call__(self) -> Any:
+    def checkin_value(self, res: Any, spacing: str = "") -> Any:
+        return checkin_result(self.checkin, res, spacing)
+
+    def start_call(self) -> Tuple[int, str, datetime]:
         """
-        Execute the function
+        Log the start of the calling
         """
         spacing = "\t" * self.depth
         sn = mark_sn()
@@ -203,31 +341,158 @@ class Caller:
         # description
         description = self.config.get("description", None)
         logging.info(f"{spacing}| {description}")
-        start_time = datetime.now()
-
-        # process args and kwargs
-        self.args = self.run_list(self.args, depth=self.depth+1)
-        self.kwargs = self.run_dict(self.kwargs, depth=self.depth+1)
+        return sn, spacing, datetime.now()
 
-        # execute the calling
+    @contextmanager
+    def catch_error(
+        self,
+        args: List[Any],
+        kwargs: Dict[str, Any],
+        sn: int,
+        spacing: str
+    ):
+        """
+        Log the failed calling with its args and kwargs
+        """
         try:
-            res = self.callable(*self.args, **self.kwargs)
+            yield
         except KeyboardInterrupt:
             raise KeyboardInterrupt("User Interrupted")
         except Exception as e:
             logging.error(f"{spacing}❌ [🍔 {sn}]: {e}")
             tb.print_exc()
-            for i, arg in enumerate(self.args):
+            for i, arg in enumerate(args):
                 logging.error(f"{spacing}❌ [ARG {i}]: {arg}")
-            for key, value in self.kwargs.items():
+            for key, value in kwargs.items():
                 logging.error(f"{spacing}❌ [KWARG:{key}]: {value}")
             raise e
 
+    def stream_result(self, res: Any) -> Any:
+        """
+        Wrap the result into a bounded queue stream,
+        if the step is marked with 'stream'
+        """
+        setting = self.config.get("stream", False)
+        if setting is False or setting is None:
+            return res
+        from gallop.stream import to_stream
+        return to_stream(res, setting, name=self.config.func_name)
+
+    def end_call(
+        self,
+        res: Any,
+        sn: int,
+        spacing: str,
+        start_time: datetime
+    ) -> Any:
+        """
+        Log timing and checkin the result
+        """
         # log timing
         end_time = datetime.now()
         delta = end_time - start_time
         logging.info(f"{spacing}[🏁 {sn}] {self.config.func_name} :⏱️ {delta}")
 
         # register the result back to checkout
-        self.checkin_value(res, spacing)
-        return res
+        return self.checkin_value(res, spacing)
+
+    def __call__(self) -> Any:
+        """
+        Execute the function
+        """
+        sn, spacing, start_time = self.start_call()
+
+        with trace_step(sn, self.depth, self.config.func_name) as span:
+            # process args and kwargs
+            args = self.run_list(self.args, depth=self.depth+1)
+            kwargs = self.run_dict(self.kwargs, depth=self.depth+1)
+            span.mark_resolved()
+
+            return self.call_resolved(
+                args, kwargs, sn, spacing, start_time)
+
+    def call_resolved(
+        self,
+        args: List[Any],
+        kwargs: Dict[str, Any],
+        sn: int,
+        spacing: str,
+        start_time: datetime
+    ) -> Any:
+        """
+        Execute the function with resolved args and kwargs
+        """
+        # read the result from cache, if the step uses cache
+        cache_key = step_cache_key(self.config, args, kwargs)
+        hit, res = load_result(self.config, cache_key)
+        if hit:
+            logging.info(f"{spacing}💾 [🍔 {sn}] Cached result")
+            return self.end_call(res, sn, spacing, start_time)
+
+        # execute the calling
+        if has_handles() and self.executor is not remote_executor:
+            # values kept on the remote workers, fetch them here
+            args, kwargs = fetch_handles(args), fetch_handles(kwargs)
+        with self.catch_error(args, kwargs, sn, spacing):
+            res = self.executor(self, args, kwargs)
+            if isinstance(res, CoroutineType):
+                # async def function, run it to the end
+                res = run_coroutine(res)
+        save_result(cache_key, res)
+        res = self.stream_result(res)
+
+        return self.end_call(res, sn, spacing, start_time)
+
+    async def acall(self) -> Any:
+        """
+        Execute the function on the running event loop,
+        await the result if the callable is a coroutine function
+        """
+        sn, spacing, start_time = self.start_call()
+
+        with trace_step(sn, self.depth, self.config.func_name) as span:
+            # process args and kwargs
+            args = await self.arun_list(self.args, depth=self.depth+1)
+            kwargs = await self.arun_dict(self.kwargs, depth=self.depth+1)
+            span.mark_resolved()
+
+            return await self.acall_resolved(
+                args, kwargs, sn, spacing, start_time)
+
+    async def acall_resolved(
+        self,
+        args: List[Any],
+        kwargs: Dict[str, Any],
+        sn: int,
+        spacing: str,
+        start_time: datetime
+    ) -> Any:
+        """
+        Execute the function with resolved args and kwargs,
+        await the result if it is awaitable
+        """
+        from inspect import isawaitable
+
+        # read the result from cache, if the step uses cache
+        cache_key = step_cache_key(self.config, args, kwargs)
+        hit, res = load_result(self.config, cache_key)
+        if hit:
+            logging.info(f"{spacing}💾 [🍔 {sn}] Cached result")
+            return self.end_call(res, sn, spacing, start_time)
+
+        # execute the calling
+        if has_handles() and self.executor is not remote_executor:
+            # values kept on the remote workers, fetch them here
+            args, kwargs = fetch_handles(args), fetch_handles(kwargs)
+        with self.catch_error(args, kwargs, sn, spacing):
+            if self.executor is process_executor:
+                # wait for the worker without blocking the loop
+                res = aprocess_executor(self, args, kwargs)
+            else:
+                res = self.executor(self, args, kwargs)
+            if isawaitable(res):
+                res = await res
+        save_result(cache_key, res)
+        res = self.stream_result(res)
+
+        return self.end_call(res, sn, spacing, start_time)
@@ -0,0 +1,156 @@
+from gallop.classroom import CLASS_ROOM, checkin, is_array
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import json
+import logging
+import os
+
+
+MANIFEST = "manifest.json"
+
+
+def step_key(step: Any) -> str:
+    """
+    The path of a step, as a manifest key
+    """
+    return ".".join(map(str, step.path)) or "."
+
+
+def step_hash(step: Any) -> str:
+    """
+    Hash of the step config, a changed step runs again
+    """
+    import hashlib
+    item = step.item
+    if hasattr(item, "to_dict"):
+        item = item.to_dict()
+    payload = json.dumps(item, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Checkpoint:
+    """
+    Save the checked in values and the result of every top level step
+    to a run directory, to resume a failed run from the last done step
+
+    Arrays are saved as .npy and reloaded memory mapped,
+    the other values are pickled
+    """
+    def __init__(self, run_dir: Path):
+        self.run_dir = Path(run_dir)
+        self.manifest_path = self.run_dir / MANIFEST
+        self.manifest = dict(steps=dict())
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def __repr__(self) -> str:
+        return f"Checkpoint({self.run_dir})"
+
+    def save_value(self, stem: str, value: Any) -> Optional[str]:
+        """
+        Save a value, return the file name, None if it can not be saved
+        """
+        values_dir = self.run_dir / "values"
+        values_dir.mkdir(parents=True, exist_ok=True)
+        if is_array(value):
+            import numpy as np
+            filename = f"{stem}.npy"
+            tmp_path = values_dir / f"{filename}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, value, allow_pickle=False)
+        else:
+            import pickle
+            filename = f"{stem}.pkl"
+            tmp_path = values_dir / f"{filename}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logging.warning(f"💾 Can not checkpoint {stem}: {e}")
+                if tmp_path.exists():
+                    os.remove(tmp_path)
+                return None
+        os.replace(tmp_path, values_dir / filename)
+        return filename
+
+    def load_value(self, filename: str) -> Any:
+        path = self.run_dir / "values" / filename
+        if filename.endswith(".npy"):
+            import numpy as np
+            return np.load(path, mmap_mode="r")
+        import pickle
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save_manifest(self):
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def __call__(
+        self,
+        step: Any,
+        result: Any,
+        results: Dict[Any, Any]
+    ) -> Any:
+        """
+        Step done callback for the Scheduler
+        """
+        stem = f"step-{step.index}"
+        entry = dict(hash=step_hash(step), names=dict())
+        entry["result"] = self.save_value(stem, result)
+        if entry["result"] is None:
+            return result
+        for i, name in enumerate(sorted(step.produces)):
+            if name not in CLASS_ROOM:
+                continue
+            value = CLASS_ROOM[name]
+            if value is result:
+                # usually the result is the checked in value, saved once
+                entry["names"][name] = entry["result"]
+                continue
+            filename = self.save_value(f"{stem}-{i}", value)
+            if filename is None:
+                return result
+            entry["names"][name] = filename
+        self.manifest["steps"][step_key(step)] = entry
+        self.save_manifest()
+        logging.info(f"💾 Checkpoint {step}")
+        return result
+
+    def restore(self, steps: List[Any]) -> Tuple[List[Any], Dict[Any, Any]]:
+        """
+        Check in the saved values of the done steps,
+        return (steps to run, results of the done steps)
+
+        A step runs again if its config changed,
+        or if any step it depends on runs again
+        """
+        done = dict()
+        results = dict()
+        for step in steps:
+            entry = self.manifest["steps"].get(step_key(step))
+            if entry is None or entry["hash"] != step_hash(step):
+                continue
+            if not step.upstream <= set(done):
+                continue
+            done[step.index] = entry
+
+        for step in steps:
+            if step.index not in done:
+                continue
+            entry = done[step.index]
+            # a file saved for the result and a name loads once
+            loaded = dict()
+            for filename in [entry["result"]] + list(entry["names"].values()):
+                if filename not in loaded:
+                    loaded[filename] = self.load_value(filename)
+            for name, filename in entry["names"].items():
+                checkin(name, loaded[filename])
+            results[step.path] = loaded[entry["result"]]
+        logging.warning(
+            f"💾 Resuming from {self.run_dir}, "
+            f"{len(done)} of {len(steps)} steps done")
+        return list(step for step in steps if step.index not in done), results
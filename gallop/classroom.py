@@ -1,10 +1,213 @@
-from typing import Callable, Union
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import partial
+from threading import Lock, RLock
+import logging
+import os
 
 
-CLASS_ROOM = dict(
+# set by gallop.transport:
+# enter, called with a value to check in, returns the value to keep
+# leave, called with a value leaving the CLASS_ROOM
+TRANSPORT_HOOKS = dict(
+    enter=None,
+    leave=None,
+)
+
+
+def leave(value: Any):
+    hook = TRANSPORT_HOOKS["leave"]
+    if hook is not None:
+        hook(value)
+
+
+class ClassRoom(dict):
+    """
+    The registry of classes and checked in values
+
+    A value spilled to disk under a memory budget stays 'in' the
+    CLASS_ROOM, reading it loads it back
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # name => path of the pickled value
+        self.spilled: Dict[str, str] = dict()
+        # gallop.memory.MemoryBudget, when a budget is set
+        self.budget = None
+        self.lock = RLock()
+
+    def __missing__(self, key: str) -> Any:
+        with self.lock:
+            if dict.__contains__(self, key):
+                # reloaded by another thread
+                return dict.__getitem__(self, key)
+            if key not in self.spilled:
+                raise KeyError(key)
+            return self.reload(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return dict.__contains__(self, key) or key in self.spilled
+
+    def __setitem__(self, key: str, value: Any):
+        if self.spilled:
+            self.drop_spilled(key)
+        if TRANSPORT_HOOKS["leave"] is not None:
+            old = dict.get(self, key, value)
+            dict.__setitem__(self, key, value)
+            if old is not value:
+                leave(old)
+            return
+        dict.__setitem__(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        return default
+
+    def spill(self, key: str, path: str) -> bool:
+        """
+        Pickle the value to the path and let it go,
+        return False if the value can not be pickled
+        """
+        import pickle
+        with self.lock:
+            value = dict.__getitem__(self, key)
+            try:
+                with open(path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logging.debug(f"💾 Can not spill {key}: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+                return False
+            self.spilled[key] = path
+            dict.__delitem__(self, key)
+            leave(value)
+        logging.info(f"💾 Spilled {key} to {path}")
+        return True
+
+    def reload(self, key: str) -> Any:
+        """
+        Load a spilled value back
+        """
+        import pickle
+        with self.lock:
+            path = self.spilled.pop(key)
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.remove(path)
+            dict.__setitem__(self, key, value)
+            logging.info(f"💾 Reloaded {key}")
+            if self.budget is not None:
+                self.budget.track(key)
+        return value
+
+    def drop_spilled(self, key: str):
+        with self.lock:
+            path = self.spilled.pop(key, None)
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    def release(self, key: str):
+        """
+        Remove a value, resident or spilled
+        """
+        with self.lock:
+            self.drop_spilled(key)
+            if dict.__contains__(self, key):
+                leave(dict.pop(self, key))
+            if self.budget is not None:
+                self.budget.forget(key)
+
+
+class RunContext:
+    """
+    The private checkins and serial numbers of one run
+    """
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.room = ClassRoom()
+        self.callable_sn = 0
+        self.sn_lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"RunContext({self.name}, {len(self.room)} checkins)"
+
+    def mark_sn(self) -> int:
+        with self.sn_lock:
+            sn = self.callable_sn
+            self.callable_sn += 1
+        return sn
+
+
+# the run of the current thread or task, None for the global run
+RUN_CONTEXT: ContextVar = ContextVar("gallop_run", default=None)
+
+
+class SharedClassRoom(ClassRoom):
+    """
+    The CLASS_ROOM, layered:
+    the registered classes and imports are shared by every run,
+    inside a run the checkins go to the private layer of the run,
+    which is read first
+
+    Outside of any run, the checkins go to the shared layer
+    """
+    def current(self) -> ClassRoom:
+        """
+        The layer taking the checkins
+        """
+        run = RUN_CONTEXT.get()
+        return self if run is None else run.room
+
+    def __getitem__(self, key: str) -> Any:
+        run = RUN_CONTEXT.get()
+        if run is not None and key in run.room:
+            return run.room[key]
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key: Any) -> bool:
+        run = RUN_CONTEXT.get()
+        if run is not None and key in run.room:
+            return True
+        return ClassRoom.__contains__(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        run = RUN_CONTEXT.get()
+        if run is not None:
+            run.room[key] = value
+        else:
+            ClassRoom.__setitem__(self, key, value)
+
+    def register(self, key: str, value: Any):
+        """
+        Set to the shared layer, from any run
+        """
+        ClassRoom.__setitem__(self, key, value)
+
+    def release(self, key: str):
+        room = self.current()
+        if room is self:
+            ClassRoom.release(self, key)
+        else:
+            room.release(key)
+
+
+CLASS_ROOM = SharedClassRoom(
     callable_sn=0,
 )
 JSON_FRIENDLY = [str, float, int, bool, type(None)]
+SN_LOCK = Lock()
+
+
+def is_array(value: Any) -> bool:
+    """
+    A numpy array of plain values, without importing numpy
+    """
+    cls = type(value)
+    return cls.__module__ == "numpy" and cls.__name__ == "ndarray" \
+        and not value.dtype.hasobject
 
 
 def to_classroom(x: Union[str, object]) -> Union[object, Callable]:
@@ -13,11 +216,11 @@ def to_classroom(x: Union[str, object]) -> Union[object, Callable]:
     """
     if type(x) == str:
         def wrapper(cls: object) -> object:
-            CLASS_ROOM[x] = cls
+            CLASS_ROOM.register(x, cls)
             return cls
         return wrapper
     classname = x.__name__
-    CLASS_ROOM[classname] = x
+    CLASS_ROOM.register(classname, x)
     return x
 
 
@@ -30,10 +233,70 @@ def cl(class_name: str) -> object:
     return CLASS_ROOM[class_name]
 
 
+def release(name: str) -> Optional[str]:
+    """
+    Let go of a checked in value
+    """
+    if name not in CLASS_ROOM:
+        return None
+    logging.debug(f"🧹 Releasing {name}")
+    CLASS_ROOM.release(name)
+    return name
+
+
+def checkin(name: str, value: Any) -> Any:
+    """
+    Check in a value, to the private layer inside a run,
+    return the value checked in
+    """
+    hook = TRANSPORT_HOOKS["enter"]
+    if hook is not None:
+        value = hook(value)
+    CLASS_ROOM[name] = value
+    return value
+
+
 def mark_sn() -> int:
     """
     Mark the serial number for the callable
     """
-    sn = CLASS_ROOM["callable_sn"]
-    CLASS_ROOM["callable_sn"] += 1
+    run = RUN_CONTEXT.get()
+    if run is not None:
+        return run.mark_sn()
+    with SN_LOCK:
+        sn = CLASS_ROOM["callable_sn"]
+        CLASS_ROOM["callable_sn"] += 1
     return sn
+
+
+@contextmanager
+def new_run(name: Optional[str] = None) -> Iterator[RunContext]:
+    """
+    Run a task in its own context, the checkins of the run
+    are private, the registered classes and imports are shared
+
+    with new_run("request-1") as run:
+        Caller.resolve_item(config)
+        cl("result")
+    """
+    run = RunContext(name)
+    token = RUN_CONTEXT.set(run)
+    try:
+        yield run
+    finally:
+        RUN_CONTEXT.reset(token)
+        if run.room.budget is not None:
+            run.room.budget.close()
+        if TRANSPORT_HOOKS["leave"] is not None:
+            for key in list(run.room):
+                run.room.release(key)
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    The func running in a copy of the current context,
+    for another thread to call, eg. pool.submit(bind_context(func))
+
+    Bind once per call, a context can not be entered twice at once
+    """
+    return partial(copy_context().run, func)
@@ -1,9 +1,29 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple, Union
 import json
-import yaml
 from gallop.classroom import to_classroom, JSON_FRIENDLY
+from gallop.loader import load_yaml
+from gallop.serializers import get_serializer
+from functools import lru_cache
 import logging
-import regex as re
+
+
+Key = Union[str, int]
+
+PATCH_OPS = ("set", "add", "replace", "remove")
+
+
+@lru_cache(maxsize=4096)
+def parse_path(key_string: str) -> Tuple[Key, ...]:
+    """
+    'a.0.b', or the json pointer '/a/0/b' => ('a', 0, 'b')
+    """
+    if key_string[:1] == "/":
+        keys = list(
+            key.replace("~1", "/").replace("~0", "~")
+            for key in key_string[1:].split("/"))
+    else:
+        keys = key_string.split(".")
+    return tuple(int(key) if key.isdigit() else key for key in keys)
 
 
 @to_classroom
@@ -11,16 +31,80 @@ class BaseConfig:
     """
     The base configuration class for gallop application
     This is a new sort of dict, that you can treat like JSON syntax
+
+    Nested dict/list values are substantiated lazily, at the first read,
+    a nested config shares the dict it was made from until it is written,
+    a list is copied at its first read, its dicts wrapped lazily
+
+    The internals are prefixed with _, so a config key like 'index'
+    or 'copy' reads as the config value
     """
+    __slots__ = (
+        "conf_data", "_substantiated", "_shared", "_index", "_version")
+
     def __init__(self, **kwargs):
         super().__setattr__("conf_data", dict())
+        super().__setattr__("_substantiated", set())
+        super().__setattr__("_shared", False)
+        super().__setattr__("_index", None)
+        super().__setattr__("_version", 0)
         for k, v in kwargs.items():
             self.__setitem__(k, v)
 
+    @classmethod
+    def _wrap(cls, data: Dict[str, Any]) -> "BaseConfig":
+        """
+        Make a config on top of the dict, without copying it
+        """
+        if cls.__init__ is not BaseConfig.__init__:
+            # sub class with its own __init__
+            return cls(**data)
+        config = cls.__new__(cls)
+        object.__setattr__(config, "conf_data", data)
+        object.__setattr__(config, "_substantiated", set())
+        object.__setattr__(config, "_shared", True)
+        object.__setattr__(config, "_index", None)
+        object.__setattr__(config, "_version", 0)
+        return config
+
+    def _copy(self) -> "BaseConfig":
+        """
+        A copy on write copy of the config,
+        nested configs are copied when they are read
+        """
+        config = self.__class__.__new__(self.__class__)
+        object.__setattr__(config, "conf_data", self.conf_data)
+        object.__setattr__(config, "_substantiated", set())
+        object.__setattr__(config, "_shared", True)
+        object.__setattr__(config, "_index", None)
+        object.__setattr__(config, "_version", 0)
+        return config
+
+    def _own_data(self):
+        """
+        Copy the shared dict before the first write
+        """
+        if self._shared:
+            object.__setattr__(self, "conf_data", dict(self.conf_data))
+            object.__setattr__(self, "_shared", False)
+
+    def _substantiate_key(self, key: str) -> Any:
+        """
+        Get the value of the key, substantiated
+        """
+        value = self.conf_data[key]
+        if type(value) in JSON_FRIENDLY or key in self._substantiated:
+            return value
+        value = self.substantiate_recursive(value)
+        self._own_data()
+        self.conf_data[key] = value
+        self._substantiated.add(key)
+        return value
+
     def __getattr__(self, key: str):
         conf_data = self.__getattribute__("conf_data")
         if key in conf_data:
-            return conf_data[key]
+            return self._substantiate_key(key)
         else:
             return super().__getattribute__(key)
 
@@ -33,17 +117,44 @@ class BaseConfig:
     def __getitem__(self, key: str):
         if key not in self.conf_data:
             raise KeyError(f"Config has no key {key}")
-        return self.conf_data[key]
+        return self._substantiate_key(key)
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self.conf_data.get(key, default)
+        if key not in self.conf_data:
+            return default
+        return self._substantiate_key(key)
 
     def __setitem__(self, key: str, value: Any):
-        self.conf_data[key] = self.substantiate_recursive(value)
+        self._own_data()
+        self.conf_data[key] = value
+        object.__setattr__(self, "_version", self._version + 1)
+        if isinstance(value, BaseConfig):
+            # keep the very config object
+            self._substantiated.add(key)
+        else:
+            self._substantiated.discard(key)
+
+    def __delitem__(self, key: str):
+        if key not in self.conf_data:
+            raise KeyError(f"Config has no key {key}")
+        self._own_data()
+        del self.conf_data[key]
+        object.__setattr__(self, "_version", self._version + 1)
+        self._substantiated.discard(key)
 
     def __contains__(self, key: str):
         return key in self.conf_data
 
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(self.conf_data)
+
+    def __setstate__(self, state: Dict[str, Any]):
+        object.__setattr__(self, "conf_data", state)
+        object.__setattr__(self, "_substantiated", set())
+        object.__setattr__(self, "_shared", False)
+        object.__setattr__(self, "_index", None)
+        object.__setattr__(self, "_version", 0)
+
     def __repr__(self) -> str:
         """
         The representation of the config is the json string
@@ -58,6 +169,8 @@ class BaseConfig:
         return iter(self.conf_data)
 
     def items(self):
+        for key in self.conf_data:
+            self._substantiate_key(key)
         return self.conf_data.items()
 
     def keys(self):
@@ -68,43 +181,187 @@ class BaseConfig:
         Overwrite a value in the config
         with a chain of keys pointing to value
         """
-        chain = key_string.split(".")
-        if len(chain) == 1:
-            self[chain[0]] = value
+        # one op fails before it writes, no copy to keep
+        self._apply_op("set", parse_path(key_string), value)
+
+    def _path_index(self) -> Dict[Tuple[Key, ...], Tuple[Any, Any]]:
+        """
+        path => (the nested config or list, the version of the config),
+        filled as the paths are walked
+
+        A list changed in place, outside of overwrite/apply_patch,
+        is not seen, call reset_index after such a change
+        """
+        if self._index is None:
+            object.__setattr__(self, "_index", {(): (self, self._version)})
+        return self._index
+
+    def reset_index(self):
+        object.__setattr__(self, "_index", None)
+
+    def _locate(self, path: Tuple[Key, ...]) -> Any:
+        """
+        The config or list at the path
+        """
+        containers = self._path_index()
+        node, version = containers[()]
+        end = 0
+        while end < len(path):
+            if isinstance(node, BaseConfig) and node._version != version:
+                # written since the paths under it were walked
+                self._forget_paths(containers, path[:end])
+                containers[path[:end]] = (node, node._version)
+            entry = containers.get(path[:end + 1])
+            if entry is None:
+                break
+            node, version = entry
+            end += 1
+        # walk the rest
+        for end in range(end + 1, len(path) + 1):
+            node = node[path[end - 1]]
+            containers[path[:end]] = (
+                node, node._version if isinstance(node, BaseConfig) else None)
+        return node
+
+    def _forget_paths(
+        self,
+        containers: Dict[Tuple[Key, ...], Tuple[Any, Any]],
+        path: Tuple[Key, ...]
+    ):
+        """
+        Drop the path and the paths under it from the index
+        """
+        if path not in containers:
+            # nothing under it was walked
             return
-        item = self.conf_data
-        for key in chain[:-1]:
-            # if key is number
-            if re.match(r"^\d+$", key):
-                key = int(key)
-                item = item[key]
+        size = len(path)
+        for known in list(containers):
+            if known[:size] == path:
+                del containers[known]
+
+    def _take(self, patched: "BaseConfig"):
+        """
+        Take the data of the patched copy, with the paths it walked
+        """
+        object.__setattr__(self, "conf_data", patched.conf_data)
+        object.__setattr__(self, "_substantiated", patched._substantiated)
+        object.__setattr__(self, "_shared", patched._shared)
+        object.__setattr__(self, "_version", self._version + 1)
+        containers = patched._path_index()
+        containers[()] = (self, self._version)
+        object.__setattr__(self, "_index", containers)
+
+    def apply_patch(self, ops: List[Dict[str, Any]]):
+        """
+        Apply a list of changes, in one pass over the path index,
+        all of them or none
+
+        Each op has 'op', 'path' ('a.0.b' or '/a/0/b') and 'value':
+        - set: set the key, or the list item, like overwrite
+        - add: set the key, or insert into the list at the index,
+            '-' as the index appends
+        - replace: the key or the list item has to exist
+        - remove: delete the key, or pop the list item, no value
+        """
+        patch = []
+        for i, op in enumerate(ops):
+            name = op.get("op", None)
+            if name not in PATCH_OPS:
+                raise ValueError(
+                    f"Patch op {i}: unknown op {name}, "
+                    f"choose from {PATCH_OPS}")
+            path = op.get("path", None)
+            if type(path) == str:
+                path = parse_path(path)
+            elif type(path) in (list, tuple):
+                path = tuple(path)
+            if not path:
+                raise ValueError(f"Patch op {i}: needs a path")
+            if name != "remove" and "value" not in op:
+                raise ValueError(f"Patch op {i}: {name} needs a value")
+            patch.append((name, path, op.get("value", None)))
+
+        # on a copy on write copy, kept only when every op applies,
+        # one op fails before it writes
+        patched = self if len(patch) == 1 else self._copy()
+        for i, (name, path, value) in enumerate(patch):
+            try:
+                patched._apply_op(name, path, value)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Patch op {i}: can not {name} "
+                    f"{'.'.join(map(str, path))}: {e}")
+        if patched is not self:
+            self._take(patched)
+
+    def _apply_op(self, name: str, path: Tuple[Key, ...], value: Any):
+        parent = self._locate(path[:-1])
+        containers = self._path_index()
+        key = path[-1]
+        if type(parent) == list:
+            if key == "-" and name == "add":
+                parent.append(value)
+            elif type(key) != int:
+                raise KeyError(f"list index {key}")
+            elif name == "add":
+                if key > len(parent):
+                    raise IndexError(f"list index {key} out of range")
+                parent.insert(key, value)
+                for index in range(key, len(parent)):
+                    self._forget_paths(containers, path[:-1] + (index,))
+            elif name == "remove":
+                parent.pop(key)
+                for index in range(key, len(parent) + 1):
+                    self._forget_paths(containers, path[:-1] + (index,))
             else:
-                item = item[key]
-        last_key = chain[-1]
-        if re.match(r"^\d+$", last_key):
-            last_key = int(last_key)
-        item[last_key] = value
+                parent[key] = value
+                self._forget_paths(containers, path)
+        else:
+            if name == "replace" and key not in parent:
+                raise KeyError(f"no key {key}")
+            self._forget_paths(containers, path)
+            if name == "remove":
+                del parent[key]
+            else:
+                parent[key] = value
+            # the index is up to date with this write
+            containers[path[:-1]] = (parent, parent._version)
 
     # save data to config file
-    def to_json(self, path: str):
-        with open(path, "w") as f:
-            json.dump(self.to_dict(), f)
+    def to_json(self, path: str, stream: bool = False):
+        self.to_file(path, format="json", stream=stream)
 
-    def to_yaml(self, path: str):
-        with open(path, "w") as f:
-            yaml.safe_dump(self.to_dict(), f)
+    def to_yaml(self, path: str, stream: bool = False):
+        self.to_file(path, format="yaml", stream=stream)
+
+    def to_file(
+        self,
+        path: str,
+        format: Optional[str] = None,
+        stream: bool = False
+    ):
+        """
+        Save with the serializer of the format, or of the file extension,
+        stream=True writes without building the whole to_dict
+        """
+        get_serializer(format, path).save(self, path, stream=stream)
 
     # load data from config file
     @classmethod
     def from_json(cls, path: str):
-        with open(path, "r") as f:
-            conf_data = json.load(f)
-        return cls(**conf_data)
+        return cls.from_file(path, format="json")
 
     @classmethod
     def from_yaml(cls, path: str):
-        with open(path, "r") as f:
-            conf_data = yaml.safe_load(f)
+        conf_data = load_yaml(path)
+        return cls(**conf_data)
+
+    @classmethod
+    def from_file(cls, path: str, format: Optional[str] = None):
+        """
+        Load with the serializer of the format, or of the file extension
+        """
+        conf_data = get_serializer(format, path).load(path)
         return cls(**conf_data)
 
     def flatten_recursive(self, x: Any) -> Any:
@@ -125,12 +382,15 @@ class BaseConfig:
 
     def substantiate_recursive(self, x: Any) -> Any:
         """
-        Render dict to config object recursively
+        Render dict to config object recursively,
+        the nested configs are lazy
         """
         if type(x) in JSON_FRIENDLY:
             return x
+        if isinstance(x, BaseConfig):
+            return x._copy()
         if type(x) == dict:
-            return self.__class__(**x)
+            return self.__class__._wrap(x)
         if type(x) in [tuple, set, list]:
             return [self.substantiate_recursive(y) for y in x]
         logging.warning(
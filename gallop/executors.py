@@ -0,0 +1,176 @@
+from gallop.funcs import Importer, wait_preimports
+from gallop.transport import (
+    TRANSPORT, run_shared, pack, receive, shared_dir
+)
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+from types import CoroutineType
+from threading import Lock
+import logging
+
+
+PROCESS_POOL = dict(
+    pool=None,
+    max_workers=None,
+    # the scheduler threads may start the pool at once
+    lock=Lock(),
+)
+
+
+def set_process_workers(max_workers: Optional[int] = None):
+    """
+    Set the size of the process pool,
+    None for the number of cpus
+    """
+    with PROCESS_POOL["lock"]:
+        if PROCESS_POOL["pool"] is not None:
+            PROCESS_POOL["pool"].shutdown()
+            PROCESS_POOL["pool"] = None
+        PROCESS_POOL["max_workers"] = max_workers
+
+
+def get_process_pool() -> Any:
+    """
+    Get the process pool, start it at the first call
+    """
+    pool = PROCESS_POOL["pool"]
+    if pool is not None:
+        return pool
+    with PROCESS_POOL["lock"]:
+        if PROCESS_POOL["pool"] is None:
+            from concurrent.futures import ProcessPoolExecutor
+            wait_preimports()
+            logging.info("🏭 Starting process pool")
+            PROCESS_POOL["pool"] = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL["max_workers"])
+        return PROCESS_POOL["pool"]
+
+
+def run_new_loop(coroutine: Any) -> Any:
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def run_coroutine(coroutine: Any) -> Any:
+    """
+    Run a coroutine to the end from sync code,
+    on a thread of its own if this thread runs an event loop,
+    eg. a step called inside acall, jupyter or the serve daemon
+    """
+    import asyncio
+    if asyncio._get_running_loop() is None:
+        return run_new_loop(coroutine)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_new_loop, coroutine).result()
+
+
+def run_in_worker(
+    func: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Any:
+    """
+    Run the callable in the worker process,
+    func is either a 'use:' string for the Importer,
+    or a picklable callable
+    """
+    if type(func) == str and func[:4] == "use:":
+        func = Importer(func[4:])
+    res = func(*args, **kwargs)
+    if isinstance(res, CoroutineType):
+        res = run_coroutine(res)
+    return res
+
+
+def local_executor(
+    caller: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Any:
+    """
+    Run the callable in the current interpreter
+    """
+    return caller.callable(*args, **kwargs)
+
+
+def submit_process(
+    caller: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Tuple[Future, Callable[[Any], Any]]:
+    """
+    Ship the resolved args to a worker process,
+    return the future and the function to finish its result with
+    """
+    func_name = caller.config.func_name
+    func = func_name if func_name[:4] == "use:" else caller.callable
+    if TRANSPORT["enabled"]:
+        # shared values go as handles, zero-copy views in the worker,
+        # a large result comes back the same way, if it is checked in
+        directory = shared_dir() if type(caller.checkin) == str else None
+        future = get_process_pool().submit(
+            run_shared, func, pack(args), pack(kwargs),
+            directory, TRANSPORT["min_size"])
+        return future, receive
+    future = get_process_pool().submit(run_in_worker, func, args, kwargs)
+    return future, lambda res: res
+
+
+def process_executor(
+    caller: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Any:
+    """
+    Run the callable in a worker process and wait for the result
+    """
+    future, finish = submit_process(caller, args, kwargs)
+    return finish(future.result())
+
+
+async def aprocess_executor(
+    caller: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Any:
+    """
+    Run the callable in a worker process,
+    the event loop runs on while waiting
+    """
+    import asyncio
+    future, finish = submit_process(caller, args, kwargs)
+    return finish(await asyncio.wrap_future(future))
+
+
+def remote_executor(
+    caller: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any]
+) -> Any:
+    """
+    Send the step to a gallop worker over TCP, see gallop.remote
+    """
+    from gallop.remote import run_remote
+    return run_remote(caller, args, kwargs)
+
+
+EXECUTORS: Dict[str, Callable] = dict(
+    local=local_executor,
+    process=process_executor,
+    remote=remote_executor,
+)
+
+
+def get_executor(name: str) -> Callable:
+    """
+    Get the executor by the name in step config 'executor'
+    """
+    if name not in EXECUTORS:
+        raise ValueError(
+            f"Unknown executor {name}, choose from {list(EXECUTORS)}")
+    return EXECUTORS[name]
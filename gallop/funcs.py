@@ -1,7 +1,16 @@
-from gallop.classroom import to_classroom, CLASS_ROOM
-from typing import Callable, Any
-import logging
+from gallop.classroom import to_classroom, checkin, CLASS_ROOM
+from typing import Callable, Any, Dict
+from concurrent.futures import Future, wait
 from importlib import import_module
+from time import perf_counter
+import logging
+
+
+# 'use:' name => Future of its background import, see gallop.preimport
+PREIMPORTS: Dict[str, Future] = dict()
+
+# 'use:' name => seconds it took to import
+IMPORT_TIMES: Dict[str, float] = dict()
 
 
 @to_classroom("Importer")
@@ -15,16 +24,29 @@ def Importer(imports: str) -> Callable:
     if imports in CLASS_ROOM:
         logging.debug(f"⚡️ read {imports} from CACHE")
         return CLASS_ROOM[imports]
+    future = PREIMPORTS.get(imports, None)
+    if future is not None:
+        try:
+            # wait for the background import
+            return future.result()
+        except Exception:
+            # import again here, so the error raises in the step
+            PREIMPORTS.pop(imports, None)
+    return import_callable(imports)
+
+
+def import_callable(imports: str) -> Any:
+    """
+    Import by the dotted string, save it to CLASS_ROOM,
+    record the import time
+    """
+    start = perf_counter()
     import_list = imports.split('.')
     if len(import_list) == 0:
         raise ImportError(f"Invalid import string: {imports}")
     elif len(import_list) == 1:
         # import a module
-        module = __import__(import_list[0])
-        # save to cache
-        logging.debug(f"🔌 CACHING {imports}")
-        to_classroom(imports)(module)
-        return module
+        package = __import__(import_list[0])
     else:
         try:
             # longer sequence of module
@@ -38,11 +60,20 @@ def Importer(imports: str) -> Callable:
             # import strategy 2
             package = import_module(".".join(import_list[:-1]))
             package = getattr(package, import_list[-1])
+    IMPORT_TIMES[imports] = perf_counter() - start
+
+    # save to cache
+    logging.debug(f"🔌 CACHING {imports}")
+    to_classroom(imports)(package)
+    return package
 
-        # save to cache
-        logging.debug(f"🔌 CACHING {imports}")
-        to_classroom(imports)(package)
-        return package
+
+def wait_preimports():
+    """
+    Wait for the background imports,
+    before forking, a fork during an import can deadlock the child
+    """
+    wait(list(PREIMPORTS.values()))
 
 
 def write_file(string: str, filename: str) -> None:
@@ -72,4 +103,4 @@ def checkin_value(key: str, value: Any) -> None:
     """
     save a value to CLASS_ROOM
     """
-    CLASS_ROOM[key] = value
+    checkin(key, value)
@@ -0,0 +1,75 @@
+from gallop.config import BaseConfig
+from gallop.refs import is_reference
+from typing import Any, Set, Tuple
+
+
+Names = Tuple[Set[str], Set[str]]
+
+
+def is_package(item: Any) -> bool:
+    """
+    Is the item a function, map or checkout package
+    """
+    if type(item) not in (dict, BaseConfig):
+        return False
+    if "map" in item and "over" in item:
+        return True
+    return "func_name" in item or "checkout" in item
+
+
+def add_names(names: Any, name_set: Set[str]):
+    """
+    Add a name, or a list of names to the set
+    """
+    if names is None:
+        return
+    if type(names) in (list, tuple):
+        name_set.update(names)
+    else:
+        name_set.add(names)
+
+
+def step_names(item: Any) -> Names:
+    """
+    Collect the names a (nested) step checks in
+    and the names it reads from CLASS_ROOM
+
+    return (produces, consumes)
+    """
+    produces, consumes = set(), set()
+
+    def visit(x: Any):
+        if type(x) in (dict, BaseConfig):
+            for key in x:
+                value = x[key]
+                if key == "checkin":
+                    add_names(value, produces)
+                elif key == "depends_on":
+                    add_names(value, consumes)
+                elif key == "checkout" and type(value) == str:
+                    if value[:4] != "env:" and not is_reference(value):
+                        consumes.add(value)
+                        consumes.add(value.split(".")[0])
+                elif key in ("func_name", "map") and type(value) == str:
+                    if value[:4] != "use:":
+                        consumes.add(value)
+                elif key != "description":
+                    visit(value)
+        elif type(x) is list:
+            for y in x:
+                visit(y)
+
+    visit(item)
+    return produces, consumes
+
+
+def depends(names: Names, other: Names) -> bool:
+    """
+    Whether a step with names has to wait for an earlier step,
+    read after write, write after write or write after read
+    """
+    produces, consumes = names
+    other_produces, other_consumes = other
+    if consumes & other_produces:
+        return True
+    return bool(produces & (other_produces | other_consumes))
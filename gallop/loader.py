@@ -0,0 +1,121 @@
+from typing import Any, Iterator, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+import gc
+import logging
+import marshal
+import os
+import sys
+import zlib
+
+
+CACHE_DIR = Path(os.environ.get(
+    "GALLOP_CACHE_DIR",
+    Path.home() / ".cache" / "gallop"))
+
+CONFIG_CACHE = dict(
+    # marshal format differs between python versions
+    cache_dir=CACHE_DIR / "configs" / "py{}{}".format(*sys.version_info),
+    # set GALLOP_CONFIG_CACHE=0 to parse the file every time
+    enabled=os.environ.get("GALLOP_CONFIG_CACHE", "1") != "0",
+)
+
+# the garbage collector is paused while any thread parses yaml
+GC_PAUSE = dict(
+    count=0,
+    enabled=False,
+    lock=Lock(),
+)
+
+
+def yaml_loader() -> Any:
+    """
+    The libyaml C loader if available, else the python loader
+    """
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Pause the garbage collector, until the last thread pausing it
+    is done, then enable it back if it was enabled
+    """
+    with GC_PAUSE["lock"]:
+        if GC_PAUSE["count"] == 0:
+            GC_PAUSE["enabled"] = gc.isenabled()
+            gc.disable()
+        GC_PAUSE["count"] += 1
+    try:
+        yield
+    finally:
+        with GC_PAUSE["lock"]:
+            GC_PAUSE["count"] -= 1
+            if GC_PAUSE["count"] == 0 and GC_PAUSE["enabled"]:
+                gc.enable()
+
+
+def parse_yaml(path: Path) -> Any:
+    """
+    Parse a yaml file, with the garbage collector paused,
+    the collections triggered by the many new containers
+    take most of the parsing time of a large config
+    """
+    import yaml
+    with paused_gc():
+        with open(path, "r") as f:
+            return yaml.load(f, Loader=yaml_loader())
+
+
+def cache_path(path: Path) -> Path:
+    digest = zlib.crc32(str(path).encode())
+    return Path(CONFIG_CACHE["cache_dir"]) / f"{digest:08x}.bin"
+
+
+def read_cache(path: Path, signature: Tuple[int, int]) -> Tuple[bool, Any]:
+    """
+    Read the parsed config, if the file did not change
+    """
+    try:
+        with open(cache_path(path), "rb") as f:
+            cached_path, cached_signature, data = marshal.load(f)
+    except Exception:
+        return False, None
+    if cached_path != str(path) or cached_signature != signature:
+        return False, None
+    return True, data
+
+
+def write_cache(path: Path, signature: Tuple[int, int], data: Any):
+    target = cache_path(path)
+    try:
+        payload = marshal.dumps((str(path), signature, data))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, target)
+    except Exception as e:
+        # eg. yaml timestamps, marshal only takes plain data
+        logging.debug(f"🙈 Can not cache parsed config {path}: {e}")
+
+
+def load_yaml(path: Path) -> Any:
+    """
+    Load a yaml file,
+    the parsed data is cached by path, mtime and size
+    """
+    if not CONFIG_CACHE["enabled"]:
+        return parse_yaml(path)
+    path = Path(path).resolve()
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    hit, data = read_cache(path, signature)
+    if hit:
+        logging.debug(f"⚡️ read parsed {path} from CACHE")
+        return data
+    data = parse_yaml(path)
+    write_cache(path, signature, data)
+    return data
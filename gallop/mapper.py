@@ -0,0 +1,169 @@
+from gallop.config import BaseConfig
+from gallop.classroom import to_classroom, cl, mark_sn, bind_context
+from gallop.executors import get_executor
+from gallop.funcs import Importer
+from gallop.remote import has_handles, fetch_handles
+from gallop.trace import trace_step
+from typing import Any, Dict, List
+from datetime import datetime
+import logging
+
+
+def run_chunk(
+    func: Any,
+    units: List[Any],
+    kwargs: Dict[str, Any]
+) -> List[Any]:
+    """
+    Call the function on every unit (an item, or a batch of items),
+    func is either a 'use:' string for the Importer, or a callable
+    """
+    if type(func) == str and func[:4] == "use:":
+        func = Importer(func[4:])
+    return list(func(unit, **kwargs) for unit in units)
+
+
+@to_classroom("Mapper")
+class Mapper:
+    """
+    Apply a callable to every item of an iterable,
+    the 'map' directive of the config
+
+    - map: use:math.sqrt
+      over:
+        checkout: numbers
+      batch_size: 32        # the callable takes lists of 32 items
+      workers: 4            # chunks run on a pool
+      executor: process     # local (default, threads) or process
+      checkin: roots
+    """
+    def __init__(
+        self,
+        config: BaseConfig,
+        depth: int = 0
+    ):
+        self.config = config
+        self.depth = depth
+
+        self.func_name = self.config["map"]
+        if self.func_name[:4] == "use:":
+            self.callable = Importer(self.func_name[4:])
+        else:
+            self.callable = cl(self.func_name)
+
+        self.batch_size = self.config.get("batch_size", None)
+        self.workers = max(int(self.config.get("workers", 1)), 1)
+        # the step executor names, local runs the chunks on threads
+        self.executor = self.config.get("executor", "local")
+        get_executor(self.executor)
+        if self.executor not in ("local", "process"):
+            raise ValueError(
+                f"Can not map on the {self.executor} executor, "
+                "choose from local, process")
+        self.chunk_size = self.config.get("chunk_size", None)
+        self.kwargs = self.config.get("kwargs", {})
+        self.checkin = self.config.get("checkin", None)
+
+    def make_units(self, items: List[Any]) -> List[Any]:
+        if self.batch_size is None:
+            return items
+        return list(
+            items[i:i + self.batch_size]
+            for i in range(0, len(items), self.batch_size))
+
+    def make_chunks(self, units: List[Any]) -> List[List[Any]]:
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            # a chunk per worker
+            chunk_size = max(-(-len(units) // self.workers), 1)
+        return list(
+            units[i:i + chunk_size]
+            for i in range(0, len(units), chunk_size))
+
+    def dispatch(
+        self,
+        units: List[Any],
+        kwargs: Dict[str, Any]
+    ) -> List[Any]:
+        """
+        Run the units in chunks, the outputs keep the order
+        """
+        if self.workers == 1 or len(units) < 2:
+            return run_chunk(self.callable, units, kwargs)
+        chunks = self.make_chunks(units)
+        if self.executor == "process":
+            from gallop.executors import get_process_pool
+            func = self.func_name
+            if func[:4] != "use:":
+                func = self.callable
+            pool = get_process_pool()
+            futures = list(
+                pool.submit(run_chunk, func, chunk, kwargs)
+                for chunk in chunks)
+            results = list(future.result() for future in futures)
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = list(
+                    pool.submit(
+                        bind_context(run_chunk),
+                        self.callable, chunk, kwargs)
+                    for chunk in chunks)
+                results = list(future.result() for future in futures)
+        return list(output for outputs in results for output in outputs)
+
+    def flatten_batches(
+        self,
+        units: List[Any],
+        outputs: List[Any]
+    ) -> List[Any]:
+        if self.batch_size is None:
+            return outputs
+        result = []
+        for batch, batch_output in zip(units, outputs):
+            try:
+                batch_output = list(batch_output)
+            except TypeError:
+                raise ValueError(
+                    f"{self.func_name} should return a list per batch, "
+                    f"got {type(batch_output).__name__}")
+            if len(batch_output) != len(batch):
+                raise ValueError(
+                    f"{self.func_name} returned {len(batch_output)} "
+                    f"outputs for a batch of {len(batch)}")
+            result.extend(batch_output)
+        return result
+
+    def __call__(self) -> Any:
+        from gallop.call import Caller, checkin_result
+        spacing = "\t" * self.depth
+        sn = mark_sn()
+        logging.info(f"{spacing}🗺️ Mapping[🍔 {sn}]: {self.func_name}")
+        start_time = datetime.now()
+
+        with trace_step(sn, self.depth, f"map:{self.func_name}") as span:
+            items = list(Caller.resolve_item(
+                self.config["over"], depth=self.depth+1))
+            kwargs = Caller.run_dict(self.kwargs, depth=self.depth+1)
+            if has_handles():
+                # values kept on the remote workers
+                items = fetch_handles(items)
+                kwargs = fetch_handles(kwargs)
+            span.mark_resolved()
+
+            units = self.make_units(items)
+            try:
+                outputs = self.dispatch(units, kwargs)
+                res = self.flatten_batches(units, outputs)
+            except KeyboardInterrupt:
+                raise KeyboardInterrupt("User Interrupted")
+            except Exception as e:
+                logging.error(f"{spacing}❌ [🍔 {sn}]: {e}")
+                raise e
+
+        delta = datetime.now() - start_time
+        logging.info(
+            f"{spacing}[🏁 {sn}] map {self.func_name} "
+            f"over {len(items)} items :⏱️ {delta}")
+
+        return checkin_result(self.checkin, res, spacing)
@@ -0,0 +1,209 @@
+from gallop.classroom import CLASS_ROOM, ClassRoom, release
+from typing import Any, Dict, Iterable, List, Optional, Set
+from collections import OrderedDict
+from threading import RLock
+import sys
+
+
+SIZE_UNITS = dict(K=2**10, M=2**20, G=2**30, T=2**40)
+
+
+def parse_size(size: Any) -> int:
+    """
+    Bytes from 1000000, '512M' or '2GB'
+    """
+    if type(size) in (int, float):
+        return int(size)
+    size = str(size).strip().upper().rstrip("B")
+    if size and size[-1] in SIZE_UNITS:
+        return int(float(size[:-1]) * SIZE_UNITS[size[-1]])
+    return int(float(size))
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Rough size of a value in bytes,
+    arrays and dataframes report their buffers,
+    containers add up their items one level down
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if type(nbytes) == int:
+        return nbytes
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage):
+        try:
+            return int(memory_usage(deep=True).sum())
+        except Exception:
+            pass
+    size = sys.getsizeof(value)
+    if type(value) in (list, tuple, set):
+        size += sum(sys.getsizeof(x) for x in value)
+    elif type(value) == dict:
+        size += sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+class MemoryBudget:
+    """
+    Keep the checked in values under a size,
+    the coldest values spill to disk, and load back when read
+    """
+    def __init__(
+        self,
+        max_bytes: Any,
+        spill_dir: Optional[str] = None,
+        room: Optional[ClassRoom] = None,
+    ):
+        # the layer of CLASS_ROOM taking the checkins
+        self.room = CLASS_ROOM.current() if room is None else room
+        self.max_bytes = parse_size(max_bytes)
+        self.spill_dir = spill_dir
+        self.made_dir = False
+        # name => size, the coldest first
+        self.sizes: Dict[str, int] = OrderedDict()
+        self.lock = RLock()
+
+    @property
+    def usage(self) -> int:
+        return sum(self.sizes.values())
+
+    def spill_path(self, name: str) -> str:
+        import os
+        if self.spill_dir is None:
+            import atexit
+            import tempfile
+            self.spill_dir = tempfile.mkdtemp(prefix="gallop-spill-")
+            self.made_dir = True
+            atexit.register(self.close)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        from uuid import uuid4
+        return os.path.join(self.spill_dir, f"{uuid4().hex}.pkl")
+
+    def track(self, name: str):
+        """
+        A value is checked in or loaded back, it is the hottest now
+        """
+        with self.lock:
+            if not dict.__contains__(self.room, name):
+                return
+            self.sizes[name] = estimate_size(dict.__getitem__(self.room, name))
+            self.sizes.move_to_end(name)
+            self.enforce(keep={name})
+
+    def forget(self, name: str):
+        with self.lock:
+            self.sizes.pop(name, None)
+
+    def enforce(self, keep: Set[str] = frozenset()):
+        """
+        Spill the coldest values until the usage fits the budget
+        """
+        with self.lock:
+            for name in list(self.sizes):
+                if self.usage <= self.max_bytes:
+                    return
+                if name in keep:
+                    continue
+                if self.room.spill(name, self.spill_path(name)):
+                    del self.sizes[name]
+
+    def close(self):
+        """
+        Delete the spilled values
+        """
+        with self.lock:
+            for name in list(self.room.spilled):
+                self.room.drop_spilled(name)
+            self.sizes.clear()
+            if self.made_dir:
+                import shutil
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def set_memory_budget(
+    max_bytes: Any,
+    spill_dir: Optional[str] = None
+) -> Optional[MemoryBudget]:
+    """
+    Set the budget for the checked in values of the current run,
+    None to remove it
+    """
+    room = CLASS_ROOM.current()
+    if room.budget is not None:
+        room.budget.close()
+    room.budget = None
+    if max_bytes is not None:
+        room.budget = MemoryBudget(max_bytes, spill_dir, room)
+    return room.budget
+
+
+class Liveness:
+    """
+    Release a checked in value once every step
+    that checks it in or reads it has run
+
+    Only names checked in by the steps are released,
+    values read by code outside the config (eg. cl() inside a function)
+    are not seen, keep them with 'keep'
+    """
+    def __init__(self, steps: List[Any], keep: Iterable[str] = ()):
+        keep = set(keep)
+        produced = set()
+        for step in steps:
+            produced |= step.produces
+        # name => index of the steps still to run
+        self.pending: Dict[str, Set[int]] = dict()
+        for step in steps:
+            for name in (step.produces | step.consumes) & produced - keep:
+                self.pending.setdefault(name, set()).add(step.index)
+        # path => names, of the steps checking in
+        self.producers = dict(
+            (step.path, step.produces) for step in steps
+            if len(step.produces))
+        self.released: Set[str] = set()
+        self.lock = RLock()
+
+    def __call__(
+        self,
+        step: Any,
+        result: Any,
+        results: Dict[Any, Any]
+    ) -> Any:
+        """
+        Step done callback for the Scheduler,
+        the results of the steps whose names are all released
+        are dropped too
+        """
+        with self.lock:
+            released = False
+            for name in step.produces | step.consumes:
+                indices = self.pending.get(name)
+                if indices is None:
+                    continue
+                indices.discard(step.index)
+                if len(indices) == 0:
+                    del self.pending[name]
+                    release(name)
+                    self.released.add(name)
+                    released = True
+            for path, produces in self.producers.items():
+                if released and path in results and \
+                        produces <= self.released:
+                    results[path] = None
+        if step.path in self.producers and \
+                self.producers[step.path] <= self.released:
+            return None
+        return result
+
+
+def track_budget(step: Any, result: Any, results: Dict[Any, Any]) -> Any:
+    """
+    Step done callback for the Scheduler,
+    count the values the step checked in against the memory budget
+    """
+    budget = CLASS_ROOM.current().budget
+    if budget is not None:
+        for name in step.produces:
+            budget.track(name)
+    return result
@@ -0,0 +1,237 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import CLASS_ROOM, JSON_FRIENDLY, to_classroom
+from gallop.graph import is_package, step_names
+from gallop.trace import trace_step
+from typing import Any, Optional, Set, Tuple
+from abc import ABC, abstractmethod
+from copy import deepcopy
+
+
+class Node(ABC):
+    """
+    A node of the execution plan
+    """
+    __slots__ = ()
+
+    @abstractmethod
+    def run(self) -> Any:
+        """
+        Run the node, return its value
+        """
+
+
+class Const(Node):
+    """
+    A literal subtree, passed through as it is,
+    a mutable value is copied at every run, so a callee changing
+    its args does not change the later runs
+    """
+    __slots__ = ("value", "mutable")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.mutable = type(value) not in JSON_FRIENDLY
+
+    def run(self) -> Any:
+        if self.mutable:
+            return deepcopy(self.value)
+        return self.value
+
+
+class Checkout(Node):
+    """
+    Checkout a name from CLASS_ROOM,
+    with the attribute chain split at compile time
+    """
+    __slots__ = ("val", "root", "attrs")
+
+    def __init__(self, val: str):
+        self.val = val
+        chain = val.split(".")
+        self.root = chain[0]
+        self.attrs = tuple(chain[1:])
+
+    def run(self) -> Any:
+        if self.val in CLASS_ROOM:
+            return CLASS_ROOM[self.val]
+        if len(self.attrs) and self.root in CLASS_ROOM:
+            value = CLASS_ROOM[self.root]
+            for attr in self.attrs:
+                value = getattr(value, attr)
+            return value
+        raise ValueError(f"Cannot find {self.val} in CLASS_ROOM")
+
+
+class PrefixedCheckout(Node):
+    """
+    Checkout with a prefix, eg. 'env:', resolved by Caller.checkout_val
+    """
+    __slots__ = ("val",)
+
+    def __init__(self, val: str):
+        self.val = val
+
+    def run(self) -> Any:
+        return Caller.checkout_val(self.val)
+
+
+class Dynamic(Node):
+    """
+    Resolved by Caller.resolve_item at every run, eg. a map package
+    """
+    __slots__ = ("item", "depth")
+
+    def __init__(self, item: Any, depth: int):
+        self.item = item
+        self.depth = depth
+
+    def run(self) -> Any:
+        return Caller.resolve_item(self.item, depth=self.depth)
+
+
+class ListNode(Node):
+    __slots__ = ("items",)
+
+    def __init__(self, items: Tuple[Node, ...]):
+        self.items = items
+
+    def run(self) -> Any:
+        return list(item.run() for item in self.items)
+
+
+class DictNode(Node):
+    __slots__ = ("keys", "items")
+
+    def __init__(self, keys: Tuple[str, ...], items: Tuple[Node, ...]):
+        self.keys = keys
+        self.items = items
+
+    def run(self) -> Any:
+        return dict(zip(self.keys, (item.run() for item in self.items)))
+
+
+class Call(Node):
+    """
+    Call a function package
+
+    The Caller is built at compile time when the callable can be
+    resolved then, otherwise (eg. a name checked in by an earlier step)
+    it is built at every run
+    """
+    __slots__ = ("config", "depth", "caller", "args", "kwargs")
+
+    def __init__(
+        self,
+        config: BaseConfig,
+        depth: int,
+        caller: Optional[Caller],
+        args: Node,
+        kwargs: Node,
+    ):
+        self.config = config
+        self.depth = depth
+        self.caller = caller
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> Any:
+        caller = self.caller
+        if caller is None:
+            caller = Caller(self.config, depth=self.depth)
+        sn, spacing, start_time = caller.start_call()
+        with trace_step(sn, self.depth, self.config.func_name) as span:
+            args = self.args.run()
+            kwargs = self.kwargs.run()
+            span.mark_resolved()
+            return caller.call_resolved(
+                args, kwargs, sn, spacing, start_time)
+
+
+@to_classroom("Plan")
+class Plan:
+    """
+    An immutable execution plan compiled from a task config,
+    it can be called many times
+    """
+    __slots__ = ("root",)
+
+    def __init__(self, root: Node):
+        self.root = root
+
+    def __repr__(self) -> str:
+        return f"Plan({type(self.root).__name__})"
+
+    def __call__(self) -> Any:
+        return self.root.run()
+
+
+def has_package(item: Any) -> bool:
+    """
+    Whether there is a function/checkout package in the subtree
+    """
+    if type(item) in (dict, BaseConfig):
+        if is_package(item):
+            return True
+        return any(has_package(item[key]) for key in item)
+    if type(item) is list:
+        return any(has_package(y) for y in item)
+    return False
+
+
+def compile_node(item: Any, depth: int, produced: Set[str]) -> Node:
+    if not has_package(item):
+        # resolving a literal subtree calls nothing
+        return Const(Caller.resolve_item(item, depth=depth))
+    if type(item) in (dict, BaseConfig):
+        if "func_name" in item:
+            if type(item) == dict:
+                item = BaseConfig._wrap(item)
+            func_name = item.func_name
+            caller = None
+            if func_name[:4] == "use:" or (
+                    func_name in CLASS_ROOM and func_name not in produced):
+                caller = Caller(item, depth=depth)
+            return Call(
+                item,
+                depth,
+                caller,
+                compile_args(item.get("args", []), depth + 1, produced),
+                compile_args(item.get("kwargs", {}), depth + 1, produced),
+            )
+        elif "map" in item and "over" in item:
+            return Dynamic(item, depth)
+        elif "checkout" in item:
+            val = item["checkout"]
+            if ":" in val:
+                return PrefixedCheckout(val)
+            return Checkout(val)
+        keys = tuple(item)
+        return DictNode(keys, tuple(
+            compile_node(item[key], depth + 1, produced) for key in keys))
+    return ListNode(tuple(
+        compile_node(y, depth + 1, produced) for y in item))
+
+
+def compile_args(item: Any, depth: int, produced: Set[str]) -> Node:
+    """
+    The args or kwargs of a call,
+    the items at depth, as Caller.run_list and run_dict
+    """
+    if not has_package(item):
+        return Const(Caller.resolve_item(item, depth=depth))
+    if type(item) is list:
+        return ListNode(tuple(
+            compile_node(y, depth, produced) for y in item))
+    keys = tuple(item)
+    return DictNode(keys, tuple(
+        compile_node(item[key], depth, produced) for key in keys))
+
+
+def compile_plan(item: Any) -> Plan:
+    """
+    Compile the item into a plan,
+    calling the plan equals to Caller.resolve_item(item)
+    """
+    produced, _ = step_names(item)
+    return Plan(compile_node(item, 0, produced))
@@ -0,0 +1,99 @@
+from gallop.classroom import CLASS_ROOM
+from gallop.funcs import PREIMPORTS, IMPORT_TIMES, import_callable
+from typing import Any, Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+import logging
+
+
+DEFAULT_WORKERS = 4
+
+# one pool of import threads for the process
+IMPORT_POOL = dict(
+    pool=None,
+    lock=Lock(),
+)
+
+# the keys whose 'use:' values name a callable
+USE_KEYS = ("func_name", "map")
+
+
+def use_names(x: Any) -> List[str]:
+    """
+    The 'use:' names of the steps in a config, in the order of the config
+    """
+    names = dict()
+
+    def walk(x: Any):
+        if hasattr(type(x), "conf_data"):
+            # a BaseConfig, no substantiating
+            x = x.conf_data
+        if type(x) == dict:
+            for key, value in x.items():
+                if key in USE_KEYS and type(value) == str \
+                        and value[:4] == "use:":
+                    names[value[4:]] = None
+                else:
+                    walk(value)
+        elif type(x) in (list, tuple):
+            for value in x:
+                walk(value)
+
+    walk(x)
+    return list(names)
+
+
+def get_import_pool(workers: int = DEFAULT_WORKERS) -> ThreadPoolExecutor:
+    """
+    The import threads, started at the first call with the workers count
+    """
+    with IMPORT_POOL["lock"]:
+        if IMPORT_POOL["pool"] is None:
+            IMPORT_POOL["pool"] = ThreadPoolExecutor(
+                max_workers=max(int(workers), 1),
+                thread_name_prefix="gallop-import")
+        return IMPORT_POOL["pool"]
+
+
+def preimport(
+    names: List[str],
+    workers: int = DEFAULT_WORKERS
+) -> Dict[str, Future]:
+    """
+    Import the names on background threads,
+    the Importer waits for the pending ones instead of importing again
+    """
+    names = list(
+        name for name in names
+        if name not in CLASS_ROOM and name not in PREIMPORTS)
+    if len(names) == 0:
+        return dict()
+    logging.info(f"📦 Pre-importing {len(names)} names")
+    pool = get_import_pool(workers)
+    futures = dict()
+    for name in names:
+        futures[name] = PREIMPORTS[name] = pool.submit(import_callable, name)
+    return futures
+
+
+def preimport_config(config: Any, workers: int = DEFAULT_WORKERS):
+    """
+    Start importing every 'use:' name of the config
+    """
+    return preimport(use_names(config), workers=workers)
+
+
+def import_report() -> List[str]:
+    """
+    Lines of the import time per name, the slowest first,
+    names sharing a package wait on each other's import,
+    so the package time shows on the first one
+    """
+    lines = []
+    for name, seconds in sorted(
+            IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        lines.append(f"{seconds * 1000:10.1f} ms  {name}")
+    for name, future in PREIMPORTS.items():
+        if future.done() and future.exception() is not None:
+            lines.append(f"{'failed':>13}  {name}: {future.exception()}")
+    return lines
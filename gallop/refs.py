@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, Tuple
+from threading import Lock
+import logging
+import os
+
+
+# prefix => function opening the path
+OPENERS: Dict[str, Callable[[str], Any]] = dict()
+
+# (prefix, absolute path) => (mtime_ns, opened object)
+REFERENCES: Dict[Tuple[str, str], Tuple[int, Any]] = dict()
+REFERENCES_LOCK = Lock()
+
+
+def register_opener(prefix: str) -> Callable:
+    """
+    Register a function opening 'checkout: <prefix>:<path>'
+    """
+    def wrapper(func: Callable[[str], Any]) -> Callable[[str], Any]:
+        OPENERS[prefix] = func
+        return func
+    return wrapper
+
+
+def is_reference(val: str) -> bool:
+    """
+    Whether the checkout value is a data reference, eg. 'mmap:a.npy'
+    """
+    prefix, sep, _ = val.partition(":")
+    return bool(sep) and prefix in OPENERS
+
+
+def map_file(path: str) -> memoryview:
+    """
+    A read only view of the whole file, paged in on access
+    """
+    import mmap
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped)
+
+
+@register_opener("bytes")
+def open_bytes(path: str) -> memoryview:
+    return map_file(path)
+
+
+@register_opener("mmap")
+def open_mmap(path: str) -> Any:
+    """
+    A .npy file as a read only numpy memmap, other files as bytes
+    """
+    if path.endswith(".npy"):
+        import numpy as np
+        return np.load(path, mmap_mode="r")
+    return map_file(path)
+
+
+@register_opener("arrow")
+def open_arrow(path: str) -> Any:
+    """
+    An arrow IPC file (or stream) as a table,
+    the buffers point into the memory map
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError(f"arrow:{path} needs pyarrow, pip install pyarrow")
+    source = pa.memory_map(path, "r")
+    try:
+        return pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source).read_all()
+
+
+def open_reference(val: str) -> Any:
+    """
+    Open 'prefix:path', once per path,
+    opened again if the file changed
+    """
+    prefix, _, path = val.partition(":")
+    path = os.path.abspath(os.path.expanduser(path))
+    mtime = os.stat(path).st_mtime_ns
+    key = (prefix, path)
+    with REFERENCES_LOCK:
+        cached = REFERENCES.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        logging.debug(f"🗺️ Mapping {val}")
+        value = OPENERS[prefix](path)
+        REFERENCES[key] = (mtime, value)
+    return value
+
+
+def close_references():
+    """
+    Forget the opened references,
+    the maps close with the last view of them
+    """
+    with REFERENCES_LOCK:
+        REFERENCES.clear()
@@ -0,0 +1,345 @@
+from gallop.executors import run_in_worker
+from typing import Any, Dict, List, Optional, Tuple
+from threading import Lock, Thread
+from uuid import uuid4
+import logging
+import os
+import secrets
+
+
+Address = Tuple[str, int]
+
+# pickles go over the wire, only peers with the key may connect,
+# a worker refuses the key anyone could guess
+PUBLIC_AUTHKEY = b"gallop"
+
+REMOTE = dict(
+    # addresses of the workers, for 'executor: remote'
+    workers=[],
+    # from --authkey, else GALLOP_AUTHKEY
+    authkey=os.environ.get("GALLOP_AUTHKEY", "").encode() or None,
+    # address => count of the calls running on it
+    running=dict(),
+    # address => idle connections
+    idle=dict(),
+    # the handles made in this process, to free at the end
+    handles=[],
+    lock=Lock(),
+)
+
+# the state of this process, when it serves as a worker
+WORKER = dict(
+    id=None,
+    address=None,
+    stopped=False,
+)
+
+# key => value kept on this worker
+RESIDENT: Dict[str, Any] = dict()
+
+
+def parse_worker(address: Any) -> Address:
+    """
+    'host:port' or a port number => (host, port)
+    """
+    if type(address) in (tuple, list):
+        return (str(address[0]), int(address[1]))
+    if type(address) == int:
+        return ("127.0.0.1", address)
+    host, _, port = str(address).rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def set_remote(workers: Any, authkey: Optional[str] = None):
+    """
+    Set the workers for 'executor: remote',
+    a list of addresses or a comma separated string
+    """
+    if type(workers) == str:
+        workers = list(item for item in workers.split(",") if item.strip())
+    elif type(workers) == int:
+        workers = [workers]
+    REMOTE["workers"] = list(parse_worker(worker) for worker in workers)
+    if authkey is not None:
+        REMOTE["authkey"] = str(authkey).encode()
+
+
+NOT_FETCHED = object()
+
+
+class RemoteHandle:
+    """
+    A value kept on a worker, fetched at the first local use
+    """
+    __slots__ = ("address", "key", "worker_id", "type_name", "value")
+
+    def __init__(
+        self,
+        address: Address,
+        key: str,
+        worker_id: str,
+        type_name: str
+    ):
+        self.address = address
+        self.key = key
+        self.worker_id = worker_id
+        self.type_name = type_name
+        self.value = NOT_FETCHED
+
+    def __getstate__(self):
+        return (self.address, self.key, self.worker_id, self.type_name)
+
+    def __setstate__(self, state):
+        self.address, self.key, self.worker_id, self.type_name = state
+        self.value = NOT_FETCHED
+
+    def __repr__(self) -> str:
+        host, port = self.address
+        return f"RemoteHandle({self.type_name} on {host}:{port})"
+
+    def fetch(self) -> Any:
+        """
+        The value, from the worker holding it
+        """
+        if self.worker_id == WORKER["id"]:
+            # on the very worker
+            return RESIDENT[self.key]
+        if self.value is NOT_FETCHED:
+            logging.debug(f"📡 Fetching {self}")
+            self.value = request(self.address, ("fetch", self.key))
+        return self.value
+
+    def free(self):
+        """
+        Let the worker drop the value
+        """
+        request(self.address, ("free", self.key))
+
+
+def fetch_handles(x: Any) -> Any:
+    """
+    Replace the handles in the args with their values
+    """
+    if type(x) == RemoteHandle:
+        return x.fetch()
+    if type(x) in (list, tuple):
+        return type(x)(fetch_handles(y) for y in x)
+    if type(x) == dict:
+        return dict((k, fetch_handles(v)) for k, v in x.items())
+    return x
+
+
+def find_handles(x: Any, found: List[RemoteHandle]) -> List[RemoteHandle]:
+    if type(x) == RemoteHandle:
+        found.append(x)
+    elif type(x) in (list, tuple):
+        for y in x:
+            find_handles(y, found)
+    elif type(x) == dict:
+        for y in x.values():
+            find_handles(y, found)
+    return found
+
+
+def has_handles() -> bool:
+    """
+    Any value kept on a worker, the local steps fetch them
+    """
+    return len(REMOTE["handles"]) > 0
+
+
+# coordinator side
+def connect(address: Address) -> Any:
+    with REMOTE["lock"]:
+        idle = REMOTE["idle"].get(address, [])
+        if len(idle):
+            return idle.pop()
+    if REMOTE["authkey"] is None:
+        raise ValueError(
+            "Set the authkey of the workers, "
+            "with --authkey or GALLOP_AUTHKEY in the environment")
+    from multiprocessing.connection import Client
+    return Client(address, authkey=REMOTE["authkey"])
+
+
+def request(address: Address, message: Tuple[Any, ...]) -> Any:
+    """
+    Send a message to the worker, return the reply value,
+    raise the error raised on the worker
+    """
+    conn = connect(address)
+    try:
+        conn.send(message)
+        kind, value = conn.recv()
+    except BaseException:
+        conn.close()
+        raise
+    with REMOTE["lock"]:
+        REMOTE["idle"].setdefault(address, []).append(conn)
+    if kind == "error":
+        raise value
+    return value
+
+
+def pick_worker(
+    args: List[Any],
+    kwargs: Dict[str, Any],
+    pinned: Any = None
+) -> Address:
+    """
+    The pinned worker, else the worker holding most of the handles
+    in the args, else the least busy one
+    """
+    if pinned is not None:
+        return parse_worker(pinned)
+    workers = REMOTE["workers"]
+    if len(workers) == 0:
+        raise ValueError(
+            "No remote workers, set them with --remote host:port,...")
+    handles = find_handles(kwargs, find_handles(args, []))
+    owners = list(
+        handle.address for handle in handles if handle.address in workers)
+    if len(owners):
+        return max(set(owners), key=owners.count)
+    with REMOTE["lock"]:
+        running = REMOTE["running"]
+        return min(workers, key=lambda worker: running.get(worker, 0))
+
+
+def run_remote(caller: Any, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+    """
+    Run the step on a worker,
+    with 'resident: true' the result stays there, a handle comes back
+    """
+    func_name = caller.config.func_name
+    func = func_name if func_name[:4] == "use:" else caller.callable
+    keep = bool(caller.config.get("resident", False))
+    address = pick_worker(args, kwargs, caller.config.get("worker", None))
+    with REMOTE["lock"]:
+        REMOTE["running"][address] = REMOTE["running"].get(address, 0) + 1
+    try:
+        reply = request(address, ("call", func, args, kwargs, keep))
+    finally:
+        with REMOTE["lock"]:
+            REMOTE["running"][address] -= 1
+    if not keep:
+        return reply
+    handle = RemoteHandle(address, *reply)
+    REMOTE["handles"].append(handle)
+    return handle
+
+
+def close_remote(free: bool = True):
+    """
+    Free the values kept on the workers, close the connections
+    """
+    handles, REMOTE["handles"] = REMOTE["handles"], []
+    for handle in handles if free else []:
+        try:
+            handle.free()
+        except Exception as e:
+            logging.warning(f"🙈 Can not free {handle}: {e}")
+    with REMOTE["lock"]:
+        for conns in REMOTE["idle"].values():
+            for conn in conns:
+                conn.close()
+        REMOTE["idle"].clear()
+
+
+def stop_worker(address: Any):
+    request(parse_worker(address), ("stop",))
+
+
+# worker side
+def handle_message(message: Tuple[Any, ...]) -> Tuple[str, Any]:
+    kind = message[0]
+    if kind == "call":
+        func, args, kwargs, keep = message[1:]
+        res = run_in_worker(func, fetch_handles(args), fetch_handles(kwargs))
+        if not keep:
+            return "ok", res
+        key = uuid4().hex
+        RESIDENT[key] = res
+        return "ok", (key, WORKER["id"], type(res).__name__)
+    if kind == "fetch":
+        return "ok", RESIDENT[message[1]]
+    if kind == "free":
+        RESIDENT.pop(message[1], None)
+        return "ok", None
+    if kind == "ping":
+        return "ok", dict(
+            pid=os.getpid(), id=WORKER["id"], resident=len(RESIDENT))
+    if kind == "stop":
+        WORKER["stopped"] = True
+        return "ok", None
+    raise ValueError(f"Unknown message {kind}")
+
+
+def serve_connection(conn: Any):
+    """
+    Answer the messages of one coordinator connection
+    """
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                reply = handle_message(message)
+            except Exception as e:
+                logging.error(f"❌ Remote {message[0]} failed: {e}")
+                reply = ("error", e)
+            try:
+                conn.send(reply)
+            except Exception as e:
+                # eg. the result or the error does not pickle
+                conn.send(("error", RuntimeError(
+                    f"{type(e).__name__}: {e}, replying to {message[0]}")))
+            if WORKER["stopped"]:
+                wake_listener()
+                return
+
+
+def wake_listener():
+    """
+    Connect to the worker itself, so the blocking accept returns
+    """
+    from multiprocessing.connection import Client
+    try:
+        Client(WORKER["address"], authkey=REMOTE["authkey"]).close()
+    except OSError:
+        pass
+
+
+def serve_worker(address: Any, authkey: Optional[str] = None):
+    """
+    Run the steps sent by coordinators, until a 'stop' message
+    """
+    from multiprocessing.connection import Listener
+    if authkey is not None:
+        REMOTE["authkey"] = str(authkey).encode()
+    if REMOTE["authkey"] == PUBLIC_AUTHKEY:
+        # any user could run code here, even on localhost
+        raise ValueError(
+            f"The authkey {PUBLIC_AUTHKEY.decode()} is public, "
+            "choose another one")
+    if REMOTE["authkey"] is None:
+        REMOTE["authkey"] = secrets.token_hex(16).encode()
+        logging.warning(
+            f"🔑 No --authkey, the coordinators connect with "
+            f"--authkey {REMOTE['authkey'].decode()}")
+    address = parse_worker(address)
+    WORKER.update(id=uuid4().hex, address=address, stopped=False)
+    with Listener(address, authkey=REMOTE["authkey"]) as listener:
+        logging.warning(f"🛠️ gallop worker on {address[0]}:{address[1]}")
+        while not WORKER["stopped"]:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # eg. a peer without the authkey
+                logging.warning(f"🙅 Refused a connection: {e}")
+                continue
+            Thread(
+                target=serve_connection, args=(conn,), daemon=True).start()
+    RESIDENT.clear()
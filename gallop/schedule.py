@@ -0,0 +1,176 @@
+from gallop.classroom import to_classroom, bind_context
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.graph import is_package, step_names, depends
+from typing import (
+    Any, Callable, Dict, List, Optional, Set, Tuple
+)
+from concurrent.futures import (
+    ThreadPoolExecutor, wait, FIRST_COMPLETED
+)
+import logging
+
+
+Path = Tuple[Any, ...]
+# called with (step, result, results so far) when a step is done,
+# returns the result to keep
+StepCallback = Callable[["Step", Any, Dict[Path, Any]], Any]
+
+
+class Step:
+    """
+    A unit of work for the scheduler:
+    a function package, a checkout package or a literal,
+    found while walking the containers of a task config
+    """
+    def __init__(self, index: int, path: Path, item: Any, depth: int):
+        self.index = index
+        self.path = path
+        self.item = item
+        self.depth = depth
+        self.produces, self.consumes = step_names(item)
+        self.upstream: Set[int] = set()
+
+    def __repr__(self) -> str:
+        return f"Step[{self.index}]: {'.'.join(map(str, self.path))}"
+
+    def depends_on(self, other: "Step") -> bool:
+        """
+        Whether this step has to wait for an earlier step
+        """
+        return depends(
+            (self.produces, self.consumes),
+            (other.produces, other.consumes))
+
+    def __call__(self) -> Any:
+        return Caller.resolve_item(self.item, depth=self.depth)
+
+
+def flatten_steps(item: Any) -> List[Step]:
+    """
+    Walk down the plain containers (dict, list) of a task config,
+    collect the steps in the order the sequential run would call them
+    """
+    steps = []
+
+    def visit(x: Any, path: Path, depth: int):
+        if type(x) in (dict, BaseConfig) and not is_package(x):
+            for key in x:
+                visit(x[key], path + (key,), depth + 1)
+        elif type(x) is list:
+            for i, y in enumerate(x):
+                visit(y, path + (i,), depth + 1)
+        else:
+            steps.append(Step(len(steps), path, x, depth))
+
+    visit(item, (), 0)
+    for step in steps:
+        for other in steps[:step.index]:
+            if step.depends_on(other):
+                step.upstream.add(other.index)
+    return steps
+
+
+def assemble(item: Any, results: Dict[Path, Any], path: Path = ()) -> Any:
+    """
+    Rebuild the structure of the task config with the step results,
+    the same shape Caller.resolve_item returns
+    """
+    if type(item) in (dict, BaseConfig) and not is_package(item):
+        return dict(
+            (key, assemble(item[key], results, path + (key,)))
+            for key in item)
+    elif type(item) is list:
+        return list(
+            assemble(y, results, path + (i,))
+            for i, y in enumerate(item))
+    return results[path]
+
+
+@to_classroom("Scheduler")
+class Scheduler:
+    """
+    Run the steps of a task config as a dependency graph,
+    steps sharing no checkin/checkout names run in parallel
+    on a thread pool
+    """
+    def __init__(
+        self,
+        workers: int = 1,
+        callbacks: Optional[List[StepCallback]] = None,
+    ):
+        self.workers = max(int(workers), 1)
+        self.callbacks = list(callbacks or [])
+
+    def step_done(
+        self,
+        step: Step,
+        result: Any,
+        results: Dict[Path, Any]
+    ) -> Any:
+        for callback in self.callbacks:
+            result = callback(step, result, results)
+        return result
+
+    def resolve_item(self, item: Any) -> Any:
+        """
+        Resolve the item, same result as Caller.resolve_item
+        """
+        steps = flatten_steps(item)
+        results = self.run_steps(steps)
+        return assemble(item, results)
+
+    def run_steps(self, steps: List[Step]) -> Dict[Path, Any]:
+        """
+        Run the steps, return results by step path
+        """
+        results = dict()
+        if self.workers == 1 or len(steps) < 2:
+            for step in steps:
+                results[step.path] = self.step_done(step, step(), results)
+            return results
+
+        # upstream steps left out of the run (eg. restored) are done
+        indices = set(step.index for step in steps)
+        steps = dict((step.index, step) for step in steps)
+        waiting = dict(
+            (index, step.upstream & indices)
+            for index, step in steps.items())
+        running = dict()
+        error = None
+
+        logging.info(
+            f"🐎 Scheduling {len(steps)} steps on {self.workers} workers")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while waiting or running:
+                if error is None:
+                    ready = list(
+                        index for index, upstream in waiting.items()
+                        if len(upstream) == 0)
+                    for index in ready:
+                        del waiting[index]
+                        future = pool.submit(bind_context(steps[index]))
+                        running[future] = index
+                elif len(running) == 0:
+                    break
+                if len(running) == 0:
+                    raise RuntimeError(
+                        f"Steps can not be scheduled: {list(waiting)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # keep the first error, let running steps finish
+                        if error is None:
+                            error = e
+                        continue
+                    step = steps[index]
+                    results[step.path] = self.step_done(step, result, results)
+                    for upstream in waiting.values():
+                        upstream.discard(index)
+        if error is not None:
+            raise error
+        return results
@@ -0,0 +1,399 @@
+from gallop.classroom import JSON_FRIENDLY
+from gallop.serializers import get_serializer
+from typing import (
+    Any, Callable, Dict, List, Optional, Tuple, Union, get_type_hints
+)
+from copy import deepcopy
+from numbers import Integral, Real
+
+try:
+    from typing import Literal, get_args, get_origin
+except ImportError:
+    # python 3.7, Literal comes with typing_extensions
+    try:
+        from typing_extensions import Literal
+    except ImportError:
+        # no Literal type to meet
+        Literal = object()
+
+    def get_origin(tp: Any) -> Any:
+        return getattr(tp, "__origin__", None)
+
+    def get_args(tp: Any) -> Tuple[Any, ...]:
+        if getattr(tp, "_special", False):
+            # a bare List or Dict, its __args__ are type variables
+            return ()
+        return getattr(tp, "__args__", ())
+
+
+Check = Callable[[Any, str], Any]
+
+MISSING = object()
+
+
+class Field:
+    """
+    Default of a schema field,
+    default_factory makes a new default for every config
+    """
+    __slots__ = ("default", "default_factory")
+
+    def __init__(
+        self,
+        default: Any = MISSING,
+        default_factory: Optional[Callable[[], Any]] = None
+    ):
+        self.default = default
+        self.default_factory = default_factory
+
+
+def field(
+    default: Any = MISSING,
+    default_factory: Optional[Callable[[], Any]] = None
+) -> Field:
+    return Field(default, default_factory)
+
+
+def plain_value(x: Any) -> Any:
+    """
+    Render to plain data, for the fields typed Any
+    """
+    if type(x) in JSON_FRIENDLY:
+        return x
+    if hasattr(x, "to_dict"):
+        return x.to_dict()
+    if type(x) in (list, tuple, set):
+        return list(plain_value(y) for y in x)
+    if type(x) == dict:
+        return dict((k, plain_value(v)) for k, v in x.items())
+    return x
+
+
+def fail(path: str, expected: str, value: Any):
+    raise ValueError(
+        f"{path}: expected {expected}, got {type(value).__name__} {value!r}")
+
+
+def compile_check(tp: Any) -> Check:
+    """
+    A function to validate and convert a value of the type,
+    compiled once per field
+    """
+    if tp is Any:
+        return lambda value, path: value
+    if isinstance(tp, type) and issubclass(tp, SchemaConfig):
+        def check_schema(value: Any, path: str) -> Any:
+            if isinstance(value, tp):
+                return value
+            if hasattr(value, "conf_data"):
+                # a BaseConfig
+                value = value.to_dict()
+            if type(value) != dict:
+                fail(path, tp.__name__, value)
+            return tp.load(value, path)
+        return check_schema
+    if tp is bool:
+        def check_bool(value: Any, path: str) -> Any:
+            if type(value) != bool:
+                fail(path, "bool", value)
+            return value
+        return check_bool
+    if tp is int:
+        def check_int(value: Any, path: str) -> Any:
+            if type(value) == int:
+                return value
+            if not isinstance(value, Integral) or type(value) == bool:
+                fail(path, "int", value)
+            return int(value)
+        return check_int
+    if tp is float:
+        def check_float(value: Any, path: str) -> Any:
+            if type(value) == float:
+                return value
+            if not isinstance(value, Real) or type(value) == bool:
+                fail(path, "float", value)
+            return float(value)
+        return check_float
+
+    origin, args = get_origin(tp), get_args(tp)
+    if origin is Union:
+        checks = list(compile_check(arg) for arg in args)
+        names = ", ".join(getattr(arg, "__name__", str(arg)) for arg in args)
+
+        def check_union(value: Any, path: str) -> Any:
+            if value is None and type(None) in args:
+                return None
+            for check in checks:
+                try:
+                    return check(value, path)
+                except ValueError:
+                    continue
+            fail(path, f"one of {names}", value)
+        return check_union
+    if origin is Literal:
+        def check_literal(value: Any, path: str) -> Any:
+            if value not in args:
+                fail(path, f"one of {args}", value)
+            return value
+        return check_literal
+    if tp in (list, List) or origin is list:
+        item_check = compile_check(args[0] if len(args) else Any)
+
+        def check_list(value: Any, path: str) -> Any:
+            if type(value) not in (list, tuple):
+                fail(path, "list", value)
+            return list(
+                item_check(item, f"{path}.{i}")
+                for i, item in enumerate(value))
+        return check_list
+    if tp in (tuple, Tuple) or origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return compile_check(List[args[0]])
+        item_checks = list(compile_check(arg) for arg in args)
+
+        def check_tuple(value: Any, path: str) -> Any:
+            if type(value) not in (list, tuple):
+                fail(path, "tuple", value)
+            if len(item_checks) == 0:
+                return tuple(value)
+            if len(value) != len(item_checks):
+                fail(path, f"{len(item_checks)} items", value)
+            return tuple(
+                check(item, f"{path}.{i}")
+                for i, (check, item) in enumerate(zip(item_checks, value)))
+        return check_tuple
+    if tp in (dict, Dict) or origin is dict:
+        value_check = compile_check(args[1] if len(args) == 2 else Any)
+
+        def check_dict(value: Any, path: str) -> Any:
+            if hasattr(value, "conf_data"):
+                value = value.to_dict()
+            if type(value) != dict:
+                fail(path, "dict", value)
+            return dict(
+                (key, value_check(item, f"{path}.{key}"))
+                for key, item in value.items())
+        return check_dict
+    if isinstance(tp, type):
+        def check_instance(value: Any, path: str) -> Any:
+            if not isinstance(value, tp):
+                fail(path, tp.__name__, value)
+            return value
+        return check_instance
+    raise TypeError(f"Schema does not support the type {tp}")
+
+
+def compile_dump(tp: Any) -> Optional[Callable[[Any], Any]]:
+    """
+    A function rendering a validated value of the type to plain data,
+    None when the value is plain already
+    """
+    if tp in (bool, int, float, str) or get_origin(tp) is Literal:
+        return None
+    if isinstance(tp, type) and issubclass(tp, SchemaConfig):
+        return lambda value: value.to_dict()
+    origin, args = get_origin(tp), get_args(tp)
+    if tp in (list, List, tuple, Tuple) or origin in (list, tuple):
+        args = tuple(arg for arg in args if arg is not Ellipsis)
+        if len(args) and all(compile_dump(arg) is None for arg in args):
+            return list
+    if tp in (dict, Dict) or origin is dict:
+        if len(args) == 2 and compile_dump(args[1]) is None:
+            return dict
+    return plain_value
+
+
+class SchemaConfig:
+    """
+    Base of the classes made by @schema,
+    the fields are slots, validated once when the config is made
+    """
+    __slots__ = ()
+    # name => (check, default, default_factory)
+    __fields__: Dict[str, Tuple[Check, Any, Any]] = dict()
+    # (name, dump or None)
+    __dumps__: Tuple[Tuple[str, Any], ...] = ()
+
+    def __init__(self, **kwargs):
+        self.fill(kwargs, type(self).__name__)
+
+    @classmethod
+    def load(cls, data: Dict[str, Any], path: str) -> "SchemaConfig":
+        config = cls.__new__(cls)
+        config.fill(data, path)
+        return config
+
+    def fill(self, data: Dict[str, Any], path: str):
+        fields = self.__fields__
+        for key in data:
+            if key not in fields:
+                raise ValueError(f"{path}: unknown key {key}")
+        for name, (check, default, default_factory) in fields.items():
+            if name in data:
+                value = check(data[name], f"{path}.{name}")
+            elif default_factory is not None:
+                value = default_factory()
+            elif default is not MISSING:
+                value = default
+            else:
+                raise ValueError(f"{path}: missing key {name}")
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SchemaConfig":
+        return cls.load(data, cls.__name__)
+
+    @classmethod
+    def from_config(cls, config: Any) -> "SchemaConfig":
+        """
+        Validate a BaseConfig into the schema
+        """
+        return cls.from_dict(config.to_dict())
+
+    @classmethod
+    def from_file(cls, path: str, format: Optional[str] = None):
+        return cls.from_dict(get_serializer(format, path).load(path))
+
+    @classmethod
+    def from_yaml(cls, path: str):
+        return cls.from_file(path, format="yaml")
+
+    @classmethod
+    def from_json(cls, path: str):
+        return cls.from_file(path, format="json")
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = dict()
+        for name, dump in self.__dumps__:
+            value = getattr(self, name)
+            result[name] = value if dump is None else dump(value)
+        return result
+
+    def to_file(
+        self,
+        path: str,
+        format: Optional[str] = None,
+        stream: bool = False
+    ):
+        get_serializer(format, path).save(self, path, stream=stream)
+
+    def to_yaml(self, path: str, stream: bool = False):
+        self.to_file(path, format="yaml", stream=stream)
+
+    def to_json(self, path: str, stream: bool = False):
+        self.to_file(path, format="json", stream=stream)
+
+    def copy(self) -> "SchemaConfig":
+        return self.from_dict(self.to_dict())
+
+    # the dict like reading of BaseConfig
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__fields__:
+            raise KeyError(f"Config has no key {key}")
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        """
+        Set a field with validation, setting the attribute skips it
+        """
+        if key not in self.__fields__:
+            raise KeyError(f"Config has no key {key}")
+        check = self.__fields__[key][0]
+        object.__setattr__(
+            self, key, check(value, f"{type(self).__name__}.{key}"))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.__fields__:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__fields__
+
+    def __iter__(self):
+        return iter(self.__fields__)
+
+    def __len__(self) -> int:
+        return len(self.__fields__)
+
+    def keys(self):
+        return self.__fields__.keys()
+
+    def items(self):
+        return list((name, getattr(self, name)) for name in self.__fields__)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) != type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __setstate__(self, state: Dict[str, Any]):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+
+def schema(cls: type) -> type:
+    """
+    Compile the annotated class into a config class,
+    every annotated field is a slot
+
+    @schema
+    class Optimizer:
+        name: str = "adam"
+        lr: float = 1e-3
+
+    @schema
+    class Train:
+        epochs: int
+        optimizer: Optimizer = field(default_factory=Optimizer)
+        layers: List[int] = field(default_factory=list)
+
+    train = Train.from_yaml("train.yaml")
+    """
+    # the fields declared on this class, the parent schema has its own
+    own = cls.__dict__.get("__annotations__", dict())
+    hints = dict(
+        (name, tp) for name, tp in get_type_hints(cls).items()
+        if name in own)
+    namespace = dict(
+        (key, value) for key, value in vars(cls).items()
+        if key not in hints and key not in ("__dict__", "__weakref__"))
+    fields, dumps = dict(), dict()
+    for name, tp in hints.items():
+        default, default_factory = vars(cls).get(name, MISSING), None
+        if isinstance(default, Field):
+            default, default_factory = default.default, default.default_factory
+        check = compile_check(tp)
+        if default is not MISSING:
+            mutable = type(default) in (list, dict, set)
+            # fail at the declaration on a wrong default
+            default = check(default, f"{cls.__name__}.{name}")
+            if mutable:
+                # a new copy for every config
+                default_factory = (
+                    lambda value: lambda: deepcopy(value))(default)
+                default = MISSING
+        fields[name] = (check, default, default_factory)
+        dumps[name] = compile_dump(tp)
+
+    bases = tuple(base for base in cls.__bases__ if base is not object)
+    parents = list(base for base in bases if issubclass(base, SchemaConfig))
+    if len(parents) == 0:
+        bases = bases + (SchemaConfig,)
+        inherited = dict()
+    else:
+        inherited = parents[0].__fields__
+        dumps = dict(parents[0].__dumps__, **dumps)
+    namespace["__slots__"] = tuple(
+        name for name in fields if name not in inherited)
+    namespace["__fields__"] = dict(inherited, **fields)
+    namespace["__dumps__"] = tuple(
+        (name, dumps[name]) for name in namespace["__fields__"])
+    return type(cls.__name__, bases, namespace)
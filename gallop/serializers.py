@@ -0,0 +1,310 @@
+from gallop.loader import load_yaml
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, IO, Iterator, Optional, Tuple
+from pathlib import Path
+import json
+import math
+
+
+# name => Serializer
+SERIALIZERS: Dict[str, "Serializer"] = dict()
+
+# write the streamed chunks in pieces of this size
+STREAM_BUFFER = 2 ** 16
+
+
+def register_serializer(name: str, extensions: Tuple[str, ...] = ()):
+    """
+    Register a Serializer class under the name and file extensions
+    """
+    def wrapper(cls: type) -> type:
+        serializer = cls()
+        serializer.name = name
+        serializer.extensions = extensions
+        SERIALIZERS[name] = serializer
+        return cls
+    return wrapper
+
+
+def get_serializer(name: Optional[str] = None, path: Any = None):
+    """
+    The serializer by name, else by the extension of the path,
+    yaml for an unknown extension
+    """
+    if name is not None:
+        if name not in SERIALIZERS:
+            raise ValueError(
+                f"Unknown format {name}, choose from {list(SERIALIZERS)}")
+        return SERIALIZERS[name]
+    suffix = Path(path).suffix.lower() if path is not None else ""
+    for serializer in SERIALIZERS.values():
+        if suffix in serializer.extensions:
+            return serializer
+    return SERIALIZERS["yaml"]
+
+
+def config_items(x: Any) -> Optional[Iterator[Tuple[Any, Any]]]:
+    """
+    The items of a config or a dict, without substantiating,
+    None for other values
+    """
+    if type(x) == dict:
+        return iter(x.items())
+    if hasattr(type(x), "conf_data"):
+        # a BaseConfig, the nested values stay as they are
+        return iter(x.conf_data.items())
+    if hasattr(x, "to_dict"):
+        return iter(x.to_dict().items())
+    return None
+
+
+def plain(data: Any) -> Any:
+    """
+    The data as plain dict, for the backends without streaming
+    """
+    if hasattr(data, "to_dict"):
+        return data.to_dict()
+    return data
+
+
+class Serializer(ABC):
+    """
+    Read and write plain data (dict, list, str, numbers, bool, None)
+    """
+    name = ""
+    extensions: Tuple[str, ...] = ()
+    # binary file, or text
+    binary = False
+
+    @abstractmethod
+    def dump(self, data: Any, f: IO):
+        pass
+
+    @abstractmethod
+    def load(self, path: Path) -> Any:
+        pass
+
+    def stream(self, config: Any, f: IO):
+        """
+        Write a config without the whole to_dict copy,
+        the default writes the to_dict
+        """
+        self.dump(plain(config), f)
+
+    def save(self, data: Any, path: Path, stream: bool = False):
+        """
+        Save a config or a dict to the path,
+        stream=True writes along the walk of the nested data
+        """
+        mode = "wb" if self.binary else "w"
+        with open(path, mode) as f:
+            if stream:
+                self.stream(data, f)
+            else:
+                self.dump(plain(data), f)
+
+
+def buffered(chunks: Iterator[str], f: IO):
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BUFFER:
+            f.write("".join(buffer))
+            buffer, size = [], 0
+    f.write("".join(buffer))
+
+
+def json_chunks(x: Any, encode: Callable[[Any], str]) -> Iterator[str]:
+    """
+    The json text of x in pieces, walking the nested configs
+    """
+    items = config_items(x)
+    if items is not None:
+        yield "{"
+        for i, (key, value) in enumerate(items):
+            yield ("," if i else "") + encode(str(key)) + ":"
+            yield from json_chunks(value, encode)
+        yield "}"
+    elif type(x) in (list, tuple, set):
+        yield "["
+        for i, value in enumerate(x):
+            if i:
+                yield ","
+            yield from json_chunks(value, encode)
+        yield "]"
+    else:
+        yield encode(x)
+
+
+def has_non_finite(x: Any) -> bool:
+    """
+    Any NaN or infinite float in the plain data
+    """
+    stack = [x]
+    while len(stack):
+        x = stack.pop()
+        if type(x) == float:
+            if not math.isfinite(x):
+                return True
+        elif type(x) == dict:
+            stack.extend(x.keys())
+            stack.extend(x.values())
+        elif type(x) in (list, tuple):
+            stack.extend(x)
+    return False
+
+
+@register_serializer("json", (".json",))
+class JsonSerializer(Serializer):
+    """
+    orjson when installed, else the stdlib json
+    """
+    def __init__(self):
+        try:
+            import orjson
+            self.orjson = orjson
+        except ImportError:
+            self.orjson = None
+
+    def dump(self, data: Any, f: IO):
+        if self.orjson is not None:
+            try:
+                text = self.orjson.dumps(
+                    data, option=self.orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # eg. integers over 64 bits
+                text = None
+            # orjson writes NaN and Infinity as null, the json module
+            # keeps them, look for them only when there is a null
+            if text is not None and (
+                    b"null" not in text or not has_non_finite(data)):
+                f.write(text.decode())
+                return
+        json.dump(data, f)
+
+    def load(self, path: Path) -> Any:
+        if self.orjson is not None:
+            with open(path, "rb") as f:
+                text = f.read()
+            try:
+                return self.orjson.loads(text)
+            except self.orjson.JSONDecodeError:
+                # eg. NaN written by the json module
+                return json.loads(text)
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def stream(self, config: Any, f: IO):
+        buffered(json_chunks(config, json.dumps), f)
+
+
+def yaml_dumper() -> Any:
+    """
+    The libyaml C dumper if available, else the python dumper
+    """
+    import yaml
+    return getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+@register_serializer("yaml", (".yaml", ".yml"))
+class YamlSerializer(Serializer):
+    """
+    libyaml (C) loader and dumper when available,
+    loading goes through the parsed config cache
+    """
+    def dump(self, data: Any, f: IO):
+        import yaml
+        yaml.dump(data, f, Dumper=yaml_dumper())
+
+    def load(self, path: Path) -> Any:
+        return load_yaml(path)
+
+    def stream(self, config: Any, f: IO):
+        """
+        Emit the yaml events while walking the config
+        """
+        import yaml
+        dumper = yaml_dumper()(f)
+        dumper.emit(yaml.StreamStartEvent())
+        dumper.emit(yaml.DocumentStartEvent(explicit=False))
+        for event in self.events(config, dumper):
+            dumper.emit(event)
+        dumper.emit(yaml.DocumentEndEvent(explicit=False))
+        dumper.emit(yaml.StreamEndEvent())
+        dumper.dispose()
+
+    def events(self, x: Any, dumper: Any) -> Iterator[Any]:
+        import yaml
+        items = config_items(x)
+        if items is not None:
+            yield yaml.MappingStartEvent(None, None, True)
+            for key, value in items:
+                yield from self.events(key, dumper)
+                yield from self.events(value, dumper)
+            yield yaml.MappingEndEvent()
+        elif type(x) in (list, tuple, set):
+            yield yaml.SequenceStartEvent(None, None, True)
+            for value in x:
+                yield from self.events(value, dumper)
+            yield yaml.SequenceEndEvent()
+        else:
+            node = dumper.represent_data(x)
+            if not isinstance(node, yaml.ScalarNode):
+                raise TypeError(f"Can not stream {type(x)} to yaml")
+            implicit = (
+                node.tag == dumper.resolve(
+                    yaml.ScalarNode, node.value, (True, False)),
+                node.tag == dumper.resolve(
+                    yaml.ScalarNode, node.value, (False, True)),
+            )
+            yield yaml.ScalarEvent(
+                None, node.tag, implicit, node.value, style=node.style)
+
+
+@register_serializer("msgpack", (".msgpack", ".mpk"))
+class MsgpackSerializer(Serializer):
+    """
+    Compact binary configs, for the machine generated ones,
+    needs msgpack installed
+    """
+    binary = True
+
+    def msgpack(self) -> Any:
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError(
+                "msgpack format needs msgpack, pip install msgpack")
+        return msgpack
+
+    def dump(self, data: Any, f: IO):
+        f.write(self.msgpack().packb(data, use_bin_type=True))
+
+    def load(self, path: Path) -> Any:
+        with open(path, "rb") as f:
+            return self.msgpack().unpackb(f.read(), raw=False)
+
+    def stream(self, config: Any, f: IO):
+        """
+        Pack the containers header by header
+        """
+        packer = self.msgpack().Packer(use_bin_type=True)
+
+        def pack(x: Any):
+            items = config_items(x)
+            if items is not None:
+                # one level of the items at a time
+                items = list(items)
+                f.write(packer.pack_map_header(len(items)))
+                for key, value in items:
+                    f.write(packer.pack(key))
+                    pack(value)
+            elif type(x) in (list, tuple, set):
+                f.write(packer.pack_array_header(len(x)))
+                for value in x:
+                    pack(value)
+            else:
+                f.write(packer.pack(x))
+
+        pack(config)
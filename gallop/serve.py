@@ -0,0 +1,192 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import cl, new_run
+from typing import Any, Dict, Optional, Tuple, Union
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import stat
+
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(address: Any) -> Address:
+    """
+    'host:port' or a port number for TCP, else a unix socket path
+    """
+    if type(address) == int:
+        return ("127.0.0.1", address)
+    if type(address) == tuple:
+        return address
+    host, _, port = str(address).rpartition(":")
+    if port.isdigit() and "/" not in address:
+        return (host or "127.0.0.1", int(port))
+    return str(address)
+
+
+def jsonable(value: Any) -> Any:
+    """
+    The value if json can dump it, else its repr
+    """
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def run_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a task with the warm CLASS_ROOM, in a run context of its own,
+    so the requests running at once keep their checkins apart
+
+    request keys:
+    - task: path to the task yaml, or config: the task as a dict
+    - params: {key string: value}, same as --param:key value
+    - output: a checked in name, or a list of names to return
+    - print_result: return the result of the task
+    """
+    if "task" in request:
+        config = BaseConfig.from_yaml(request["task"])
+    elif "config" in request:
+        config = BaseConfig(**request["config"])
+    else:
+        raise ValueError("Request needs a 'task' or a 'config'")
+    config.apply_patch(list(
+        dict(op="set", path=key, value=value)
+        for key, value in request.get("params", dict()).items()))
+
+    with new_run(request.get("task", "config")):
+        result = Caller.resolve_item(config)
+        response = dict(ok=True)
+        output = request.get("output", None)
+        if type(output) == list:
+            response["output"] = dict(
+                (name, jsonable(cl(name))) for name in output)
+        elif output is not None:
+            response["output"] = jsonable(cl(output))
+    if request.get("print_result", False):
+        response["result"] = jsonable(result)
+    return response
+
+
+def env_authkey() -> Optional[str]:
+    return os.environ.get("GALLOP_AUTHKEY", None) or None
+
+
+class TaskHandler(socketserver.StreamRequestHandler):
+    """
+    One json request per line, one json response per line,
+    with the authkey of the server in every request
+    """
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                authkey = self.server.authkey
+                if authkey is not None and not hmac.compare_digest(
+                        str(request.pop("authkey", "")).encode(),
+                        authkey.encode()):
+                    logging.warning(
+                        f"🙅 Refused a request from {self.client_address}")
+                    self.wfile.write(json.dumps(dict(
+                        ok=False, error="Wrong authkey")).encode() + b"\n")
+                    return
+                response = run_request(request)
+            except Exception as e:
+                logging.error(f"❌ Request failed: {e}")
+                response = dict(ok=False, error=f"{type(e).__name__}: {e}")
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class TCPTaskServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    authkey: Optional[str] = None
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class UnixTaskServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+        authkey: Optional[str] = None
+else:
+    UnixTaskServer = None
+
+
+def make_server(
+    address: Any,
+    preload: Optional[str] = None,
+    authkey: Optional[str] = None
+) -> socketserver.BaseServer:
+    """
+    Run the preload task, whose checked in values stay resident,
+    then bind the server to the address
+
+    A request runs any callable, so a TCP server takes only the
+    requests with its authkey, from the argument or GALLOP_AUTHKEY,
+    else a random one it logs. A unix socket is for this user only,
+    the authkey is checked there if one is set
+    """
+    authkey = env_authkey() if authkey is None else str(authkey)
+    if authkey == "gallop":
+        raise ValueError("The authkey gallop is public, choose another one")
+
+    if preload is not None:
+        logging.warning(f"🔥 Warming up with {preload}")
+        Caller.resolve_item(BaseConfig.from_yaml(preload))
+
+    address = parse_address(address)
+    if type(address) == str:
+        if UnixTaskServer is None:
+            raise ValueError("Unix socket is not supported, use a port")
+        if os.path.exists(address):
+            if not stat.S_ISSOCK(os.stat(address).st_mode):
+                raise ValueError(f"{address} exists and is not a socket")
+            # left by a previous server
+            os.remove(address)
+        # only this user may send tasks to run, from the bind on
+        umask = os.umask(0o177)
+        try:
+            server = UnixTaskServer(address, TaskHandler)
+        finally:
+            os.umask(umask)
+    else:
+        if authkey is None:
+            authkey = secrets.token_hex(16)
+            logging.warning(
+                f"🔑 No --authkey, the clients connect with "
+                f"--authkey {authkey}")
+        server = TCPTaskServer(address, TaskHandler)
+    server.authkey = authkey
+    logging.warning(f"🐎 Serving gallop tasks on {address}")
+    return server
+
+
+def send_request(
+    address: Any,
+    authkey: Optional[str] = None,
+    **request
+) -> Dict[str, Any]:
+    """
+    Send a request to a gallop server, return the response,
+    the authkey defaults to GALLOP_AUTHKEY
+    """
+    authkey = env_authkey() if authkey is None else str(authkey)
+    if authkey is not None:
+        request["authkey"] = authkey
+    address = parse_address(address)
+    family = socket.AF_UNIX if type(address) == str else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.connect(address)
+        with sock.makefile("rwb") as f:
+            f.write(json.dumps(request).encode() + b"\n")
+            f.flush()
+            return json.loads(f.readline())
@@ -0,0 +1,119 @@
+from gallop.classroom import to_classroom, bind_context
+from typing import Any, Iterable, Iterator, Optional
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+import logging
+
+
+ITEM, END, ERROR = 0, 1, 2
+
+# seconds between checks of a closed stream
+POLL_INTERVAL = 0.1
+
+
+@to_classroom("Stream")
+class Stream:
+    """
+    Iterate an iterable on a producer thread,
+    through a bounded queue
+
+    The producer blocks when the queue is full,
+    so a slow consumer holds back the upstream stages
+    """
+    def __init__(
+        self,
+        iterable: Iterable,
+        maxsize: int = 8,
+        chunk_size: Optional[int] = None,
+        name: str = "stream",
+    ):
+        self.iterable = iterable
+        self.queue = Queue(maxsize=maxsize)
+        self.chunk_size = chunk_size
+        self.name = name
+        self.stopped = Event()
+        self.consumed = False
+        self.thread = Thread(
+            target=bind_context(self.produce),
+            name=f"gallop-{name}", daemon=True)
+        self.thread.start()
+
+    def __repr__(self) -> str:
+        return f"Stream({self.name}, maxsize={self.queue.maxsize})"
+
+    def put(self, message: Any) -> bool:
+        """
+        Put to the queue, return False if the stream is closed
+        """
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(message, timeout=POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
+
+    def items(self) -> Iterator[Any]:
+        if self.chunk_size is None:
+            yield from self.iterable
+            return
+        chunk = []
+        for item in self.iterable:
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if len(chunk):
+            yield chunk
+
+    def produce(self):
+        try:
+            for item in self.items():
+                if not self.put((ITEM, item)):
+                    return
+        except BaseException as e:
+            logging.error(f"❌ Stream {self.name}: {e}")
+            self.put((ERROR, e))
+        else:
+            self.put((END, None))
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.consumed:
+            raise RuntimeError(f"Stream {self.name} is already consumed")
+        self.consumed = True
+        try:
+            while True:
+                kind, value = self.queue.get()
+                if kind == ITEM:
+                    yield value
+                elif kind == END:
+                    return
+                else:
+                    raise value
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stop the producer, eg. when the consumer stops early
+        """
+        self.stopped.set()
+        try:
+            while True:
+                self.queue.get_nowait()
+        except Empty:
+            pass
+
+
+def to_stream(res: Any, setting: Any, name: str = "stream") -> Stream:
+    """
+    Wrap the step result into a stream,
+    setting is 'stream: true' or 'stream: {maxsize: 8, chunk_size: 100}'
+    """
+    if setting is True:
+        return Stream(res, name=name)
+    return Stream(
+        res,
+        maxsize=setting.get("maxsize", 8),
+        chunk_size=setting.get("chunk_size", None),
+        name=name)
@@ -0,0 +1,157 @@
+from gallop.config import BaseConfig, parse_path
+from gallop.classroom import to_classroom, cl
+from gallop.schedule import Scheduler, Step, flatten_steps, assemble
+from gallop.loader import load_yaml
+from gallop.funcs import wait_preimports
+from typing import Any, Dict, List, Optional, Set
+from itertools import product
+import logging
+import multiprocessing as mp
+
+
+# shared with the forked workers
+SWEEP_STATE = dict()
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the values
+    """
+    keys = list(grid)
+    return list(
+        dict(zip(keys, values))
+        for values in product(*(grid[key] for key in keys)))
+
+
+def affected_steps(
+    steps: List[Step],
+    variants: List[Dict[str, Any]]
+) -> Set[int]:
+    """
+    Index of the steps changed by any variant,
+    or downstream of a changed step
+    """
+    paths = set(
+        parse_path(key) for variant in variants for key in variant)
+    affected = set()
+    for path in paths:
+        matched = set(
+            step.index for step in steps
+            if step.path == path[:len(step.path)]
+            or path == step.path[:len(path)])
+        if len(matched) == 0:
+            # a new key, can not tell which step reads it
+            return set(step.index for step in steps)
+        affected |= matched
+    for step in steps:
+        if step.upstream & affected:
+            affected.add(step.index)
+    return affected
+
+
+def run_variant(index: int) -> Dict[str, Any]:
+    """
+    Run the affected steps of one variant, on top of the warm prefix
+    """
+    config = SWEEP_STATE["config"]._copy()
+    variant = SWEEP_STATE["variants"][index]
+    config.apply_patch(list(
+        dict(op="set", path=key, value=value)
+        for key, value in variant.items()))
+
+    results = dict(SWEEP_STATE["prefix_results"])
+    steps = list(
+        step for step in flatten_steps(config)
+        if step.path not in results)
+    logging.info(f"🌾 Variant {index}: {len(steps)} steps")
+    results.update(Scheduler().run_steps(steps))
+
+    row = dict(variant=index)
+    row.update(variant)
+    for output in SWEEP_STATE["outputs"]:
+        row[output] = cl(output)
+    if len(SWEEP_STATE["outputs"]) == 0:
+        row["result"] = assemble(config, results)
+    return row
+
+
+@to_classroom("Sweep")
+class Sweep:
+    """
+    Run a task config with a list of parameter overrides,
+    the steps no override affects run once,
+    the affected steps fan out on forked workers,
+    sharing the warm prefix copy-on-write
+    """
+    def __init__(
+        self,
+        config: BaseConfig,
+        variants: List[Dict[str, Any]],
+        outputs: Optional[List[str]] = None,
+        workers: int = 1,
+    ):
+        self.config = config
+        self.variants = variants
+        self.outputs = list(outputs or [])
+        self.workers = max(int(workers), 1)
+
+    @classmethod
+    def from_yaml(
+        cls,
+        config: BaseConfig,
+        path: str,
+        **kwargs
+    ) -> "Sweep":
+        """
+        A sweep file has 'grid' (key: list of values) and/or
+        'variants' (list of key: value), optionally 'outputs'
+        and 'workers'
+        """
+        spec = load_yaml(path)
+        variants = list(spec.get("variants", []))
+        if "grid" in spec:
+            variants += expand_grid(spec["grid"])
+        kwargs.setdefault("outputs", spec.get("outputs", None))
+        kwargs.setdefault("workers", spec.get("workers", 1))
+        return cls(config, variants, **kwargs)
+
+    def run(self) -> List[Dict[str, Any]]:
+        """
+        Run all the variants, return a row per variant
+        """
+        if len(self.variants) == 0:
+            return []
+        steps = flatten_steps(self.config)
+        affected = affected_steps(steps, self.variants)
+        prefix = list(step for step in steps if step.index not in affected)
+        logging.warning(
+            f"🌾 Sweeping {len(self.variants)} variants, "
+            f"{len(prefix)} of {len(steps)} steps shared")
+
+        SWEEP_STATE.update(
+            config=self.config,
+            variants=self.variants,
+            outputs=self.outputs,
+            prefix_results=Scheduler().run_steps(prefix),
+        )
+        try:
+            indices = list(range(len(self.variants)))
+            can_fork = "fork" in mp.get_all_start_methods()
+            if len(indices) < 2 or self.workers == 1 or not can_fork:
+                return list(run_variant(index) for index in indices)
+            wait_preimports()
+            context = mp.get_context("fork")
+            with context.Pool(min(self.workers, len(indices))) as pool:
+                return pool.map(run_variant, indices)
+        finally:
+            SWEEP_STATE.clear()
+
+
+def save_table(rows: List[Dict[str, Any]], path: str):
+    """
+    Save the rows as json lines
+    """
+    import json
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
@@ -0,0 +1,188 @@
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock, get_ident
+from time import perf_counter
+import json
+import os
+
+
+# serial number of the step whose args are being resolved
+PARENT_SN: ContextVar = ContextVar("gallop_parent_sn", default=None)
+
+TRACE = dict(
+    tracer=None,
+)
+
+
+class Span:
+    """
+    Timing of one step, in seconds from the tracer origin
+    """
+    __slots__ = (
+        "sn", "parent", "depth", "func_name",
+        "begin", "resolved", "end", "pid", "tid", "error")
+
+    def __init__(
+        self, sn: int, parent: Optional[int], depth: int,
+        func_name: str, begin: float
+    ):
+        self.sn = sn
+        self.parent = parent
+        self.depth = depth
+        self.func_name = func_name
+        self.begin = begin
+        self.resolved = None
+        self.end = None
+        self.pid = os.getpid()
+        self.tid = get_ident()
+        self.error = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict((key, getattr(self, key)) for key in self.__slots__)
+
+
+class Tracer:
+    """
+    Collect the begin/end of every step,
+    export as Chrome trace events or collapsed stacks for flamegraphs
+    """
+    def __init__(self):
+        self.origin = perf_counter()
+        self.spans: List[Span] = []
+        self.lock = Lock()
+
+    def now(self) -> float:
+        return perf_counter() - self.origin
+
+    def begin(self, sn: int, depth: int, func_name: str) -> Span:
+        span = Span(sn, PARENT_SN.get(), depth, func_name, self.now())
+        with self.lock:
+            self.spans.append(span)
+        return span
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """
+        Complete ('X') events, timestamps in microseconds,
+        each step has a 'resolve args' and a 'call' child event
+        """
+        events = []
+        for span in self.spans:
+            if span.end is None:
+                continue
+            resolved = span.end if span.resolved is None else span.resolved
+            common = dict(pid=span.pid, tid=span.tid, cat="gallop")
+            events.append(dict(
+                name=span.func_name, ph="X",
+                ts=span.begin * 1e6, dur=(span.end - span.begin) * 1e6,
+                args=dict(
+                    sn=span.sn, parent_sn=span.parent, depth=span.depth,
+                    resolve_time=resolved - span.begin,
+                    call_time=span.end - resolved,
+                    error=span.error),
+                **common))
+            events.append(dict(
+                name="resolve args", ph="X",
+                ts=span.begin * 1e6, dur=(resolved - span.begin) * 1e6,
+                args=dict(sn=span.sn), **common))
+            events.append(dict(
+                name="call", ph="X",
+                ts=resolved * 1e6, dur=(span.end - resolved) * 1e6,
+                args=dict(sn=span.sn), **common))
+        return events
+
+    def to_chrome(self, path: str):
+        """
+        Save the trace, open it with chrome://tracing or perfetto
+        """
+        with open(path, "w") as f:
+            json.dump(dict(
+                traceEvents=self.chrome_events(),
+                displayTimeUnit="ms"), f)
+
+    def collapsed_stacks(self) -> List[str]:
+        """
+        Lines of 'root;child;grandchild <self time in microseconds>'
+        """
+        spans = dict(
+            (span.sn, span) for span in self.spans if span.end is not None)
+        children_time = dict((sn, 0.) for sn in spans)
+        for span in spans.values():
+            if span.parent in children_time:
+                children_time[span.parent] += span.end - span.begin
+
+        lines = []
+        for sn, span in spans.items():
+            stack = [span.func_name]
+            parent = spans.get(span.parent)
+            while parent is not None:
+                stack.append(parent.func_name)
+                parent = spans.get(parent.parent)
+            self_time = span.end - span.begin - children_time[sn]
+            stack = ";".join(name.replace(";", ":") for name in stack[::-1])
+            lines.append(f"{stack} {max(int(self_time * 1e6), 0)}")
+        return lines
+
+    def to_collapsed(self, path: str):
+        with open(path, "w") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+
+
+def start_tracing() -> Tracer:
+    """
+    Start tracing the steps, return the tracer
+    """
+    TRACE["tracer"] = Tracer()
+    return TRACE["tracer"]
+
+
+def stop_tracing() -> Optional[Tracer]:
+    tracer = TRACE["tracer"]
+    TRACE["tracer"] = None
+    return tracer
+
+
+class NoSpan:
+    """
+    Stand-in span when tracing is off
+    """
+    def mark_resolved(self):
+        pass
+
+
+NO_SPAN = NoSpan()
+
+
+class TracedSpan:
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: Tracer, span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def mark_resolved(self):
+        """
+        The args and kwargs are resolved, the calling starts
+        """
+        self.span.resolved = self.tracer.now()
+
+
+@contextmanager
+def trace_step(sn: int, depth: int, func_name: str):
+    """
+    Trace a step, nested steps started inside have this step as parent
+    """
+    tracer = TRACE["tracer"]
+    if tracer is None:
+        yield NO_SPAN
+        return
+    span = tracer.begin(sn, depth, func_name)
+    token = PARENT_SN.set(sn)
+    try:
+        yield TracedSpan(tracer, span)
+    except BaseException as e:
+        span.error = repr(e)
+        raise
+    finally:
+        span.end = tracer.now()
+        PARENT_SN.reset(token)
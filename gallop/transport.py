@@ -0,0 +1,277 @@
+from gallop.classroom import TRANSPORT_HOOKS, is_array
+from typing import Any, Dict, List, Optional, Tuple
+from threading import Lock
+import logging
+import os
+
+
+# values from 1 MB go to shared memory by default
+DEFAULT_MIN_SIZE = 2 ** 20
+
+TRANSPORT = dict(
+    enabled=False,
+    min_size=DEFAULT_MIN_SIZE,
+    directory=None,
+    # the process making the directory removes it
+    pid=None,
+)
+
+
+class SharedHandle:
+    """
+    A picklable reference to a value in a shared memory file,
+    opened as a zero-copy view on the other side
+    """
+    __slots__ = ("path", "size", "dtype", "shape")
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        dtype: Optional[str] = None,
+        shape: Optional[Tuple[int, ...]] = None,
+    ):
+        self.path = path
+        self.size = size
+        # numpy dtype and shape, None for bytes
+        self.dtype = dtype
+        self.shape = shape
+
+    def __getstate__(self):
+        return (self.path, self.size, self.dtype, self.shape)
+
+    def __setstate__(self, state):
+        self.path, self.size, self.dtype, self.shape = state
+
+    def __repr__(self) -> str:
+        return f"SharedHandle({self.path}, {self.size} bytes)"
+
+    def open(self, writable: bool = False) -> Any:
+        """
+        Map the file, return the view,
+        the mapping lives as long as the view
+        """
+        import mmap
+        mode = "r+b" if writable else "rb"
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        with open(self.path, mode) as f:
+            mapped = mmap.mmap(f.fileno(), self.size, access=access)
+        if self.dtype is None:
+            # read only already, with ACCESS_READ
+            return memoryview(mapped)
+        import numpy as np
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=mapped)
+
+
+class Block:
+    """
+    A value in shared memory, with the count of its checkins
+    """
+    __slots__ = ("handle", "view", "refs")
+
+    def __init__(self, handle: SharedHandle, view: Any):
+        self.handle = handle
+        self.view = view
+        self.refs = 0
+
+
+# id of the view => Block, the views are kept alive by the blocks
+BLOCKS: Dict[int, Block] = dict()
+BLOCKS_LOCK = Lock()
+
+
+def shared_dir() -> str:
+    """
+    The directory of the shared memory files, on tmpfs when there is one
+    """
+    if TRANSPORT["directory"] is None:
+        import atexit
+        import tempfile
+        root = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+        TRANSPORT["directory"] = tempfile.mkdtemp(
+            prefix="gallop-shared-", dir=root)
+        TRANSPORT["pid"] = os.getpid()
+        atexit.register(close_transport)
+    return TRANSPORT["directory"]
+
+
+def shared_size(value: Any) -> Optional[int]:
+    """
+    Bytes of an array-like or bytes-like value,
+    None if it can not go to shared memory
+    """
+    if is_array(value):
+        return value.nbytes
+    if type(value) in (bytes, bytearray):
+        return len(value)
+    if type(value) == memoryview:
+        return value.nbytes
+    return None
+
+
+def write_shared(value: Any, directory: str) -> SharedHandle:
+    """
+    Copy the value to a new shared memory file
+    """
+    from uuid import uuid4
+    path = os.path.join(directory, uuid4().hex)
+    dtype, shape = None, None
+    if is_array(value):
+        import numpy as np
+        dtype, shape = value.dtype.str, value.shape
+        value = np.ascontiguousarray(value)
+    buffer = memoryview(value).cast("B")
+    with open(path, "wb") as f:
+        f.write(buffer)
+    return SharedHandle(path, buffer.nbytes, dtype, shape)
+
+
+def adopt(handle: SharedHandle) -> Any:
+    """
+    Open a shared memory file this process owns from now on
+    """
+    view = handle.open(writable=True)
+    with BLOCKS_LOCK:
+        BLOCKS[id(view)] = Block(handle, view)
+    return view
+
+
+def share(value: Any) -> Any:
+    """
+    The enter hook of checkin,
+    put a large value to shared memory and return the view
+    """
+    with BLOCKS_LOCK:
+        block = BLOCKS.get(id(value))
+        if block is not None and block.view is value:
+            block.refs += 1
+            return value
+    size = shared_size(value)
+    if size is None or size < TRANSPORT["min_size"] or size == 0:
+        return value
+    view = adopt(write_shared(value, shared_dir()))
+    logging.debug(f"🛰️ Shared {size} bytes")
+    with BLOCKS_LOCK:
+        BLOCKS[id(view)].refs += 1
+    return view
+
+
+def unshare(value: Any):
+    """
+    The leave hook of CLASS_ROOM,
+    free the shared memory when no checkin holds the value
+    """
+    with BLOCKS_LOCK:
+        block = BLOCKS.get(id(value))
+        if block is None or block.view is not value:
+            return
+        block.refs -= 1
+        if block.refs > 0:
+            return
+        del BLOCKS[id(value)]
+    free(block)
+
+
+def free(block: Block):
+    """
+    Remove the file, the memory goes with the last view of it
+    """
+    try:
+        os.remove(block.handle.path)
+    except FileNotFoundError:
+        pass
+    logging.debug(f"🛰️ Freed {block.handle}")
+
+
+def to_handle(value: Any) -> Any:
+    """
+    The handle of a shared value, or the value itself
+    """
+    block = BLOCKS.get(id(value))
+    if block is not None and block.view is value:
+        return block.handle
+    return value
+
+
+def pack(values: Any) -> Any:
+    """
+    Swap the shared values in args (list) or kwargs (dict) for handles
+    """
+    if type(values) == dict:
+        return dict((key, pack(value)) for key, value in values.items())
+    if type(values) in (list, tuple):
+        return type(values)(pack(value) for value in values)
+    return to_handle(values)
+
+
+def unpack(values: Any) -> Any:
+    """
+    Open the handles in args or kwargs as read only views
+    """
+    if type(values) == dict:
+        return dict((key, unpack(value)) for key, value in values.items())
+    if type(values) in (list, tuple):
+        return type(values)(unpack(value) for value in values)
+    if type(values) == SharedHandle:
+        return values.open()
+    return values
+
+
+def run_shared(
+    func: Any,
+    args: List[Any],
+    kwargs: Dict[str, Any],
+    directory: Optional[str] = None,
+    min_size: int = DEFAULT_MIN_SIZE,
+) -> Any:
+    """
+    Run in a worker process, with the shared args opened as views,
+    a large result goes back through a shared memory file
+    in the directory, if there is one
+    """
+    from gallop.executors import run_in_worker
+    res = run_in_worker(func, unpack(args), unpack(kwargs))
+    if directory is not None:
+        size = shared_size(res)
+        if size is not None and size >= min_size and size > 0:
+            return write_shared(res, directory)
+    return res
+
+
+def receive(res: Any) -> Any:
+    """
+    Open a result sent back from a worker through shared memory
+    """
+    if type(res) == SharedHandle:
+        return adopt(res)
+    return res
+
+
+def set_transport(
+    enabled: bool = True,
+    min_size: int = DEFAULT_MIN_SIZE
+):
+    """
+    Put the large checked in values to shared memory,
+    for the process executor to hand them over without pickling
+    """
+    TRANSPORT["enabled"] = enabled
+    TRANSPORT["min_size"] = int(min_size)
+    TRANSPORT_HOOKS["enter"] = share if enabled else None
+    TRANSPORT_HOOKS["leave"] = unshare if enabled else None
+
+
+def close_transport():
+    """
+    Remove every shared memory file of this process
+    """
+    with BLOCKS_LOCK:
+        blocks = list(BLOCKS.values())
+        BLOCKS.clear()
+    for block in blocks:
+        free(block)
+    directory = TRANSPORT["directory"]
+    if directory is not None and os.getpid() == TRANSPORT["pid"]:
+        import shutil
+        shutil.rmtree(directory, ignore_errors=True)
+        TRANSPORT["directory"] = None
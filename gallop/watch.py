@@ -0,0 +1,121 @@
+from gallop.config import BaseConfig
+from gallop.schedule import Scheduler, Step, flatten_steps, assemble
+from gallop.checkpoint import step_hash
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from pathlib import Path
+from time import sleep
+import logging
+import os
+
+
+def dirty_steps(
+    steps: List[Step],
+    done: Dict[Tuple[Any, ...], Tuple[str, Any]]
+) -> Set[int]:
+    """
+    Index of the steps to run again:
+    new or changed since they were done, or downstream of such a step
+    """
+    dirty = set()
+    for step in steps:
+        entry = done.get(step.path)
+        if entry is None or entry[0] != step_hash(step):
+            dirty.add(step.index)
+        elif step.upstream & dirty:
+            dirty.add(step.index)
+    return dirty
+
+
+class Watcher:
+    """
+    Run a task, then run it again on every save of the task file,
+    only the changed steps and the steps downstream of them,
+    the clean steps keep their values in CLASS_ROOM
+    """
+    def __init__(
+        self,
+        path: Path,
+        load: Optional[Callable[[Path], BaseConfig]] = None,
+        workers: int = 1,
+        interval: float = 0.5,
+    ):
+        self.path = Path(path)
+        self.load = load or BaseConfig.from_yaml
+        self.workers = workers
+        self.interval = interval
+        # path of a step => (hash of the step config, result)
+        self.done: Dict[Tuple[Any, ...], Tuple[str, Any]] = dict()
+        self.stamp = None
+
+    def file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self) -> bool:
+        """
+        Whether the task file changed since the last run
+        """
+        stamp = self.file_stamp()
+        return stamp is not None and stamp != self.stamp
+
+    def step_done(
+        self,
+        step: Step,
+        result: Any,
+        results: Dict[Any, Any]
+    ) -> Any:
+        self.done[step.path] = (step_hash(step), result)
+        return result
+
+    def run_once(self) -> Any:
+        """
+        Run the dirty steps, return the result of the task
+        """
+        self.stamp = self.file_stamp()
+        config = self.load(self.path)
+        steps = flatten_steps(config)
+        dirty = dirty_steps(steps, self.done)
+        logging.warning(
+            f"👀 Running {len(dirty)} of {len(steps)} steps")
+
+        paths = set(step.path for step in steps)
+        for path in list(self.done):
+            if path not in paths:
+                # the step is gone
+                del self.done[path]
+        for step in steps:
+            if step.index in dirty:
+                self.done.pop(step.path, None)
+
+        scheduler = Scheduler(self.workers, [self.step_done])
+        scheduler.run_steps(list(
+            step for step in steps if step.index in dirty))
+        results = dict(
+            (step.path, self.done[step.path][1]) for step in steps)
+        return assemble(config, results)
+
+    def watch(self, on_result: Optional[Callable[[Any], Any]] = None):
+        """
+        Run on every change of the task file, until interrupted,
+        a failed run is logged and the failed steps run again next time
+        """
+        logging.warning(f"👀 Watching {self.path}")
+        try:
+            while True:
+                if self.poll():
+                    try:
+                        result = self.run_once()
+                    except KeyboardInterrupt:
+                        raise
+                    except Exception as e:
+                        logging.error(f"❌ Run failed: {e}")
+                    else:
+                        if on_result is not None:
+                            on_result(result)
+                    logging.warning(f"👀 Watching {self.path}")
+                sleep(self.interval)
+        except KeyboardInterrupt:
+            logging.warning("👋 Stopped watching")
@@ -0,0 +1,99 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import to_classroom, cl
+from subprocess import check_output
+from time import time
+import asyncio
+
+
+@to_classroom("async_fetch")
+async def async_fetch(value, seconds: float = 0.3):
+    """
+    A stand-in of an async http/db client
+    """
+    await asyncio.sleep(seconds)
+    return value
+
+
+def async_config() -> BaseConfig:
+    return BaseConfig(
+        fetch_task=[
+            # no upstream, the fetches run at once
+            dict(
+                func_name="async_fetch", args=[i], checkin=f"fetched_{i}",
+                depends_on=[])
+            for i in range(4)
+        ] + [
+            dict(
+                func_name="use:builtins.sum",
+                args=[[dict(checkout=f"fetched_{i}") for i in range(4)]],
+                checkin="fetched_sum")
+        ]
+    )
+
+
+def test_aresolve_item():
+    start = time()
+    result = asyncio.run(Caller.aresolve_item(async_config()))
+    assert time() - start < 1.0
+
+    assert result["fetch_task"] == [0, 1, 2, 3, 6]
+    assert cl("fetched_sum") == 6
+
+
+def test_sync_call_awaits_coroutine():
+    result = Caller.resolve_item(async_config())
+    assert result["fetch_task"] == [0, 1, 2, 3, 6]
+
+
+def test_sync_call_inside_running_loop():
+    async def main():
+        # eg. a notebook cell, or a sync step under acall
+        return Caller.resolve_item(async_config())
+
+    result = asyncio.run(main())
+    assert result["fetch_task"] == [0, 1, 2, 3, 6]
+
+
+def test_process_step_does_not_block_loop():
+    config = BaseConfig(steps=[
+        dict(
+            func_name="use:time.sleep", args=[0.5], executor="process"),
+        dict(func_name="async_fetch", args=[1], checkin="loop_fetched"),
+    ])
+
+    async def main():
+        start = time()
+        task = asyncio.ensure_future(Caller.aresolve_item(config))
+        # the loop keeps running while the worker sleeps
+        await asyncio.sleep(0.1)
+        ticked = time() - start
+        await task
+        return ticked
+
+    assert asyncio.run(main()) < 0.4
+
+
+APPENDED = []
+
+
+@to_classroom("async_append")
+async def async_append(value, seconds: float = 0.):
+    await asyncio.sleep(seconds)
+    APPENDED.append(value)
+    return value
+
+
+def test_list_keeps_order():
+    # the steps share APPENDED, not a checkin name
+    APPENDED.clear()
+    config = BaseConfig(steps=[
+        dict(func_name="async_append", args=[1, 0.2]),
+        dict(func_name="async_append", args=[2]),
+    ])
+    asyncio.run(Caller.aresolve_item(config))
+    assert APPENDED == [1, 2]
+
+
+def test_command_line_asyncio():
+    check_output("gallop test/dag_task --asyncio", shell=True)
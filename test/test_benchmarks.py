@@ -0,0 +1,34 @@
+from pathlib import Path
+import pytest
+import sys
+
+
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+@pytest.fixture
+def bench(monkeypatch):
+    """
+    The benchmarks/run.py module, benchmarks/ is on sys.path for the test
+    """
+    # run.py adds to sys.path too, restored after the test
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    monkeypatch.syspath_prepend(str(BENCHMARKS))
+    import run
+    return run
+
+
+def test_cases_run(bench):
+    for name in ("resolve_deep", "config_apply_patch", "importer_cold"):
+        assert bench.time_case(name, repeat=1, loops=1) > 0
+
+
+def test_baseline_covers_the_cases(bench):
+    baseline = bench.load_baseline(bench.BASELINE)
+    assert set(baseline["results"]) == set(bench.CASES)
+
+
+def test_regression_threshold(bench):
+    baseline = dict(fast=1.0, slow=1.0)
+    results = dict(fast=1.1, slow=1.5, new=1.0)
+    assert bench.compare(results, baseline, threshold=0.2) == ["slow"]
@@ -0,0 +1,103 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import to_classroom, cl
+from gallop.cache import (
+    ResultCache, RESULT_CACHE, set_result_cache, refresh_steps
+)
+import pytest
+import os
+
+
+CALLS = []
+
+
+@to_classroom("counted_heavy")
+def counted_heavy(n: int) -> list:
+    CALLS.append(n)
+    return list(range(n))
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    cache = ResultCache(tmp_path, max_size=2 ** 20)
+    original = RESULT_CACHE["cache"]
+    set_result_cache(cache)
+    yield cache
+    set_result_cache(original)
+    refresh_steps([])
+
+
+def cache_config(n: int, cache=True) -> BaseConfig:
+    return BaseConfig(
+        func_name="counted_heavy",
+        args=[n],
+        cache=cache,
+        checkin="heavy_result")
+
+
+def test_cache_hit(result_cache):
+    CALLS.clear()
+    Caller.resolve_item(cache_config(5))
+    Caller.resolve_item(cache_config(5))
+    assert CALLS == [5]
+    assert cl("heavy_result") == [0, 1, 2, 3, 4]
+
+    # different args, different key
+    Caller.resolve_item(cache_config(6))
+    assert CALLS == [5, 6]
+
+    # different version, different key
+    Caller.resolve_item(cache_config(5, cache="v2"))
+    assert CALLS == [5, 6, 5]
+
+
+def test_cache_opt_in(result_cache):
+    CALLS.clear()
+    Caller.resolve_item(cache_config(3, cache=False))
+    Caller.resolve_item(cache_config(3, cache=False))
+    assert CALLS == [3, 3]
+
+
+def test_refresh(result_cache):
+    CALLS.clear()
+    Caller.resolve_item(cache_config(4))
+    refresh_steps(["heavy_result"])
+    Caller.resolve_item(cache_config(4))
+    assert CALLS == [4, 4]
+
+
+def test_eviction(tmp_path):
+    cache = ResultCache(tmp_path)
+    keys = list(
+        cache.make_key("counted_heavy", [i], {}) for i in range(4))
+    for i, key in enumerate(keys):
+        cache.put(key, b"x" * 1000)
+        os.utime(cache.path(key), (i, i))
+    cache.max_size = 3000
+    cache.evict()
+    assert cache.get(keys[0])[0] is False
+    assert cache.get(keys[-1]) == (True, b"x" * 1000)
+
+
+def test_key_is_canonical():
+    make_key = ResultCache.make_key
+    assert make_key("f", [dict(a=1, b=2)], {}) == \
+        make_key("f", [dict(b=2, a=1)], {})
+    assert make_key("f", [{"x", "y", "z"}], {}) == \
+        make_key("f", [{"z", "y", "x"}], {})
+    assert make_key("f", [1], {}) != make_key("f", [1.0], {})
+    assert make_key("f", [1], {}) != make_key("f", ["1"], {})
+    assert make_key("f", [[1, 2]], {}) != make_key("f", [[2, 1]], {})
+    assert make_key("f", [], dict(a=[1])) != make_key("f", [[1]], {})
+
+
+def test_put_evicts_beyond_max_size(tmp_path):
+    cache = ResultCache(tmp_path, max_size=3500)
+    keys = list(
+        cache.make_key("counted_heavy", [i], {}) for i in range(6))
+    for key in keys:
+        cache.put(key, b"x" * 1000)
+    assert cache.size <= 3500
+    assert cache.size == cache.scan_size()
+    assert cache.get(keys[-1]) == (True, b"x" * 1000)
+    assert len(list(tmp_path.glob("*/*.tmp"))) == 0
@@ -98,3 +98,7 @@ def test_split_result():
 
     assert cl("split_result_a") == 1
     assert cl("split_result_b") == 2
+
+
+def test_caller_in_classroom():
+    assert cl("Caller") is Caller
@@ -0,0 +1,99 @@
+from gallop.config import BaseConfig
+from gallop.classroom import to_classroom, cl, new_run
+from gallop.schedule import Scheduler, flatten_steps, assemble
+from gallop.checkpoint import Checkpoint
+import pytest
+
+
+CALLS = []
+FAIL = dict(on=True)
+
+
+@to_classroom("counted_add")
+def counted_add(a, b):
+    CALLS.append((a, b))
+    return a + b
+
+
+@to_classroom("flaky_double")
+def flaky_double(x):
+    if FAIL["on"]:
+        raise RuntimeError("flaky")
+    return x * 2
+
+
+def pipeline_config(first: int = 1) -> BaseConfig:
+    return BaseConfig(
+        steps=[
+            dict(func_name="counted_add", args=[first, 2], checkin="ck_a"),
+            dict(
+                func_name="counted_add",
+                args=[dict(checkout="ck_a"), 10],
+                checkin="ck_b"),
+            dict(
+                func_name="flaky_double",
+                args=[dict(checkout="ck_b")],
+                checkin="ck_c"),
+        ]
+    )
+
+
+def run(config, run_dir, resume=False, workers=1):
+    steps = flatten_steps(config)
+    checkpoint = Checkpoint(run_dir)
+    results = dict()
+    if resume:
+        steps, results = checkpoint.restore(steps)
+    results.update(Scheduler(workers, [checkpoint]).run_steps(steps))
+    return assemble(config, results)
+
+
+def test_resume_skips_done_steps(tmp_path):
+    CALLS.clear()
+    FAIL["on"] = True
+    with new_run():
+        with pytest.raises(RuntimeError):
+            run(pipeline_config(), tmp_path)
+    assert CALLS == [(1, 2), (3, 10)]
+    assert (tmp_path / "manifest.json").exists()
+
+    FAIL["on"] = False
+    with new_run():
+        result = run(pipeline_config(), tmp_path, resume=True)
+        # restored from the checkpoint
+        assert cl("ck_a") == 3
+        assert cl("ck_c") == 26
+    assert CALLS == [(1, 2), (3, 10)]
+    assert result == dict(steps=[3, 13, 26])
+
+
+def test_changed_step_runs_again(tmp_path):
+    FAIL["on"] = False
+    with new_run():
+        run(pipeline_config(), tmp_path)
+    CALLS.clear()
+    with new_run():
+        result = run(pipeline_config(5), tmp_path, resume=True, workers=2)
+    # the first step changed, the second depends on it
+    assert CALLS == [(5, 2), (7, 10)]
+    assert result == dict(steps=[7, 17, 34])
+
+
+def test_arrays_are_memory_mapped(tmp_path):
+    np = pytest.importorskip("numpy")
+    checkpoint = Checkpoint(tmp_path)
+    filename = checkpoint.save_value("array", np.arange(10))
+    assert filename.endswith(".npy")
+    array = checkpoint.load_value(filename)
+    assert isinstance(array, np.memmap)
+    assert array.sum() == 45
+
+
+def test_checked_in_result_saved_once(tmp_path):
+    FAIL["on"] = False
+    with new_run():
+        run(pipeline_config(), tmp_path)
+    entry = Checkpoint(tmp_path).manifest["steps"]["steps.0"]
+    assert entry["names"] == dict(ck_a=entry["result"])
+    assert sorted(path.name for path in (tmp_path / "values").iterdir()) \
+        == ["step-0.pkl", "step-1.pkl", "step-2.pkl"]
@@ -1,4 +1,5 @@
 from gallop.config import BaseConfig
+import pytest
 
 config = BaseConfig(a=1)
 
@@ -78,3 +79,136 @@ def test_recursive():
     assert config2.b == config3.b == 2
     assert config2.c.hello.world == config3.c.hello.world == "here"
     assert len(config2) == len(config3) == 3
+
+
+def test_lazy_copy_on_write():
+    source = {"a": {"b": {"c": 1}}, "d": [{"e": 2}, (3, 4)]}
+    config = BaseConfig(**source)
+
+    # nested configs are made at the first read
+    assert type(config.conf_data["a"]) is dict
+    assert config.a.b.c == 1
+    assert type(config.conf_data["a"]) is BaseConfig
+    assert config.d[0].e == 2
+    assert config.d[1] == [3, 4]
+
+    # the source dict is not written
+    config.a.b.c = 5
+    config.overwrite("d.0.e", 6)
+    assert source == {"a": {"b": {"c": 1}}, "d": [{"e": 2}, (3, 4)]}
+    assert config.to_dict() == {"a": {"b": {"c": 5}}, "d": [{"e": 6}, [3, 4]]}
+
+    # copy shares until written
+    copied = config._copy()
+    copied.overwrite("a.b.c", 7)
+    assert copied.a.b.c == 7
+    assert config.a.b.c == 5
+
+
+def test_pickle():
+    import pickle
+    config = BaseConfig(a=1, b={"c": [1, {"d": 2}]})
+    config.b.c[1].d = 3
+    loaded = pickle.loads(pickle.dumps(config))
+    assert loaded.to_dict() == config.to_dict()
+    assert loaded.b.c[1].d == 3
+
+
+def patch_config() -> BaseConfig:
+    return BaseConfig(
+        a=dict(b=dict(c=1)),
+        steps=[dict(x=0), dict(x=1), dict(x=2)],
+    )
+
+
+def test_apply_patch():
+    config = patch_config()
+    config.apply_patch([
+        dict(op="set", path="a.b.c", value=2),
+        dict(op="add", path="a.b.d", value=3),
+        dict(op="replace", path="/steps/1/x", value=10),
+        dict(op="add", path="steps.0", value=dict(x=-1)),
+        dict(op="add", path="steps.-", value=dict(x=3)),
+        dict(op="remove", path="steps.2"),
+        dict(op="remove", path="a.b.c"),
+    ])
+    assert config.to_dict() == dict(
+        a=dict(b=dict(d=3)),
+        steps=[dict(x=-1), dict(x=0), dict(x=2), dict(x=3)],
+    )
+    # the index follows the shifted list
+    config.overwrite("steps.1.x", 5)
+    assert config.steps[1].x == 5
+
+
+def test_apply_patch_errors():
+    config = patch_config()
+    with pytest.raises(ValueError):
+        config.apply_patch([dict(op="move", path="a", value=1)])
+    with pytest.raises(ValueError):
+        config.apply_patch([dict(op="add", path="a.b")])
+    with pytest.raises(ValueError):
+        config.apply_patch([dict(op="replace", path="a.b.z", value=1)])
+    with pytest.raises(ValueError):
+        config.apply_patch([dict(op="set", path="a.nothing.c", value=1)])
+    with pytest.raises(ValueError):
+        config.apply_patch([dict(op="add", path="steps.9", value=1)])
+
+
+def test_path_index_is_reset_on_writes():
+    config = patch_config()
+    config.overwrite("a.b.c", 2)
+    # replaced outside of overwrite
+    config.a = dict(b=dict(c=5))
+    config.overwrite("a.b.e", 6)
+    assert config.to_dict()["a"] == dict(b=dict(c=5, e=6))
+    config.overwrite("steps.0.x", 7)
+    config.steps[0] = BaseConfig(x=8)
+    config.reset_index()
+    config.overwrite("steps.0.y", 9)
+    assert config.to_dict()["steps"][0] == dict(x=8, y=9)
+
+
+def test_apply_patch_all_or_nothing():
+    config = patch_config()
+    with pytest.raises(ValueError):
+        config.apply_patch([
+            dict(op="set", path="a.b.c", value=2),
+            dict(op="remove", path="steps.0"),
+            dict(op="replace", path="a.b.z", value=1),
+        ])
+    assert config.to_dict() == patch_config().to_dict()
+
+
+def test_overwrite_errors():
+    config = patch_config()
+    with pytest.raises(KeyError):
+        config.overwrite("a.nothing.c", 1)
+    with pytest.raises(IndexError):
+        config.overwrite("steps.9.x", 1)
+
+
+def test_path_index_sees_nested_writes():
+    config = patch_config()
+    config.overwrite("a.b.c", 2)
+    # written on the nested config, not through the root
+    config.a.b = dict(c=3)
+    config.overwrite("a.b.d", 4)
+    assert config.to_dict()["a"] == dict(b=dict(c=3, d=4))
+    # an index per config
+    other = patch_config()
+    other.overwrite("a.b.c", 5)
+    config.overwrite("a.b.c", 6)
+    assert other.a.b.c == 5 and config.a.b.c == 6
+
+
+def test_keys_named_like_internals():
+    config = BaseConfig(
+        shared=1, index=2, copy=3, wrap=4, substantiated=5, own_data=6,
+        version=8)
+    assert (config.shared, config.index, config.copy, config.wrap) == \
+        (1, 2, 3, 4)
+    assert (config.substantiated, config.own_data, config.version) == \
+        (5, 6, 8)
+    config.index = 7
+    assert config["index"] == 7
@@ -0,0 +1,86 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.schedule import Scheduler
+from gallop.classroom import (
+    CLASS_ROOM, to_classroom, cl, mark_sn, new_run, checkin
+)
+from threading import Thread, Barrier
+from time import sleep
+
+
+@to_classroom("slow_echo")
+def slow_echo(value, seconds: float = 0.05):
+    sleep(seconds)
+    return value
+
+
+def echo_config(value) -> BaseConfig:
+    return BaseConfig(
+        steps=[
+            dict(func_name="slow_echo", args=[value], checkin="ctx_value"),
+            dict(
+                func_name="slow_echo",
+                args=[dict(checkout="ctx_value")],
+                checkin="ctx_copy"),
+        ]
+    )
+
+
+def test_private_checkins():
+    checkin("ctx_shared", "warm")
+    with new_run("a") as run:
+        checkin("ctx_value", 1)
+        # the shared layer is read through the run
+        assert cl("ctx_shared") == "warm"
+        # a checkin shadows the shared value inside the run only
+        checkin("ctx_shared", "cold")
+        assert cl("ctx_shared") == "cold"
+        assert "ctx_value" in run.room
+    assert cl("ctx_shared") == "warm"
+    assert "ctx_value" not in CLASS_ROOM
+
+
+def test_registered_classes_are_shared():
+    with new_run():
+        @to_classroom("ctx_registered")
+        def ctx_registered():
+            return 1
+    assert cl("ctx_registered")() == 1
+
+
+def test_serial_numbers_per_run():
+    with new_run():
+        assert [mark_sn(), mark_sn()] == [0, 1]
+    with new_run():
+        assert mark_sn() == 0
+
+
+def test_concurrent_runs():
+    barrier = Barrier(4)
+    outputs = dict()
+
+    def run(value):
+        with new_run(str(value)):
+            barrier.wait()
+            Caller.resolve_item(echo_config(value))
+            outputs[value] = (cl("ctx_value"), cl("ctx_copy"))
+
+    threads = list(Thread(target=run, args=(i,)) for i in range(4))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outputs == dict((i, (i, i)) for i in range(4))
+    assert "ctx_copy" not in CLASS_ROOM
+
+
+def test_scheduler_threads_see_the_run():
+    config = BaseConfig(
+        steps=[
+            dict(func_name="slow_echo", args=[i], checkin=f"ctx_par_{i}")
+            for i in range(3)
+        ])
+    with new_run() as run:
+        Scheduler(3).resolve_item(config)
+        assert set(run.room) == {"ctx_par_0", "ctx_par_1", "ctx_par_2"}
+    assert "ctx_par_0" not in CLASS_ROOM
@@ -0,0 +1,59 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.schedule import Scheduler
+from gallop.classroom import to_classroom, cl
+import pytest
+import os
+
+
+@to_classroom("square_sum")
+def square_sum(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_process_executor():
+    Caller.resolve_item(BaseConfig(
+        steps=[
+            dict(
+                func_name="use:os.getpid",
+                executor="process",
+                checkin="worker_pid"),
+            dict(
+                func_name="square_sum",
+                executor="process",
+                args=[10],
+                checkin="worker_square_sum"),
+        ]
+    ))
+    assert cl("worker_pid") != os.getpid()
+    assert cl("worker_square_sum") == square_sum(10)
+
+
+def test_process_executor_parallel():
+    config = BaseConfig(
+        steps=[
+            dict(
+                func_name="square_sum",
+                executor="process",
+                args=[i * 1000],
+                checkin=f"square_sum_{i}")
+            for i in range(4)
+        ]
+    )
+    result = Scheduler(workers=4).resolve_item(config)
+    assert result["steps"] == list(square_sum(i * 1000) for i in range(4))
+
+
+def test_unknown_executor():
+    with pytest.raises(ValueError):
+        Caller(BaseConfig(func_name="square_sum", executor="gpu"))
+
+
+def test_one_process_pool():
+    from gallop.executors import get_process_pool, set_process_workers
+    from concurrent.futures import ThreadPoolExecutor
+    set_process_workers(2)
+    with ThreadPoolExecutor(8) as threads:
+        pools = list(threads.map(lambda _: get_process_pool(), range(8)))
+    assert all(pool is pools[0] for pool in pools)
+    set_process_workers(None)
@@ -0,0 +1,54 @@
+from gallop.config import BaseConfig
+from gallop import loader
+import pytest
+import os
+
+
+@pytest.fixture
+def config_cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(loader.CONFIG_CACHE, "cache_dir", tmp_path / "cache")
+    monkeypatch.setitem(loader.CONFIG_CACHE, "enabled", True)
+    parsed = []
+    parse_yaml = loader.parse_yaml
+
+    def counted_parse_yaml(path):
+        parsed.append(path)
+        return parse_yaml(path)
+
+    monkeypatch.setattr(loader, "parse_yaml", counted_parse_yaml)
+    return parsed
+
+
+def test_parsed_config_cache(tmp_path, config_cache):
+    path = tmp_path / "task.yaml"
+    path.write_text("a: 1\nb:\n  c: [1, 2]\n")
+
+    assert BaseConfig.from_yaml(path).b.c == [1, 2]
+    assert BaseConfig.from_yaml(path).b.c == [1, 2]
+    assert len(config_cache) == 1
+
+    # changed file, parse again
+    path.write_text("a: 1\nb:\n  c: [1, 2, 3]\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert BaseConfig.from_yaml(path).b.c == [1, 2, 3]
+    assert len(config_cache) == 2
+
+
+def test_c_loader():
+    yaml = pytest.importorskip("yaml")
+    if yaml.__with_libyaml__:
+        assert loader.yaml_loader() is yaml.CSafeLoader
+    else:
+        assert loader.yaml_loader() is yaml.SafeLoader
+
+
+def test_paused_gc_nests():
+    import gc
+    assert gc.isenabled()
+    with loader.paused_gc():
+        with loader.paused_gc():
+            assert not gc.isenabled()
+        # another parse is still running
+        assert not gc.isenabled()
+    assert gc.isenabled()
@@ -0,0 +1,97 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import to_classroom, cl
+from threading import get_ident
+import pytest
+
+
+BATCHES = []
+
+
+@to_classroom("square_batch")
+def square_batch(batch, offset: int = 0):
+    BATCHES.append((len(batch), get_ident()))
+    return list(x * x + offset for x in batch)
+
+
+@to_classroom("cube_one")
+def cube_one(x: int) -> int:
+    return x ** 3
+
+
+def map_config(**kwargs) -> BaseConfig:
+    return BaseConfig(
+        steps=[
+            dict(
+                func_name="use:builtins.range", args=[10],
+                checkin="map_numbers"),
+            dict(
+                map="square_batch",
+                over=dict(checkout="map_numbers"),
+                kwargs=dict(offset=1),
+                checkin="map_squares",
+                **kwargs),
+        ]
+    )
+
+
+def test_map_items():
+    Caller.resolve_item(BaseConfig(
+        cubes=dict(
+            map="cube_one",
+            over=[1, 2, 3],
+            checkin="map_cubes")))
+    assert cl("map_cubes") == [1, 8, 27]
+
+
+def test_map_batches():
+    BATCHES.clear()
+    Caller.resolve_item(map_config(batch_size=4))
+    assert cl("map_squares") == list(x * x + 1 for x in range(10))
+    assert list(size for size, _ in BATCHES) == [4, 4, 2]
+
+
+def test_map_thread_pool():
+    BATCHES.clear()
+    Caller.resolve_item(map_config(batch_size=2, workers=3, chunk_size=1))
+    assert cl("map_squares") == list(x * x + 1 for x in range(10))
+    assert len(BATCHES) == 5
+
+
+def test_map_process_pool():
+    Caller.resolve_item(BaseConfig(
+        cubes=dict(
+            map="use:math.factorial",
+            over=list(range(8)),
+            workers=2,
+            executor="process",
+            checkin="map_factorials")))
+    assert cl("map_factorials") == [1, 1, 2, 6, 24, 120, 720, 5040]
+
+
+def test_map_batch_size_mismatch():
+    with pytest.raises(ValueError):
+        Caller.resolve_item(BaseConfig(
+            bad=dict(map="use:builtins.sum", over=[1, 2], batch_size=2)))
+
+
+def test_map_checkin_list():
+    Caller.resolve_item(BaseConfig(
+        cubes=dict(
+            map="cube_one",
+            over=[1, 2],
+            checkin=["map_cube_1", "map_cube_2"])))
+    assert cl("map_cube_1") == 1
+    assert cl("map_cube_2") == 8
+
+
+def test_map_executor_names():
+    Caller.resolve_item(BaseConfig(
+        cubes=dict(
+            map="cube_one", over=[1, 2, 3], workers=2, executor="local",
+            checkin="map_cubes")))
+    assert cl("map_cubes") == [1, 8, 27]
+    for executor in ("thread", "remote"):
+        with pytest.raises(ValueError):
+            Caller.resolve_item(BaseConfig(
+                cubes=dict(map="cube_one", over=[1], executor=executor)))
@@ -0,0 +1,114 @@
+from gallop.config import BaseConfig
+from gallop.classroom import CLASS_ROOM, to_classroom, cl
+from gallop.schedule import Scheduler, flatten_steps, assemble
+from gallop.memory import (
+    Liveness, MemoryBudget, set_memory_budget, track_budget, parse_size
+)
+import os
+
+
+@to_classroom("make_blob")
+def make_blob(size: int) -> bytes:
+    return b"x" * size
+
+
+@to_classroom("blob_size")
+def blob_size(*blobs) -> int:
+    return sum(len(blob) for blob in blobs)
+
+
+def pipeline_config() -> BaseConfig:
+    return BaseConfig(
+        steps=[
+            dict(func_name="make_blob", args=[10], checkin="live_a"),
+            dict(func_name="make_blob", args=[20], checkin="live_b"),
+            dict(
+                func_name="blob_size",
+                args=[dict(checkout="live_a")],
+                checkin="live_size_a"),
+            dict(
+                func_name="blob_size",
+                args=[dict(checkout="live_a"), dict(checkout="live_b")],
+                checkin="live_total"),
+        ]
+    )
+
+
+def test_parse_size():
+    assert parse_size(1000) == 1000
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5GB") == int(1.5 * 2**30)
+
+
+def test_release_after_last_consumer():
+    config = pipeline_config()
+    steps = flatten_steps(config)
+    released = []
+
+    def watch(step, result, results):
+        released.append(
+            (step.index, "live_a" in CLASS_ROOM, "live_b" in CLASS_ROOM))
+        return result
+
+    scheduler = Scheduler(
+        callbacks=[Liveness(steps, keep=["live_total"]), watch])
+    result = assemble(config, scheduler.run_steps(steps))
+    # live_a is read by step 3, live_b by step 3
+    assert released == [
+        (0, True, False),
+        (1, True, True),
+        (2, True, True),
+        (3, False, False),
+    ]
+    assert "live_size_a" not in CLASS_ROOM
+    assert cl("live_total") == 30
+    # the results of released steps are dropped
+    assert result["steps"] == [None, None, None, 30]
+
+
+def test_release_in_parallel():
+    config = pipeline_config()
+    steps = flatten_steps(config)
+    scheduler = Scheduler(3, callbacks=[Liveness(steps)])
+    scheduler.run_steps(steps)
+    for name in ("live_a", "live_b", "live_size_a", "live_total"):
+        assert name not in CLASS_ROOM
+    # registered classes are never released
+    assert "make_blob" in CLASS_ROOM
+
+
+def test_spill_and_reload(tmp_path):
+    budget = set_memory_budget(25, str(tmp_path))
+    try:
+        config = pipeline_config()
+        scheduler = Scheduler(callbacks=[track_budget])
+        scheduler.run_steps(flatten_steps(config))
+        # live_a is the coldest, spilled when live_b comes in
+        assert "live_a" in CLASS_ROOM.spilled
+        assert "live_a" in CLASS_ROOM
+        assert len(os.listdir(tmp_path)) >= 1
+        assert cl("live_total") == 30
+        # reading loads it back
+        assert cl("live_a") == b"x" * 10
+        assert "live_a" not in CLASS_ROOM.spilled
+        assert budget.usage <= 25 or len(budget.sizes) == 1
+    finally:
+        set_memory_budget(None)
+    assert len(CLASS_ROOM.spilled) == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_unpicklable_stays(tmp_path):
+    budget = MemoryBudget(10, str(tmp_path))
+    CLASS_ROOM["unpicklable_gen"] = (i for i in range(3))
+    CLASS_ROOM["picklable_list"] = list(range(100))
+    budget.track("unpicklable_gen")
+    budget.track("picklable_list")
+    budget.enforce()
+    assert dict.__contains__(CLASS_ROOM, "unpicklable_gen")
+    assert "picklable_list" in CLASS_ROOM.spilled
+    CLASS_ROOM["picklable_list"] = [1]
+    # checking in again drops the spilled value
+    assert "picklable_list" not in CLASS_ROOM.spilled
+    assert os.listdir(tmp_path) == []
+    budget.close()
@@ -0,0 +1,85 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.plan import Call, Const, Node
+from gallop.classroom import to_classroom, cl
+import pytest
+
+
+@to_classroom("make_tokenizer")
+def make_tokenizer(sep: str):
+    return lambda text: text.split(sep)
+
+
+def test_plan_equals_resolve():
+    config = BaseConfig.from_yaml("./test/use_task.yaml")
+    plan = Caller.compile(config)
+    assert plan() == Caller.resolve_item(config)
+    assert plan() == plan()
+    assert cl("reconstructed_data")[3] == {"somekey": "somevalue"}
+
+
+def test_plan_nodes():
+    config = BaseConfig(
+        steps=[
+            dict(
+                func_name="make_tokenizer",
+                args=[","],
+                checkin="tokenizer"),
+            dict(
+                func_name="tokenizer",
+                args=["a,b,c"],
+                kwargs=dict(),
+                checkin="tokens"),
+        ]
+    )
+    plan = Caller.compile(config)
+    make_step, tokenize_step = plan.root.items[0].items
+    assert type(make_step) is Call
+    assert make_step.caller is not None
+    assert type(make_step.args) is Const
+    # checked in by an earlier step, resolved at run time
+    assert tokenize_step.caller is None
+
+    assert plan() == {"steps": [cl("tokenizer"), ["a", "b", "c"]]}
+    assert cl("tokens") == ["a", "b", "c"]
+
+
+def test_caller_reusable():
+    caller = Caller(BaseConfig(
+        func_name="use:json.dumps",
+        args=[dict(func_name="use:json.loads", args=["[1, 2]"])]))
+    assert caller() == caller() == "[1, 2]"
+
+
+@to_classroom("append_one")
+def append_one(values):
+    values.append(1)
+    return len(values)
+
+
+def test_const_not_shared_between_runs():
+    plan = Caller.compile(BaseConfig(
+        step=dict(func_name="append_one", args=[[0]])))
+    assert plan() == plan() == dict(step=2)
+
+
+def test_plan_depths_match_resolve():
+    from gallop.trace import start_tracing, stop_tracing
+    config = BaseConfig(task=dict(
+        func_name="use:json.dumps",
+        args=[[dict(func_name="use:json.loads", args=["[1]"])]],
+        kwargs=dict(indent=dict(func_name="use:builtins.int", args=["2"]))))
+
+    def depths(run):
+        tracer = start_tracing()
+        run()
+        stop_tracing()
+        return sorted((span.func_name, span.depth) for span in tracer.spans)
+
+    assert depths(lambda: Caller.resolve_item(config)) == \
+        depths(Caller.compile(config))
+
+
+def test_node_is_abstract():
+    with pytest.raises(TypeError):
+        Node()
@@ -0,0 +1,74 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import CLASS_ROOM
+from gallop.funcs import Importer, PREIMPORTS, IMPORT_TIMES
+from gallop.preimport import (
+    use_names, preimport, import_report, get_import_pool
+)
+import sys
+import pytest
+
+
+SLOW_MODULE = """
+import time
+time.sleep(0.2)
+IMPORTS = IMPORTS + 1 if "IMPORTS" in globals() else 1
+
+
+def double(x):
+    return x * 2
+"""
+
+
+@pytest.fixture
+def slow_module(tmp_path, monkeypatch):
+    (tmp_path / "gallop_slow_module.py").write_text(SLOW_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "gallop_slow_module"
+    sys.modules.pop("gallop_slow_module", None)
+    for name in ("gallop_slow_module", "gallop_slow_module.double"):
+        CLASS_ROOM.pop(name, None)
+        PREIMPORTS.pop(name, None)
+        IMPORT_TIMES.pop(name, None)
+
+
+def test_use_names():
+    config = BaseConfig(
+        a=dict(func_name="use:math.sqrt", args=[4]),
+        b=[dict(
+            func_name="use:math.pow",
+            args=[dict(func_name="use:math.sqrt", args=[9]), 2])],
+        c=dict(map="use:builtins.abs", over=[-1]),
+        d=dict(func_name="some_registered", text="use:not.a.step"),
+    )
+    assert use_names(config) == ["math.sqrt", "math.pow", "builtins.abs"]
+
+
+def test_preimport_shares_the_import(slow_module):
+    futures = preimport([f"{slow_module}.double"])
+    assert list(futures) == [f"{slow_module}.double"]
+    # pending or done, not imported twice
+    assert preimport([f"{slow_module}.double"]) == dict()
+
+    item = dict(func_name=f"use:{slow_module}.double", args=[21])
+    assert Caller.resolve_item(BaseConfig(step=item)) == dict(step=42)
+    assert sys.modules[slow_module].IMPORTS == 1
+    assert IMPORT_TIMES[f"{slow_module}.double"] >= 0.2
+    assert any(
+        line.endswith(f"{slow_module}.double") for line in import_report())
+
+
+def test_failed_preimport_raises_in_step():
+    futures = preimport(["gallop_missing_module.func"])
+    future = futures["gallop_missing_module.func"]
+    future.exception()
+    with pytest.raises(ImportError):
+        Importer("gallop_missing_module.func")
+    assert "gallop_missing_module.func" not in PREIMPORTS
+
+
+def test_one_import_pool():
+    preimport(["json.dumps"])
+    pool = get_import_pool()
+    preimport(["json.loads"])
+    assert get_import_pool() is pool
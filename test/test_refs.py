@@ -0,0 +1,69 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.graph import step_names
+from gallop.plan import compile_plan
+from gallop.refs import (
+    OPENERS, REFERENCES, register_opener, is_reference, close_references
+)
+import os
+import pytest
+
+
+def test_bytes_reference(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"gallop" * 100)
+    view = Caller.checkout_val(f"bytes:{path}")
+    assert type(view) == memoryview
+    assert view.readonly
+    assert bytes(view[:6]) == b"gallop"
+    # opened once per path
+    assert Caller.checkout_val(f"bytes:{path}") is view
+
+    # opened again after the file changed
+    path.write_bytes(b"horses")
+    os.utime(path, ns=(1, 1))
+    assert bytes(Caller.checkout_val(f"bytes:{path}")) == b"horses"
+    close_references()
+    assert len(REFERENCES) == 0
+
+
+def test_reference_in_steps(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"abc")
+    item = dict(
+        func_name="use:builtins.len",
+        args=[dict(checkout=f"mmap:{path}")])
+    assert Caller.resolve_item(BaseConfig(step=item)) == dict(step=3)
+    assert compile_plan(BaseConfig(step=item))() == dict(step=3)
+    # not a name in CLASS_ROOM, no step waits for it
+    assert step_names(item) == (set(), set())
+
+
+@pytest.fixture
+def lines_opener():
+    @register_opener("lines")
+    def open_lines(path):
+        with open(path) as f:
+            return f.read().splitlines()
+
+    yield open_lines
+    close_references()
+    OPENERS.pop("lines", None)
+
+
+def test_custom_opener(tmp_path, lines_opener):
+    path = tmp_path / "a.txt"
+    path.write_text("a\nb\n")
+    assert is_reference(f"lines:{path}")
+    assert not is_reference("env:HOME")
+    assert Caller.checkout_val(f"lines:{path}") == ["a", "b"]
+
+
+def test_numpy_memmap(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "array.npy")
+    np.save(path, np.arange(10))
+    array = Caller.checkout_val(f"mmap:{path}")
+    assert isinstance(array, np.memmap)
+    assert not array.flags.writeable
+    assert array.sum() == 45
@@ -0,0 +1,182 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import CLASS_ROOM
+from gallop.remote import (
+    REMOTE, RemoteHandle, set_remote, parse_worker, request,
+    stop_worker, close_remote, serve_worker
+)
+from pathlib import Path
+from subprocess import PIPE, Popen, run
+from time import sleep
+import os
+import re
+import secrets
+import socket
+import sys
+import pytest
+
+
+GALLOP = str(Path(__file__).parent.parent / "gallop" / "bin" / "gallop")
+
+AUTHKEY = secrets.token_hex(8)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(address, timeout: float = 20.):
+    for _ in range(int(timeout / 0.1)):
+        try:
+            return request(address, ("ping",))
+        except (ConnectionRefusedError, EOFError):
+            sleep(0.1)
+    raise TimeoutError(f"Worker {address} did not start")
+
+
+@pytest.fixture(scope="module")
+def workers():
+    addresses = list(("127.0.0.1", free_port()) for _ in range(2))
+    processes = list(
+        Popen([
+            sys.executable, GALLOP, "worker", "--port", str(port),
+            "--authkey", AUTHKEY])
+        for _, port in addresses)
+    authkey, REMOTE["authkey"] = REMOTE["authkey"], AUTHKEY.encode()
+    try:
+        pids = list(wait_ready(address)["pid"] for address in addresses)
+        yield addresses, pids
+    finally:
+        for address in addresses:
+            try:
+                stop_worker(address)
+            except Exception:
+                pass
+        for process in processes:
+            process.wait(timeout=10)
+        close_remote(free=False)
+        REMOTE["authkey"] = authkey
+
+
+@pytest.fixture
+def remote(workers, monkeypatch):
+    addresses, _ = workers
+    # set_remote replaces the list, restored after the test
+    monkeypatch.setitem(REMOTE, "workers", [])
+    set_remote(",".join(f"{host}:{port}" for host, port in addresses))
+    yield workers
+    close_remote()
+
+
+def test_parse_worker(monkeypatch):
+    monkeypatch.setitem(REMOTE, "workers", [])
+    assert parse_worker(7001) == ("127.0.0.1", 7001)
+    assert parse_worker("10.0.0.2:7001") == ("10.0.0.2", 7001)
+    set_remote("127.0.0.1:7001,127.0.0.1:7002")
+    assert REMOTE["workers"] == [("127.0.0.1", 7001), ("127.0.0.1", 7002)]
+
+
+def test_authkey_required(monkeypatch):
+    monkeypatch.setitem(REMOTE, "authkey", None)
+    with pytest.raises(ValueError, match="authkey"):
+        request(("127.0.0.1", free_port()), ("ping",))
+    # the public key, on localhost too
+    with pytest.raises(ValueError, match="public"):
+        serve_worker(free_port(), authkey="gallop")
+
+
+def test_worker_makes_a_key(monkeypatch):
+    port = free_port()
+    env = dict(os.environ)
+    env.pop("GALLOP_AUTHKEY", None)
+    process = Popen(
+        [sys.executable, GALLOP, "worker", "--port", str(port)],
+        env=env, stderr=PIPE)
+    try:
+        line = process.stderr.readline().decode()
+        key = re.search(r"--authkey (\w+)", line).group(1)
+        assert key != "gallop"
+        monkeypatch.setitem(REMOTE, "authkey", key.encode())
+        assert wait_ready(("127.0.0.1", port))["pid"] == process.pid
+        stop_worker(port)
+        process.wait(timeout=10)
+    finally:
+        process.kill()
+        process.stderr.close()
+        close_remote(free=False)
+
+
+def test_remote_step(remote):
+    _, pids = remote
+    config = BaseConfig(pid=dict(func_name="use:os.getpid", executor="remote"))
+    pid = Caller.resolve_item(config)["pid"]
+    assert pid in pids and pid != os.getpid()
+
+
+def test_remote_error(remote):
+    config = BaseConfig(root=dict(
+        func_name="use:math.sqrt", args=[-1], executor="remote"))
+    with pytest.raises(ValueError, match="math domain error"):
+        Caller.resolve_item(config)
+
+
+def test_resident_values(remote):
+    addresses, _ = remote
+    config = BaseConfig(steps=[
+        dict(
+            func_name="use:builtins.list", args=[[1, 2, 3]],
+            executor="remote", resident=True, worker="%s:%d" % addresses[0],
+            checkin="remote_numbers"),
+        # a remote step runs on the worker holding the value
+        dict(
+            func_name="use:builtins.len",
+            args=[dict(checkout="remote_numbers")],
+            executor="remote"),
+        # a remote step on the other worker fetches it from the first
+        dict(
+            func_name="use:builtins.max",
+            args=[dict(checkout="remote_numbers")],
+            executor="remote", worker="%s:%d" % addresses[1]),
+        # a local step fetches it
+        dict(
+            func_name="use:builtins.sum",
+            args=[dict(checkout="remote_numbers")]),
+    ])
+    handle, length, largest, total = Caller.resolve_item(config)["steps"]
+    assert type(handle) == RemoteHandle
+    assert type(CLASS_ROOM["remote_numbers"]) == RemoteHandle
+    assert (length, largest, total) == (3, 3, 6)
+    assert handle.fetch() == [1, 2, 3]
+    assert request(addresses[0], ("ping",))["resident"] == 1
+
+    close_remote()
+    assert request(addresses[0], ("ping",))["resident"] == 0
+    CLASS_ROOM.pop("remote_numbers")
+
+
+def test_cli_remote(remote, tmp_path):
+    addresses, pids = remote
+    task = tmp_path / "remote_task.yaml"
+    task.write_text(
+        "data:\n"
+        "  func_name: use:builtins.range\n"
+        "  args: [5]\n"
+        "  executor: remote\n"
+        "  resident: true\n"
+        "  checkin: remote_range\n"
+        "total:\n"
+        "  func_name: use:builtins.sum\n"
+        "  args:\n"
+        "    - checkout: remote_range\n"
+        "  checkin: remote_total\n")
+    workers = ",".join(f"{host}:{port}" for host, port in addresses)
+    res = run(
+        [sys.executable, GALLOP, str(task), "--remote", workers,
+         "--authkey", AUTHKEY, "--output", "remote_total"],
+        capture_output=True, check=True)
+    assert res.stdout.decode().strip().endswith("10\x1b[0m")
+    # the run frees the values it left on the workers
+    for address in addresses:
+        assert request(address, ("ping",))["resident"] == 0
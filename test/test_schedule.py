@@ -0,0 +1,72 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.schedule import Scheduler, flatten_steps
+from gallop.classroom import to_classroom, cl
+from time import sleep, time
+from subprocess import check_output
+
+
+@to_classroom("slow_load")
+def slow_load(value, seconds: float = 0.3):
+    sleep(seconds)
+    return value
+
+
+@to_classroom("join_values")
+def join_values(*values):
+    return list(values)
+
+
+def parallel_config() -> BaseConfig:
+    return BaseConfig(
+        load_task=[
+            dict(func_name="slow_load", args=[i], checkin=f"loaded_{i}")
+            for i in range(4)
+        ] + [
+            dict(
+                func_name="join_values",
+                args=[dict(checkout=f"loaded_{i}") for i in range(4)],
+                checkin="joined")
+        ]
+    )
+
+
+def test_dependency_graph():
+    steps = flatten_steps(parallel_config())
+    assert len(steps) == 5
+    for step in steps[:4]:
+        assert step.upstream == set()
+    assert steps[4].upstream == {0, 1, 2, 3}
+
+
+def test_write_after_read():
+    steps = flatten_steps(BaseConfig(
+        steps=[
+            dict(func_name="slow_load", args=[dict(checkout="x")]),
+            dict(func_name="slow_load", args=[2], checkin="x"),
+            dict(func_name="slow_load", args=[3], depends_on="x"),
+        ]
+    ))
+    assert steps[1].upstream == {0}
+    assert steps[2].upstream == {1}
+
+
+def test_parallel_run():
+    sequential = Caller.resolve_item(parallel_config())
+
+    start = time()
+    parallel = Scheduler(workers=4).resolve_item(parallel_config())
+    assert time() - start < 1.0
+
+    assert parallel == sequential
+    assert cl("joined") == [0, 1, 2, 3]
+
+
+def test_depends_on():
+    steps = flatten_steps(BaseConfig.from_yaml("./test/dag_task.yaml"))
+    # read_file waits for write_file, through depends_on
+    assert steps[0].index in steps[1].upstream
+
+
+def test_command_line_workers():
+    check_output("gallop test/dag_task --workers 2", shell=True)
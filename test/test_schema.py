@@ -0,0 +1,139 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import to_classroom
+from gallop.schema import schema, field
+from typing import Dict, List, Optional, Tuple
+import pickle
+import pytest
+
+try:
+    from typing import Literal
+except ImportError:
+    # python 3.7
+    from typing_extensions import Literal
+
+
+@schema
+class Optimizer:
+    name: Literal["adam", "sgd"] = "adam"
+    lr: float = 1e-3
+
+
+@to_classroom("TrainSchema")
+@schema
+class Train:
+    epochs: int
+    optimizer: Optimizer = field(default_factory=Optimizer)
+    layers: List[int] = [64, 64]
+    heads: Dict[str, Optimizer] = {}
+    shape: Tuple[int, int] = (28, 28)
+    note: Optional[str] = None
+
+    def depth(self) -> int:
+        return len(self.layers)
+
+
+def test_schema_fields():
+    train = Train(epochs=3, optimizer=dict(lr=1), heads=dict(
+        cls=dict(name="sgd")))
+    assert train.epochs == 3
+    # int to float, nested dict to the nested class
+    assert train.optimizer.lr == 1.0 and type(train.optimizer.lr) == float
+    assert train.heads["cls"].name == "sgd"
+    assert train.shape == (28, 28)
+    assert train.depth() == 2
+    assert Train.__slots__ == (
+        "epochs", "optimizer", "layers", "heads", "shape", "note")
+    assert not hasattr(train, "__dict__")
+    with pytest.raises(AttributeError):
+        train.unknown = 1
+
+
+def test_schema_defaults_are_not_shared():
+    a, b = Train(epochs=1), Train(epochs=1)
+    a.layers.append(1)
+    a.optimizer.lr = 0.5
+    assert b.layers == [64, 64]
+    assert b.optimizer.lr == 1e-3
+
+
+@pytest.mark.parametrize("data, message", [
+    (dict(), "Train: missing key epochs"),
+    (dict(epochs="3"), "Train.epochs: expected int"),
+    (dict(epochs=True), "Train.epochs: expected int"),
+    (dict(epochs=1, epoch=2), "Train: unknown key epoch"),
+    (dict(epochs=1, layers=[1, "2"]), "Train.layers.1: expected int"),
+    (dict(epochs=1, optimizer=dict(name="rmsprop")),
+     "Train.optimizer.name: expected one of"),
+    (dict(epochs=1, shape=[1]), "Train.shape: expected 2 items"),
+])
+def test_schema_validation(data, message):
+    with pytest.raises(ValueError, match=message):
+        Train.from_dict(data)
+
+
+def test_schema_wrong_default():
+    with pytest.raises(ValueError):
+        @schema
+        class Wrong:
+            count: int = "one"
+    # a list default is checked before it is copied per config
+    with pytest.raises(ValueError, match="WrongList.sizes.1"):
+        @schema
+        class WrongList:
+            sizes: List[int] = [1, "2"]
+
+
+def test_schema_dict_default_to_schema():
+    @schema
+    class WithHead:
+        head: Optimizer = dict(name="sgd")
+
+    a, b = WithHead(), WithHead()
+    assert type(a.head) == Optimizer and a.head.name == "sgd"
+    assert a.head is not b.head
+
+
+def test_schema_setitem_validates():
+    train = Train(epochs=1)
+    train["epochs"] = 2
+    assert train["epochs"] == 2
+    with pytest.raises(ValueError):
+        train["epochs"] = "two"
+    with pytest.raises(KeyError):
+        train["epoch"] = 2
+
+
+def test_schema_to_dict_and_files(tmp_path):
+    train = Train(epochs=2, heads=dict(cls=dict()))
+    data = dict(
+        epochs=2, optimizer=dict(name="adam", lr=1e-3), layers=[64, 64],
+        heads=dict(cls=dict(name="adam", lr=1e-3)), shape=[28, 28],
+        note=None)
+    assert train.to_dict() == data
+    for name in ("train.yaml", "train.json"):
+        train.to_file(tmp_path / name)
+        assert Train.from_file(tmp_path / name) == train
+    assert Train.from_config(BaseConfig(**data)) == train
+    assert pickle.loads(pickle.dumps(train)) == train
+    assert train.copy() == train and train.copy() is not train
+
+
+def test_schema_inheritance():
+    @schema
+    class FineTune(Train):
+        freeze: bool = False
+
+    tune = FineTune(epochs=1)
+    assert FineTune.__slots__ == ("freeze",)
+    assert list(tune.keys())[-1] == "freeze"
+    assert tune.to_dict()["freeze"] is False
+
+
+def test_schema_in_steps():
+    config = BaseConfig(train=dict(
+        func_name="TrainSchema",
+        kwargs=dict(epochs=5, optimizer=dict(lr=0.1))))
+    train = Caller.resolve_item(config)["train"]
+    assert type(train) == Train
+    assert train.optimizer.lr == 0.1
@@ -0,0 +1,126 @@
+from gallop.config import BaseConfig
+from gallop.serializers import (
+    SERIALIZERS, Serializer, register_serializer, get_serializer
+)
+import json
+import pytest
+import yaml
+
+
+DATA = dict(
+    name="gallop",
+    n=3,
+    ratio=0.5,
+    flag=True,
+    empty=None,
+    tags=["a", "b"],
+    nested=dict(
+        deep=dict(value="1", items=[dict(x=1), [2, 3]]),
+        text="multi\nline: text",
+    ),
+)
+
+
+def test_get_serializer():
+    assert get_serializer("json").name == "json"
+    assert get_serializer(path="task.yml").name == "yaml"
+    assert get_serializer(path="task.JSON").name == "json"
+    assert get_serializer(path="task.msgpack").name == "msgpack"
+    # unknown extension reads as yaml
+    assert get_serializer(path="task").name == "yaml"
+    with pytest.raises(ValueError):
+        get_serializer("toml")
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_json_roundtrip(tmp_path, stream):
+    config = BaseConfig(**DATA)
+    # a nested value set after loading
+    config["nested"]["added"] = dict(y=[1])
+    path = tmp_path / "config.json"
+    config.to_json(path, stream=stream)
+    expected = config.to_dict()
+    with open(path) as f:
+        assert json.load(f) == expected
+    assert BaseConfig.from_json(path).to_dict() == expected
+    assert BaseConfig.from_file(path).to_dict() == expected
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_yaml_roundtrip(tmp_path, stream):
+    config = BaseConfig(**DATA)
+    path = tmp_path / "config.yaml"
+    config.to_yaml(path, stream=stream)
+    with open(path) as f:
+        assert yaml.safe_load(f) == DATA
+    assert BaseConfig.from_file(path).to_dict() == DATA
+
+
+def test_yaml_stream_keeps_string_types(tmp_path):
+    config = BaseConfig(a="1", b="true", c="null", d=1, e=1.0)
+    path = tmp_path / "config.yaml"
+    config.to_yaml(path, stream=True)
+    with open(path) as f:
+        assert yaml.safe_load(f) == config.to_dict()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_msgpack_roundtrip(tmp_path, stream):
+    pytest.importorskip("msgpack")
+    config = BaseConfig(**DATA)
+    path = tmp_path / "config.msgpack"
+    config.to_file(path, stream=stream)
+    assert BaseConfig.from_file(path).to_dict() == DATA
+
+
+def test_register_serializer(tmp_path):
+    @register_serializer("lines", (".lines",))
+    class LinesSerializer(Serializer):
+        def dump(self, data, f):
+            for key, value in data.items():
+                f.write(f"{key}={value}\n")
+
+        def load(self, path):
+            with open(path) as f:
+                return dict(line.strip().split("=") for line in f)
+
+    try:
+        path = tmp_path / "config.lines"
+        BaseConfig(a="x", b="y").to_file(path)
+        assert path.read_text() == "a=x\nb=y\n"
+        assert BaseConfig.from_file(path).to_dict() == dict(a="x", b="y")
+    finally:
+        del SERIALIZERS["lines"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_json_keeps_nan(tmp_path, stream):
+    config = BaseConfig(lr=float("nan"), limit=float("inf"), none=None)
+    path = tmp_path / "config.json"
+    config.to_json(path, stream=stream)
+    with open(path) as f:
+        assert "NaN" in f.read()
+    loaded = BaseConfig.from_json(path)
+    assert loaded.lr != loaded.lr
+    assert (loaded.limit, loaded.none) == (float("inf"), None)
+
+
+def test_serializer_is_abstract():
+    class HalfSerializer(Serializer):
+        def dump(self, data, f):
+            pass
+
+    with pytest.raises(TypeError):
+        HalfSerializer()
+
+
+def test_json_null_keeps_orjson(tmp_path, monkeypatch):
+    serializer = get_serializer("json")
+    if serializer.orjson is None:
+        pytest.skip("needs orjson")
+    # a None, or null in a string, is no reason for the json module
+    monkeypatch.setattr(json, "dump", None)
+    path = tmp_path / "config.json"
+    BaseConfig(empty=None, text="null").to_json(path)
+    assert BaseConfig.from_json(path).to_dict() == \
+        dict(empty=None, text="null")
@@ -0,0 +1,111 @@
+from gallop.serve import make_server, send_request, parse_address
+from gallop.classroom import to_classroom
+from subprocess import check_output
+from threading import Thread
+import os
+import pytest
+import stat
+
+
+LOADS = []
+
+
+@to_classroom("load_resident_model")
+def load_resident_model():
+    LOADS.append(1)
+    return dict(weight=3)
+
+
+@to_classroom("infer_resident")
+def infer_resident(model, x: int) -> int:
+    return model["weight"] * x
+
+
+@pytest.fixture
+def server(tmp_path):
+    preload = tmp_path / "warm.yaml"
+    preload.write_text(
+        "warm_up:\n"
+        "  func_name: load_resident_model\n"
+        "  checkin: resident_model\n")
+    server = make_server(str(tmp_path / "gallop.sock"), preload=preload)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield str(tmp_path / "gallop.sock")
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_address():
+    assert parse_address(8765) == ("127.0.0.1", 8765)
+    assert parse_address("localhost:8765") == ("localhost", 8765)
+    assert parse_address("/tmp/gallop.sock") == "/tmp/gallop.sock"
+
+
+def test_warm_server(server):
+    LOADS.clear()
+    config = dict(
+        infer=dict(
+            func_name="infer_resident",
+            args=[dict(checkout="resident_model"), 1],
+            checkin="inferred"))
+    for x in range(3):
+        response = send_request(
+            server, config=config,
+            params={"infer.args.1": x}, output="inferred")
+        assert response == dict(ok=True, output=3 * x)
+    # the model stays loaded
+    assert LOADS == []
+
+
+def test_failed_request(server):
+    response = send_request(server, config=dict(func_name="not_there"))
+    assert response["ok"] is False
+    assert "not_there" in response["error"]
+
+
+def test_command_line_client(server):
+    res = check_output(
+        f"gallop test/use_task --server {server} "
+        "--output reconstructed_data",
+        shell=True)
+    assert "somekey" in res.decode()
+
+
+def test_socket_path_is_private(server):
+    assert stat.S_IMODE(os.stat(server).st_mode) == 0o600
+
+
+def test_keeps_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+    with pytest.raises(ValueError):
+        make_server(str(path))
+    assert path.read_text() == "keep me"
+
+
+def test_tcp_server_needs_the_authkey(monkeypatch):
+    monkeypatch.delenv("GALLOP_AUTHKEY", raising=False)
+    server = make_server(("127.0.0.1", 0))
+    # a random key when none is set
+    assert len(server.authkey) == 32
+    server.authkey = "test-secret"
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    address = server.server_address
+    config = dict(answer=dict(func_name="use:builtins.abs", args=[-3]))
+    try:
+        assert send_request(address, config=config) == dict(
+            ok=False, error="Wrong authkey")
+        response = send_request(
+            address, authkey="test-secret", config=config,
+            print_result=True)
+        assert response == dict(ok=True, result=dict(answer=3))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_public_authkey_refused():
+    with pytest.raises(ValueError):
+        make_server(("127.0.0.1", 0), authkey="gallop")
@@ -0,0 +1,92 @@
+"""
+Cold start benchmark of the gallop command line
+"""
+from pathlib import Path
+from subprocess import run
+from time import perf_counter
+import sys
+
+
+GALLOP = str(Path(__file__).parent.parent / "gallop" / "bin" / "gallop")
+
+# modules the common 'gallop task --param:... --output x' form
+# should never import, once the task yaml is parsed and cached
+HEAVY_MODULES = [
+    "fire", "yaml", "regex", "asyncio",
+    "multiprocessing", "concurrent.futures.process",
+]
+
+# seconds over a bare 'python -c pass'
+STARTUP_BUDGET = 0.5
+
+
+def imported_modules(args) -> set:
+    res = run(
+        [sys.executable, "-X", "importtime"] + args,
+        capture_output=True, check=True)
+    modules = set()
+    for line in res.stderr.decode().splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.split("|")[-1].strip())
+    return modules
+
+
+def best_time(args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        run([sys.executable] + args, capture_output=True, check=True)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def test_import_gallop_is_light():
+    modules = imported_modules(["-c", "import gallop"])
+    assert "gallop.config" not in modules
+    assert "gallop.call" not in modules
+
+
+def test_cli_skips_heavy_imports():
+    args = [GALLOP, "test/use_task", "--param:simple_task.2.kwargs.b.0", "1"]
+    # the first run parses the yaml and caches it
+    run([sys.executable] + args, capture_output=True, check=True)
+    modules = imported_modules(args)
+    assert "gallop.call" in modules
+    for module in HEAVY_MODULES:
+        assert module not in modules, f"{module} imported at startup"
+
+
+def test_cold_start_budget():
+    baseline = best_time(["-c", "pass"])
+    startup = best_time([GALLOP, "test/use_task"])
+    assert startup - baseline < STARTUP_BUDGET, \
+        f"cold start {startup - baseline:.3f}s over budget"
+
+
+def load_cli():
+    from importlib.machinery import SourceFileLoader
+    from importlib.util import module_from_spec, spec_from_loader
+    loader = SourceFileLoader("gallop_cli", GALLOP)
+    module = module_from_spec(spec_from_loader("gallop_cli", loader))
+    loader.exec_module(module)
+    return module
+
+
+def test_parse_argv_no_flags():
+    parse_argv = load_cli().parse_argv
+    assert parse_argv(["task", "--no-cache"]) == ("task", dict(cache=False))
+    assert parse_argv(["task", "--no_print_result"]) == \
+        ("task", dict(print_result=False))
+    # flags that only start with 'no'
+    assert parse_argv(["task", "--note", "--normalize"]) == \
+        ("task", dict(note=True, normalize=True))
+    assert parse_argv(["task", "--no-such-flag"]) == \
+        ("task", dict(no_such_flag=True))
+
+
+def test_parse_value_like_fire():
+    parse_value = load_cli().parse_value
+    assert parse_value("3") == 3 and parse_value("1e3") == 1000.
+    assert parse_value("[1, 2]") == [1, 2]
+    for word in ("nan", "inf", "-inf", "Infinity"):
+        assert parse_value(word) == word
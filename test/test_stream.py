@@ -0,0 +1,67 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.stream import Stream
+from gallop.classroom import to_classroom, cl
+from time import sleep
+import pytest
+
+
+PRODUCED = []
+
+
+@to_classroom("read_records")
+def read_records(n: int):
+    for i in range(n):
+        PRODUCED.append(i)
+        yield i
+
+
+@to_classroom("double_records")
+def double_records(records):
+    for record in records:
+        yield record * 2
+
+
+@to_classroom("sum_chunks")
+def sum_chunks(chunks):
+    return list(sum(chunk) for chunk in chunks)
+
+
+def test_stream_pipeline():
+    Caller.resolve_item(BaseConfig(
+        pipeline=[
+            dict(
+                func_name="read_records", args=[10],
+                stream=dict(maxsize=2), checkin="records"),
+            dict(
+                func_name="double_records",
+                args=[dict(checkout="records")],
+                stream=dict(maxsize=2, chunk_size=4), checkin="doubled"),
+            dict(
+                func_name="sum_chunks",
+                args=[dict(checkout="doubled")],
+                checkin="chunk_sums"),
+        ]
+    ))
+    assert cl("chunk_sums") == [12, 44, 34]
+
+
+def test_backpressure():
+    PRODUCED.clear()
+    stream = Stream(read_records(100), maxsize=2)
+    sleep(0.2)
+    # bounded queue, plus the item waiting to be put
+    assert len(PRODUCED) <= 4
+    assert sum(stream) == sum(range(100))
+
+
+def test_stream_error():
+    def broken():
+        yield 1
+        raise ValueError("broken record")
+
+    stream = Stream(broken())
+    with pytest.raises(ValueError):
+        list(stream)
+    with pytest.raises(RuntimeError):
+        list(stream)
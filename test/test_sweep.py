@@ -0,0 +1,79 @@
+from gallop.config import BaseConfig
+from gallop.sweep import Sweep, expand_grid, affected_steps
+from gallop.schedule import flatten_steps
+from gallop.classroom import to_classroom
+from subprocess import check_output
+import os
+
+
+CALLS = []
+
+
+@to_classroom("load_warm_model")
+def load_warm_model(scale: int):
+    CALLS.append(("load", os.getpid()))
+    return dict(scale=scale)
+
+
+@to_classroom("predict_with")
+def predict_with(model, x: int, bias: int = 0):
+    CALLS.append(("predict", os.getpid()))
+    return model["scale"] * x + bias
+
+
+def sweep_config() -> BaseConfig:
+    return BaseConfig(
+        sweep_task=[
+            dict(func_name="load_warm_model", args=[10], checkin="model"),
+            dict(
+                func_name="predict_with",
+                args=[dict(checkout="model"), 1],
+                checkin="prediction"),
+            dict(
+                func_name="use:builtins.str",
+                args=[dict(checkout="prediction")],
+                checkin="prediction_text"),
+        ]
+    )
+
+
+def test_expand_grid():
+    assert expand_grid(dict(a=[1, 2], b=[3])) == [
+        dict(a=1, b=3), dict(a=2, b=3)]
+
+
+def test_affected_steps():
+    steps = flatten_steps(sweep_config())
+    assert affected_steps(
+        steps, [{"sweep_task.1.args.1": 2}]) == {1, 2}
+    assert affected_steps(
+        steps, [{"sweep_task.0.args.0": 2}]) == {0, 1, 2}
+
+
+def test_sweep_shares_prefix():
+    variants = expand_grid({
+        "sweep_task.1.args.1": [1, 2],
+        "sweep_task.1.kwargs": [dict(bias=0), dict(bias=5)],
+    })
+    CALLS.clear()
+    rows = Sweep(
+        sweep_config(), variants,
+        outputs=["prediction"], workers=2).run()
+    assert list(row["prediction"] for row in rows) == [10, 15, 20, 25]
+    # the warm prefix ran once, in this process
+    assert CALLS == [("load", os.getpid())]
+
+    CALLS.clear()
+    rows = Sweep(sweep_config(), variants).run()
+    assert rows[3]["result"] == {"sweep_task": [dict(scale=10), 25, "25"]}
+    assert list(call for call, _ in CALLS) == ["load"] + ["predict"] * 4
+
+
+def test_command_line_sweep(tmp_path):
+    output = tmp_path / "sweep.jsonl"
+    res = check_output(
+        "gallop test/use_task --sweep test/sweep.yaml "
+        f"--output reconstructed_data --sweep_output {output}",
+        shell=True)
+    assert len(res.decode().strip().splitlines()) >= 2
+    assert len(output.read_text().strip().splitlines()) == 2
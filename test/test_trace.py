@@ -0,0 +1,42 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.trace import start_tracing, stop_tracing
+from subprocess import check_output
+import json
+
+
+def test_trace_spans():
+    tracer = start_tracing()
+    try:
+        Caller.resolve_item(BaseConfig.from_yaml("./test/use_task.yaml"))
+    finally:
+        stop_tracing()
+
+    spans = dict((span.func_name, span) for span in tracer.spans)
+    loads = spans["use:json.loads"]
+    read_file = spans["use:gallop.funcs.read_file"]
+    assert read_file.parent == loads.sn
+    assert read_file.depth == loads.depth + 1
+    assert loads.begin <= read_file.begin <= read_file.end <= loads.resolved
+    assert loads.resolved <= loads.end
+
+    events = tracer.chrome_events()
+    assert len(events) == 3 * len(tracer.spans)
+    names = set(event["name"] for event in events)
+    assert {"use:json.loads", "resolve args", "call"} <= names
+
+    stacks = dict(
+        line.rsplit(" ", 1) for line in tracer.collapsed_stacks())
+    assert "use:json.loads;use:gallop.funcs.read_file" in stacks
+
+
+def test_command_line_trace(tmp_path):
+    trace_path = tmp_path / "trace.json"
+    stacks_path = tmp_path / "trace.folded"
+    check_output(
+        f"gallop test/use_task --trace {trace_path} "
+        f"--trace_stacks {stacks_path}",
+        shell=True)
+    trace = json.loads(trace_path.read_text())
+    assert len(trace["traceEvents"]) == 3 * 5
+    assert len(stacks_path.read_text().strip().splitlines()) == 5
@@ -0,0 +1,98 @@
+from gallop.config import BaseConfig
+from gallop.call import Caller
+from gallop.classroom import to_classroom, cl, checkin, release, new_run
+from gallop.transport import (
+    set_transport, close_transport, BLOCKS, SharedHandle, pack, unpack
+)
+import os
+import pickle
+import pytest
+
+
+@to_classroom("make_payload")
+def make_payload(size: int) -> bytes:
+    return bytes(range(256)) * (size // 256)
+
+
+@pytest.fixture
+def transport():
+    set_transport(True, min_size=1024)
+    yield
+    set_transport(False)
+    close_transport()
+
+
+def test_checkin_goes_to_shared_memory(transport):
+    Caller.resolve_item(BaseConfig(
+        payload=dict(
+            func_name="make_payload", args=[4096], checkin="tr_payload"),
+        small=dict(
+            func_name="make_payload", args=[256], checkin="tr_small"),
+    ))
+    payload = cl("tr_payload")
+    assert type(payload) == memoryview
+    assert payload.readonly is False
+    assert bytes(payload) == make_payload(4096)
+    # below the min size, kept as is
+    assert type(cl("tr_small")) == bytes
+
+    block = BLOCKS[id(payload)]
+    assert block.refs == 1
+    assert os.path.exists(block.handle.path)
+
+    # a handle pickles small and opens as a view of the same memory
+    handle = pack([payload])[0]
+    assert type(handle) == SharedHandle
+    assert len(pickle.dumps(handle)) < 200
+    view = unpack(pickle.loads(pickle.dumps(handle)))
+    assert view.readonly
+    payload[0] = 255
+    assert view[0] == 255
+
+    release("tr_payload")
+    assert id(payload) not in BLOCKS
+    assert not os.path.exists(block.handle.path)
+
+
+def test_refs_of_shared_checkins(transport):
+    with new_run():
+        Caller.resolve_item(BaseConfig(
+            payload=dict(
+                func_name="make_payload", args=[2048], checkin="tr_a"),
+        ))
+        payload = cl("tr_a")
+        # the same view checked in twice
+        checkin("tr_b", payload)
+        block = BLOCKS[id(payload)]
+        assert block.refs == 2
+        release("tr_a")
+        assert os.path.exists(block.handle.path)
+    # the run is over, its checkins leave the CLASS_ROOM
+    assert not os.path.exists(block.handle.path)
+
+
+def test_process_executor_with_shared_memory(transport):
+    Caller.resolve_item(BaseConfig(steps=[
+        dict(func_name="make_payload", args=[8192], checkin="tr_input"),
+        dict(
+            func_name="use:builtins.bytes",
+            args=[dict(checkout="tr_input")],
+            executor="process",
+            checkin="tr_copy"),
+    ]))
+    copy = cl("tr_copy")
+    # came back through shared memory
+    assert type(copy) == memoryview
+    assert id(copy) in BLOCKS
+    assert bytes(copy) == make_payload(8192)
+
+
+def test_arrays(transport):
+    np = pytest.importorskip("numpy")
+    view = checkin("tr_array", np.arange(1000, dtype="float64"))
+    assert type(view) == np.ndarray
+    assert id(view) in BLOCKS
+    handle = pack(view)
+    opened = unpack(handle)
+    assert opened.sum() == view.sum()
+    assert not opened.flags.writeable
@@ -0,0 +1,76 @@
+from gallop.classroom import to_classroom, cl
+from gallop.watch import Watcher
+import os
+import pytest
+
+
+CALLS = []
+
+
+@to_classroom("watched_add")
+def watched_add(a, b):
+    CALLS.append((a, b))
+    return a + b
+
+
+TASK = """
+steps:
+  - func_name: watched_add
+    args: [{a}, 1]
+    checkin: watched_a
+  - func_name: watched_add
+    args: [{b}, 1]
+    checkin: watched_b
+  - func_name: watched_add
+    args:
+      - checkout: watched_a
+      - 100
+    checkin: watched_c
+"""
+
+
+def write_task(path, a, b):
+    path.write_text(TASK.format(a=a, b=b))
+    # a distinct mtime for every save
+    stamp = os.stat(path).st_mtime_ns + len(CALLS) * 10 ** 9
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_rerun_dirty_steps(tmp_path):
+    path = tmp_path / "task.yaml"
+    CALLS.clear()
+    write_task(path, 1, 2)
+    watcher = Watcher(path)
+    assert watcher.poll()
+    assert watcher.run_once() == dict(steps=[2, 3, 102])
+    assert CALLS == [(1, 1), (2, 1), (2, 100)]
+    assert not watcher.poll()
+
+    # the second step is clean, the third reads the changed first step
+    CALLS.clear()
+    write_task(path, 5, 2)
+    assert watcher.poll()
+    assert watcher.run_once() == dict(steps=[6, 3, 106])
+    assert CALLS == [(5, 1), (6, 100)]
+    assert cl("watched_b") == 3
+
+    # only the second step
+    CALLS.clear()
+    write_task(path, 5, 7)
+    assert watcher.run_once() == dict(steps=[6, 8, 106])
+    assert CALLS == [(7, 1)]
+
+
+def test_failed_step_runs_again(tmp_path):
+    path = tmp_path / "task.yaml"
+    CALLS.clear()
+    write_task(path, 1, "not a number")
+    watcher = Watcher(path)
+    with pytest.raises(TypeError):
+        watcher.run_once()
+    assert CALLS == [(1, 1), ("not a number", 1)]
+
+    CALLS.clear()
+    write_task(path, 1, 2)
+    assert watcher.run_once() == dict(steps=[2, 3, 102])
+    assert CALLS == [(2, 1), (2, 100)]